@@ -3,4 +3,10 @@ from .breadth_first_search import BreadthFirstSearch
 from .a_star import AStar
 from .a_star_modified import AStarModified
 from .depth_first_search import DepthFirstSearch
-from .greedy_search import GreedySearch
\ No newline at end of file
+from .greedy_search import GreedySearch
+from .ida_star import IDAStar
+from .beam_search import BeamSearch
+from .expectimax import Expectimax
+from .mcts import MCTS
+from .search_algorithm import SearchBudget
+from .metrics import SearchMetrics
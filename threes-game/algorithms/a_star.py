@@ -1,22 +1,49 @@
-import heapq
 from .search_algorithm import SearchAlgorithm
 from state import State
 from structures.node import Node
+from structures.priority_queue import make_open_list
+from .strategy.cached_heuristic import with_cache
 
 class AStar(SearchAlgorithm):
     """Class that implements the A* algorithm for pathfinding."""
 
-    def __init__(self, initial_state: State, heuristic, headless=False):
+    def __init__(self, initial_state: State, heuristic, headless=False, cache_size=None, budget=None, metrics=None, open_list='heap', resolution=0.5, order='fifo', store=None):
         """
         Initializes the A* algorithm.
 
         :param initial_state: The initial state from which to start the search.
         :param heuristic: The heuristic function used for cost estimation.
         :param headless: Indicates whether the search runs without a graphical interface.
+        :param cache_size: Maximum number of heuristic values cached during the search, or None to disable the cache.
+        :param budget: The SearchBudget of every search, or None to search until the goal is found.
+        :param metrics: The SearchMetrics filled in by the algorithm, or None to create one.
+        :param open_list: 'heap' for an indexed binary heap, or 'bucket' for a bucket queue of the nodes
+                          grouped by f_cost, which moves to a heap at the first f_cost that is not a
+                          multiple of resolution (see BucketQueue), so nodes are always expanded in f_cost order.
+        :param resolution: Step between the f_costs of the buckets when open_list is 'bucket'.
+        :param order: 'fifo' or 'lifo', the order of the nodes with the same f_cost when open_list is 'bucket'.
+        :param store: A TranspositionStore with the plans of earlier runs, consulted at the root of every
+                      search and updated with every plan found, or None to disable it. Only the plans of
+                      A* runs with the same heuristic and budget are reused (see store_namespace).
         """
         self.headless = headless
-        self.heuristic = heuristic
-        self.result, self.path, self.moves_list, self.open, self.closed, self.depth = self.run_algorithm(initial_state.clone_state())
+        self.store = store
+        self.open_list_kind, self.resolution, self.order = open_list, resolution, order
+        self.heuristic = with_cache(heuristic, cache_size)
+        self.setup_metrics(headless, metrics)
+        self.setup_plan(initial_state, budget)
+        self.plan(initial_state.clone_state())
+
+    def plan(self, s):
+        """
+        Searches a plan from a state and stores it in the algorithm.
+
+        :param s: The state from which the algorithm runs.
+        """
+        self.metrics.start()
+        self.result, self.path, self.moves_list, self.open, self.closed, self.depth = self.run_algorithm(s)
+        self.metrics.stop()
+        self.save_to_store()
         self.it = 0
 
     def returnOpenAndClose(self):
@@ -26,64 +53,75 @@ class AStar(SearchAlgorithm):
         """
         Executes the A* algorithm to find the shortest path.
 
+        If the budget runs out, the result is "PARTIAL" and the path leads to the
+        generated node with the lowest heuristic value.
+
         :param s: The initial state from which the algorithm runs.
         :return: A tuple indicating the result of the search,
                  the path found, and the list of moves.
         """
-        g_cost = {s: 0}  # Cost from the start to each node
-        f_cost = {s: self.heuristic.evaluate(s)}  # Estimated total cost (g + h)
+        self.start_budget()
+        best, best_h = None, None  # Node with the lowest heuristic value, the partial plan if the budget runs out
+
+        g_cost = {s.key(): 0}  # Cost from the start to each node, keyed by state
+        f_cost = self.heuristic.evaluate(s)  # Estimated total cost (g + h)
+        self.metrics.evaluate()
 
-        A = Node(s, f_cost=self.heuristic.evaluate(s))  # Create a search tree A with root at s
-        OPEN_SET = []  # List of OPEN nodes with s
-        heapq.heappush(OPEN_SET, (f_cost[s], A))  # Initialize the OPEN set with s
-        open_set = {s: A}  # Dictionary for nodes in OPEN_SET
-        CLOSED_SET = set()  # Create an empty CLOSED set
+        A = Node(s, f_cost=f_cost)  # Create a search tree A with root at s
+        OPEN_SET = make_open_list(self.open_list_kind, self.resolution, self.order)  # OPEN nodes indexed by state, with decrease-key
+        self.open_list = OPEN_SET
+        OPEN_SET.push(s.key(), A, f_cost)  # Initialize the OPEN set with s
+        CLOSED_SET = set()  # Create an empty CLOSED set of state keys
 
         while OPEN_SET:
-            _, n = heapq.heappop(OPEN_SET)  # Select the node with the lowest f_cost
-            open_set.pop(n.value, None)  # Remove n from OPEN_SET
-            CLOSED_SET.add(n.value)  # Add n to CLOSED_SET
-            if not self.headless:
-                print(f"OPEN_SET: {len(OPEN_SET)} | CLOSED_SET: {len(CLOSED_SET)} | DEPTH: {len(n.antecesores())}")
+            key, n = OPEN_SET.pop()  # Select the node with the lowest f_cost and remove it from OPEN_SET
+            CLOSED_SET.add(key)  # Add n to CLOSED_SET
+            self.metrics.expand(len(OPEN_SET), n.depth)
 
             if n.value.completed_state():  # If n is the goal
-                return "SUCCESS", n.antecesores() + [n], n.moves_list() , len(OPEN_SET), len(CLOSED_SET), len(n.antecesores()) # Return the found path
-
-            M = n.sucesores_sin_antecesores()  # Expand n to get its successors
-
-            for n2 in M:  # For each successor n2
-                tentative_g_cost = g_cost[n.value] + n.value.edge_cost(n2.value)  # Cost to reach n2
-
-                f_cost_n2 = tentative_g_cost + self.heuristic.evaluate(n2.value)
-                n2.update_f_cost(tentative_g_cost, self.heuristic.evaluate(n2.value))
-                # If n2 is new
-                if n2.value not in CLOSED_SET and n2.value not in open_set:
-                    n2.father = n  # Pointer of n2 to n
-                    g_cost[n2.value] = tentative_g_cost
-                    f_cost[n2.value] = f_cost_n2
-                    heapq.heappush(OPEN_SET, (f_cost[n2.value], n2))  # Add n2 to OPEN_SET
-                    open_set[n2.value] = n2  # Add n2 to the OPEN set
-
-                # If n2 is not new, but the g(n2) cost is lower through the new path
-                elif tentative_g_cost < g_cost[n2.value]:
+                return "SUCCESS", n.antecesores() + [n], n.moves_list() , len(OPEN_SET), len(CLOSED_SET), n.depth # Return the found path
+
+            # If an earlier run with the same heuristic and budget searched from the root, follow its plan. A stored
+            # solution from a deeper node is not looked up: the search from n is not the search from the root.
+            stored = self.lookup_store(n) if n is A else None
+            if stored is not None:
+                tail, moves = stored
+                return "SUCCESS", n.antecesores() + [n] + tail, n.moves_list() + moves, len(OPEN_SET), len(CLOSED_SET), tail[-1].depth
+
+            with self.metrics.phase('expand'):
+                M = n.sucesores_sin_antecesores()  # Expand n to get its successors
+            with self.metrics.phase('heuristic'):
+                h_costs = self.evaluate_successors(M, n)  # Score all successors, from the features of n if the heuristic is incremental
+            self.metrics.evaluate(len(M))
+            pushed = 0
+
+            for n2, h_cost in zip(M, h_costs):  # For each successor n2
+                key2 = n2.value.key()
+                if key2 in CLOSED_SET:  # Nodes in CLOSED_SET are not reopened
+                    continue
+
+                tentative_g_cost = g_cost[key] + n.value.edge_cost(n2.value)  # Cost to reach n2
+                # If n2 is new, or the g(n2) cost is lower through the new path
+                if key2 not in g_cost or tentative_g_cost < g_cost[key2]:
+                    n2.update_f_cost(tentative_g_cost, h_cost)
                     n2.father = n  # Pointer of n2 to n
-                    g_cost[n2.value] = tentative_g_cost  # Update g_cost
-                    f_cost[n2.value] = f_cost_n2  # Update f_cost
+                    g_cost[key2] = tentative_g_cost
+                    OPEN_SET.push(key2, n2, n2.f_cost)  # Add n2 to OPEN_SET, or decrease its f_cost
+                    pushed += 1
+                    if best is None or h_cost < best_h:
+                        best, best_h = n2, h_cost
+            self.metrics.generate(len(M), len(M) - pushed, clones=4)  # sucesores clones the state once per move
 
-                    if n2.value not in CLOSED_SET:  # If n2 is not in CLOSED_SET, add it to OPEN_SET
-                        heapq.heappush(OPEN_SET, (f_cost[n2.value], n2))  # Add the node to OPEN_SET
-                        open_set[n2.value] = n2  # Add n2 to the OPEN set
+            if self.out_of_budget() and best is not None:  # If the budget runs out, return the path to the most promising node
+                return "PARTIAL", best.antecesores() + [best], best.moves_list(), len(OPEN_SET), len(CLOSED_SET), best.depth
 
-        return "FAILURE", [], []  # If OPEN_SET is empty, return 'FAILURE'.
+        return "FAILURE", [], [], 0, len(CLOSED_SET), 0  # If OPEN_SET is empty, return 'FAILURE'.
 
     def get_next_move(self):
         """
-        Gets the next move in the sequence of moves.
+        Gets the next move in the sequence of moves, planning again from the
+        current state when a partial plan has been played.
 
         :return: The next move, or None if the end has been reached.
         """
-        if self.result != "FAILURE" and self.it < len(self.moves_list):
-            next_move = self.moves_list[self.it]
-            self.it += 1
-            return next_move
-        return None
+        return self.follow_plan()
@@ -0,0 +1,111 @@
+from .search_algorithm import SearchAlgorithm
+from state import State
+from structures.node import Node
+from .strategy.cached_heuristic import with_cache
+import numpy as np
+
+class BeamSearch(SearchAlgorithm):
+    """
+    Class that implements the Beam Search algorithm for pathfinding.
+
+    The search keeps the beam_width best nodes of every depth. A width of 1 behaves
+    like GreedySearch, and wider beams trade time for better solutions.
+    """
+
+    def __init__(self, initial_state: State, heuristic, headless=False, cache_size=None, beam_width=8, budget=None, metrics=None):
+        """
+        Initializes the Beam Search algorithm.
+
+        :param initial_state: The initial state from which to start the search.
+        :param heuristic: The heuristic function used to evaluate successors.
+        :param headless: If True, disables console output for debugging.
+        :param cache_size: Maximum number of heuristic values cached during the search, or None to disable the cache.
+        :param beam_width: Number of nodes kept at every depth.
+        :param budget: The SearchBudget of every search, or None to search until the goal is found.
+        :param metrics: The SearchMetrics filled in by the algorithm, or None to create one.
+        """
+        if beam_width < 1:
+            raise ValueError("The beam width must be at least 1.")
+        self.headless = headless
+        self.heuristic = with_cache(heuristic, cache_size)
+        self.beam_width = beam_width
+        self.setup_metrics(headless, metrics)
+        self.setup_plan(initial_state, budget)
+        self.plan(initial_state.clone_state())
+
+    def plan(self, s):
+        """
+        Searches a plan from a state and stores it in the algorithm.
+
+        :param s: The state from which the algorithm runs.
+        """
+        self.metrics.start()
+        self.result, self.path, self.moves_list, self.open, self.closed, self.depth = self.run_algorithm(s)
+        self.metrics.stop()
+        self.it = 0
+
+    def returnOpenAndClose(self):
+        return self.open, self.closed, self.depth
+
+    def run_algorithm(self, s):
+        """
+        Executes the Beam Search algorithm to find a path to a completed state.
+
+        If the budget runs out, the result is "PARTIAL" and the path leads to the
+        best node of the last beam.
+
+        :param s: The initial state from which the algorithm runs.
+        :return: A tuple indicating the result of the search, the path found, the
+                 list of moves, the number of open and closed nodes and the depth.
+        """
+        self.start_budget()
+        beam = [Node(s)]  # 1. The first beam only holds the root node
+        seen = {s.key()}  # States already kept in a beam
+        closed = 0  # Number of expanded nodes
+
+        while beam:
+            for n in beam:  # 2. If a node of the beam is the goal, return the path to it
+                if n.value.completed_state():
+                    return "SUCCESS", n.antecesores() + [n], n.moves_list(), len(beam), closed, n.depth
+
+            M = []  # 3. Expand the whole beam, keeping one node for every new board
+            exhausted = False
+            for i, n in enumerate(beam):
+                closed += 1
+                self.metrics.expand(len(beam) - i - 1, n.depth)
+                exhausted = self.out_of_budget() or exhausted
+                with self.metrics.phase('expand'):
+                    sucesores = n.sucesores()
+                added = 0
+                for n2 in sucesores:
+                    key2 = n2.value.key()
+                    if key2 not in seen:
+                        seen.add(key2)
+                        n2.father = n  # Pointer of n2 to n
+                        M.append(n2)
+                        added += 1
+                self.metrics.generate(len(sucesores), len(sucesores) - added, clones=4)  # sucesores clones the state once per move
+
+            if not M:  # If there are no new successors, there are no more options
+                return "FAILURE", [], [], 0, closed, 0
+
+            # 4. Score all successors (from the features of their parents if the heuristic is incremental) and keep the best beam_width of them
+            with self.metrics.phase('heuristic'):
+                h_costs = self.evaluate_successors(M)
+            self.metrics.evaluate(len(M))
+            best = np.argsort(h_costs, kind='stable')[:self.beam_width]
+            beam = [M[i] for i in best]
+
+            if exhausted:  # If the budget runs out, return the path to the best node of the beam
+                return "PARTIAL", beam[0].antecesores() + [beam[0]], beam[0].moves_list(), len(beam), closed, beam[0].depth
+
+        return "FAILURE", [], [], 0, closed, 0
+
+    def get_next_move(self):
+        """
+        Gets the next move in the sequence of moves, planning again from the
+        current state when a partial plan has been played.
+
+        :return: The next move, or None if the end has been reached.
+        """
+        return self.follow_plan()
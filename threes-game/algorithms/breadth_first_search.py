@@ -1,3 +1,4 @@
+from collections import deque
 from .search_algorithm import SearchAlgorithm
 from state import State
 from structures.node import Node
@@ -5,60 +6,103 @@ from structures.node import Node
 class BreadthFirstSearch(SearchAlgorithm):
     """Class that implements the Breadth-First Search (BFS) algorithm for pathfinding."""
 
-    def __init__(self, initial_state: State, heuristic):
+    def __init__(self, initial_state: State, heuristic, headless=False, depth_limit=None, budget=None, metrics=None):
         """
         Initializes the Breadth-First Search algorithm.
 
         :param initial_state: The initial state from which to start the search.
         :param heuristic: The heuristic function used (not utilized in BFS).
+        :param headless: If True, disables console output for debugging.
+        :param depth_limit: Maximum depth of the expanded nodes, or None to search without limit.
+        :param budget: The SearchBudget of every search, or None to search until the goal is found.
+        :param metrics: The SearchMetrics filled in by the algorithm, or None to create one.
         """
-        self.result, self.path, self.moves_list = self.run_algorithm(initial_state.clone_state())
+        self.headless = headless
+        self.depth_limit = depth_limit
+        self.setup_metrics(headless, metrics)
+        self.setup_plan(initial_state, budget)
+        self.plan(initial_state.clone_state())
+
+    def plan(self, s):
+        """
+        Searches a plan from a state and stores it in the algorithm.
+
+        :param s: The state from which the algorithm runs.
+        """
+        self.metrics.start()
+        self.result, self.path, self.moves_list = self.run_algorithm(s)
+        self.metrics.stop()
         self.it = 0
 
     def run_algorithm(self, s):
         """
         Executes the Breadth-First Search algorithm to find the shortest path.
 
+        OPEN_SET is a deque of nodes, and the keys of the states in OPEN_SET and
+        CLOSED_SET are kept in hash sets, so every step takes constant time.
+
+        If the budget runs out, the result is "PARTIAL" and the path leads to the
+        deepest node found so far.
+
         :param s: The initial state from which the algorithm runs.
         :return: A tuple indicating the result of the search,
                  the path found, and the list of moves.
         """
+        self.start_budget()
+        best = None  # Deepest node found so far, the partial plan if the budget runs out
+
         A = Node(s)  # 1. Create a search tree with root at s
-        OPEN_SET = [Node(s)]  # 1. Initialize the OPEN set with s
+        OPEN_SET = deque([A])  # 1. Initialize the OPEN set with s
+        open_keys = {s.key()}  # Keys of the states in OPEN_SET
 
-        CLOSED_SET = []  # 2. Create an empty CLOSED set
+        CLOSED_SET = set()  # 2. Create an empty CLOSED set of state keys
 
         while True:
             if not OPEN_SET:  # 3. If OPEN_SET is empty, return failure
                 return "FAILURE", [], []
 
-            n = OPEN_SET.pop(0)  # 4. Select the first node from OPEN_SET and remove it
-            CLOSED_SET.append(n)  # 4. Add n to CLOSED_SET
-            print(f"OPEN_SET: {len(OPEN_SET)} | CLOSED_SET: {len(CLOSED_SET)} | DEPTH: {len(n.antecesores())}")
+            n = OPEN_SET.popleft()  # 4. Select the first node from OPEN_SET and remove it
+            key = n.value.key()
+            open_keys.discard(key)
+            CLOSED_SET.add(key)  # 4. Add n to CLOSED_SET
+            self.metrics.expand(len(OPEN_SET), n.depth)
 
             if n.value.completed_state():  # 5. If n is the goal, return the path from s to n
                 return "SUCCESS", n.antecesores() + [n], n.moves_list()
 
-            M = n.sucesores_sin_antecesores()  # 6. Expand n to get its successors
+            exhausted = self.out_of_budget()  # Every selected node counts, also the ones at the depth limit
+            if self.depth_limit is not None and n.depth >= self.depth_limit:
+                if exhausted and best is not None:
+                    return "PARTIAL", best.antecesores() + [best], best.moves_list()
+                continue  # n is at the depth limit, do not expand it
+
+            with self.metrics.phase('expand'):
+                M = n.sucesores()  # 6. Expand n to get its successors (ancestors are already in CLOSED_SET)
+            open_before = len(OPEN_SET)
 
             for n2 in M:  # 7. For each successor n2 in M
-                if n2 not in OPEN_SET and n2 not in CLOSED_SET:  # a. If n2 is new
+                key2 = n2.value.key()
+                if key2 not in open_keys and key2 not in CLOSED_SET:  # a. If n2 is new
                     n2.father = n  # i. Pointer from n2 to n
                     OPEN_SET.append(n2)  # ii. Add n2 to OPEN_SET
-                else:  # b. If n2 is not new, ignore it
-                    pass
+                    open_keys.add(key2)
+                    if best is None or n2.depth > best.depth:
+                        best = n2
+                # b. If n2 is not new, ignore it
+            added = len(OPEN_SET) - open_before
+            self.metrics.generate(len(M), len(M) - added, clones=4)  # sucesores clones the state once per move
+
+            if exhausted and best is not None:  # If the budget runs out, return the path to the deepest node
+                return "PARTIAL", best.antecesores() + [best], best.moves_list()
 
             # 8. The OPEN_SET is already sorted by age due to how nodes are added
             # 9. Repeat from step 3 (it's a while loop, so it will continue)
 
     def get_next_move(self):
         """
-        Gets the next move in the sequence of moves.
+        Gets the next move in the sequence of moves, planning again from the
+        current state when a partial plan has been played.
 
         :return: The next move, or None if the end has been reached.
         """
-        if self.result != "FAILURE" and self.it < len(self.moves_list):
-            next_move = self.moves_list[self.it]
-            self.it += 1
-            return next_move
-        return None
+        return self.follow_plan()
@@ -0,0 +1,209 @@
+import numpy as np
+from collections import OrderedDict
+from .search_algorithm import SearchAlgorithm
+from structures.movements import MOVEMENTS
+from state import State, BitboardState
+from engine import bitboard
+from .strategy.cached_heuristic import with_cache
+
+class OutOfBudget(Exception):
+    """Raised to stop a search whose budget has run out."""
+
+
+class Expectimax(SearchAlgorithm):
+    """
+    Class that implements a depth-limited Expectimax algorithm that decides every move online.
+
+    Instead of replaying one random number generator path, the search models the
+    random tile: after every move, next_number is placed on any empty cell of the
+    edge opposite to the move with the same probability, and the following number
+    is 1, 2 or 3 with the probabilities of State.gen_next_number. Heuristics are
+    costs, so the player picks the move with the lowest expected heuristic value.
+
+    Boards are searched as packed bitboards (see engine.bitboard), so only 4x4
+    games are supported.
+    """
+
+    DIRECTIONS = ('UP', 'RIGHT', 'DOWN', 'LEFT')
+
+    # Empty cells of the edge where the new tile may appear after every move
+    SPAWN_CELLS = {
+        'LEFT': [(r, bitboard.SIZE - 1) for r in range(bitboard.SIZE)],
+        'RIGHT': [(r, 0) for r in range(bitboard.SIZE)],
+        'UP': [(bitboard.SIZE - 1, c) for c in range(bitboard.SIZE)],
+        'DOWN': [(0, c) for c in range(bitboard.SIZE)]
+    }
+
+    # Probabilities of the next number, as drawn by State.gen_next_number
+    NEXT_NUMBERS = ((1, 1 / 6), (2, 2 / 6), (3, 3 / 6))
+
+    def __init__(self, initial_state: State, heuristic, headless=False, cache_size=None, depth=2,
+                 min_probability=1e-3, table_size=100000, budget=None, metrics=None):
+        """
+        Initializes the Expectimax algorithm.
+
+        :param initial_state: The initial state from which to start the game.
+        :param heuristic: The heuristic function used to evaluate the leaves.
+        :param headless: If True, disables console output for debugging.
+        :param cache_size: Maximum number of heuristic values cached during the search, or None to disable the cache.
+        :param depth: Number of moves searched ahead of every decision.
+        :param min_probability: Chance outcomes less likely than this are evaluated with the heuristic instead of searched.
+        :param table_size: Maximum number of values in the transposition table. The table is kept
+                           between moves, so values found with a different pruning are reused.
+        :param budget: The SearchBudget of every move. With a budget, the depth grows from 1 to depth
+                       and the move of the deepest search that finished is played.
+        :param metrics: The SearchMetrics filled in by the algorithm, or None to create one.
+        """
+        if initial_state.size != bitboard.SIZE:
+            raise ValueError(f"Expectimax only supports {bitboard.SIZE}x{bitboard.SIZE} boards.")
+        if depth < 1:
+            raise ValueError("The search depth must be at least 1.")
+        self.headless = headless
+        self.heuristic = with_cache(heuristic, cache_size)
+        self.depth = depth
+        self.min_probability = min_probability
+        self.table_size = table_size
+        self.budget = budget
+        self.setup_metrics(headless, metrics)
+        self.table = OrderedDict()  # Value of every (board, next_number, depth) already searched
+        self.nodes = 0  # Number of decision nodes searched
+        self.state = initial_state.clone_state()  # The game as seen by the algorithm, moved with every decision
+        self.result = "SUCCESS"
+        self.path = []
+        self.moves_list = []  # Moves played so far
+        self.it = 0
+
+    def returnOpenAndClose(self):
+        return len(self.table), self.nodes, len(self.moves_list)
+
+    def best_move(self, state):
+        """
+        Searches the best move for a state.
+
+        :param state: The state of the game.
+        :return: The best direction ('UP', 'RIGHT', 'DOWN' or 'LEFT'), or None if no move changes the board.
+        """
+        board = state.board if isinstance(state, BitboardState) else bitboard.pack(state.grid)
+        if self.budget is None:
+            return self.root_move(board, state.next_number, self.depth)
+
+        self.start_budget()
+        best_direction = None
+        for depth in range(1, self.depth + 1):  # Searches of depth 1 have no decision nodes, so they always finish
+            try:
+                best_direction = self.root_move(board, state.next_number, depth)
+            except OutOfBudget:
+                break
+        return best_direction
+
+    def root_move(self, board, next_number, depth):
+        """
+        Searches the best move for a packed board with a given depth.
+
+        :param board: The packed board.
+        :param next_number: The number that will be placed after the next move.
+        :param depth: Number of moves searched.
+        :return: The best direction, or None if no move changes the board.
+        """
+        best_direction, best_value = None, np.inf
+        for direction in self.DIRECTIONS:
+            new_board, moved = bitboard.move(board, direction)
+            if moved:
+                value = self.chance_value(new_board, next_number, direction, depth, 1.0)
+                if value < best_value:
+                    best_direction, best_value = direction, value
+        return best_direction
+
+    def decision_value(self, board, next_number, depth, probability):
+        """
+        Returns the value of a board where the player moves: the lowest value of its moves.
+
+        :param board: The packed board.
+        :param next_number: The number that will be placed after the next move.
+        :param depth: Number of moves still searched.
+        :param probability: Probability of reaching this board from the root.
+        :return: The expected heuristic value of the board.
+        """
+        key = (board, next_number, depth)
+        value = self.table.get(key)
+        if value is not None:
+            self.table.move_to_end(key)
+            self.metrics.generate(0, 1)  # The board was already searched
+            return value
+
+        self.nodes += 1
+        self.metrics.expand(len(self.table), self.depth - depth)
+        if self.out_of_budget():
+            raise OutOfBudget()
+        values = []
+        for direction in self.DIRECTIONS:
+            new_board, moved = bitboard.move(board, direction)
+            if moved:
+                values.append(self.chance_value(new_board, next_number, direction, depth, probability))
+        value = min(values) if values else self.leaf_values([(board, next_number)])[0]
+
+        self.table[key] = value
+        if len(self.table) > self.table_size:
+            self.table.popitem(last=False)
+        return value
+
+    def chance_value(self, board, next_number, direction, depth, probability):
+        """
+        Returns the expected value of a moved board over every position of the new tile
+        and every following number.
+
+        Outcomes at the depth limit, or whose probability falls below min_probability,
+        are evaluated with a single heuristic call.
+
+        :param board: The packed board after the move, without the new tile.
+        :param next_number: The number of the new tile.
+        :param direction: The direction of the move.
+        :param depth: Number of moves still searched, including this one.
+        :param probability: Probability of reaching this board from the root.
+        :return: The expected heuristic value of the move.
+        """
+        cells = [(r, c) for r, c in self.SPAWN_CELLS[direction] if bitboard.get_cell(board, r, c) == 0]
+        if not cells:  # No tile is added, and the next number does not change
+            outcomes = [(board, next_number, 1.0)]
+        else:
+            rank = bitboard.VALUE_RANKS[next_number]
+            outcomes = [(bitboard.set_cell(board, r, c, rank), number, p / len(cells))
+                        for r, c in cells for number, p in self.NEXT_NUMBERS]
+        self.metrics.generate(len(outcomes))
+
+        is_leaf = [depth == 1 or probability * p < self.min_probability for _, _, p in outcomes]
+        leaves = [outcome[:2] for outcome, leaf in zip(outcomes, is_leaf) if leaf]
+        leaf_values = iter(self.leaf_values(leaves) if leaves else [])
+        values = [next(leaf_values) if leaf else self.decision_value(child, number, depth - 1, probability * p)
+                  for (child, number, p), leaf in zip(outcomes, is_leaf)]
+        return float(np.dot(values, [p for _, _, p in outcomes]))
+
+    def leaf_values(self, boards):
+        """
+        Evaluates packed boards with a single heuristic call.
+
+        :param boards: A list of (board, next_number) pairs.
+        :return: The heuristic value of every board.
+        """
+        self.metrics.evaluate(len(boards))
+        with self.metrics.phase('heuristic'):
+            grids = np.array([bitboard.unpack(board) for board, _ in boards])
+            next_numbers = np.array([number for _, number in boards])
+            return self.heuristic.evaluate_batch(grids, next_numbers)
+
+    def get_next_move(self):
+        """
+        Searches and plays the next move from the current state of the game.
+
+        :return: The next move, or None if no move changes the board.
+        """
+        self.metrics.start()
+        direction = self.best_move(self.state)
+        self.metrics.stop()
+        if direction is None:
+            return None
+        self.state.move(direction)
+        next_move = MOVEMENTS[direction]
+        self.moves_list.append(next_move)
+        self.it += 1
+        return next_move
@@ -1,62 +1,97 @@
 from .search_algorithm import SearchAlgorithm
 from state import State
 from structures.node import Node
+from .strategy.cached_heuristic import with_cache
 import numpy as np
 
 class GreedySearch(SearchAlgorithm):
     """Class that implements the Greedy Search algorithm for pathfinding."""
 
-    def __init__(self, initial_state: State, heuristic, headless=False):
+    store_path = True  # Every choice depends only on the current state, so a plan is the plan of each of its nodes
+
+    def __init__(self, initial_state: State, heuristic, headless=False, cache_size=None, budget=None, metrics=None, store=None):
         """
         Initializes the Greedy Search algorithm.
 
         :param initial_state: The initial state from which to start the search.
         :param heuristic: The heuristic function used to evaluate successors.
         :param headless: If True, disables console output for debugging.
+        :param cache_size: Maximum number of heuristic values cached during the search, or None to disable the cache.
+        :param budget: The SearchBudget of every search, or None to search until the goal is found.
+        :param metrics: The SearchMetrics filled in by the algorithm, or None to create one.
+        :param store: A TranspositionStore with the solutions of earlier runs, consulted before expanding
+                      every node and updated with every solution found, or None to disable it.
         """
         self.headless = headless
-        self.heuristic = heuristic
-        self.result, self.path, self.moves_list = self.run_algorithm(initial_state.clone_state())
+        self.store = store
+        self.heuristic = with_cache(heuristic, cache_size)
+        self.setup_metrics(headless, metrics)
+        self.setup_plan(initial_state, budget)
+        self.plan(initial_state.clone_state())
+
+    def plan(self, s):
+        """
+        Searches a plan from a state and stores it in the algorithm.
+
+        :param s: The state from which the algorithm runs.
+        """
+        self.metrics.start()
+        self.result, self.path, self.moves_list = self.run_algorithm(s)
+        self.metrics.stop()
+        self.save_to_store()
         self.it = 0
 
     def run_algorithm(self, s):
         """
         Executes the Greedy Search algorithm to find the shortest path.
 
+        If the budget runs out, the result is "PARTIAL" and the path leads to the
+        current node, which is the one with the best heuristic value among its siblings.
+
         :param s: The initial state from which the algorithm runs.
         :return: A tuple indicating the result of the search,
                  the path found, and the list of moves.
         """
+        self.start_budget()
         current_node = Node(s)  # 1. Create root node with the initial state
         path = [current_node]  # 2. Create a list to store the path
 
         while True:
-            if not self.headless:
-                print(f"Current state, DEPTH: {len(path) - 1}")
+            self.metrics.expand(0, current_node.depth)  # Greedy search keeps no open list
 
             if current_node.value.completed_state():  # 3. Check if the current state is the goal
                 return "SUCCESS", path, current_node.moves_list()  # Return the path and the list of moves
 
-            successors = current_node.sucesores_sin_antecesores()  # 4. Get successors of the current state
+            stored = self.lookup_store(current_node)  # If the current state was solved by an earlier run, follow its solution
+            if stored is not None:
+                tail, moves = stored
+                return "SUCCESS", path + tail, current_node.moves_list() + moves
+
+            with self.metrics.phase('expand'):
+                successors = current_node.sucesores_sin_antecesores()  # 4. Get successors of the current state
+            self.metrics.generate(len(successors), 0, clones=4)  # sucesores clones the state once per move
 
             if not successors:  # If there are no successors, there are no more options
                 return "FAILURE", [], []
 
             # 5. Choose the successor with the best heuristic value
-            best_successor = min(successors, key=lambda node: self.heuristic.evaluate(node.value))
+            with self.metrics.phase('heuristic'):
+                h_costs = self.evaluate_successors(successors, current_node)
+            self.metrics.evaluate(len(successors))
+            best_successor = successors[int(np.argmin(h_costs))]
             best_successor.father = current_node  # Point to the parent node
 
             current_node = best_successor  # Move to the best successor
             path.append(current_node)  # Add the new node to the path
 
+            if self.out_of_budget():  # If the budget runs out, return the path followed so far
+                return "PARTIAL", path, current_node.moves_list()
+
     def get_next_move(self):
         """
-        Gets the next move in the sequence of moves.
+        Gets the next move in the sequence of moves, planning again from the
+        current state when a partial plan has been played.
 
         :return: The next move, or None if the end has been reached.
         """
-        if self.result != "FAILURE" and self.it < len(self.moves_list):
-            next_move = self.moves_list[self.it]
-            self.it += 1
-            return next_move
-        return None
+        return self.follow_plan()
@@ -0,0 +1,180 @@
+import math
+from collections import OrderedDict
+from .search_algorithm import SearchAlgorithm
+from state import State
+from structures.movements import MOVEMENTS
+from structures.node import Node
+from .strategy.cached_heuristic import with_cache
+
+class IDAStar(SearchAlgorithm):
+    """
+    Class that implements the Iterative-Deepening A* (IDA*) algorithm for pathfinding.
+
+    Each iteration is a depth-first search that cuts every node whose f_cost is
+    above a threshold, and the next threshold is the lowest f_cost that was cut.
+    Only the current path and the successors of its nodes are kept in memory, plus
+    an optional transposition table of bounded size.
+    """
+
+    def __init__(self, initial_state: State, heuristic, headless=False, cache_size=None, table_size=None, budget=None, metrics=None):
+        """
+        Initializes the IDA* algorithm.
+
+        :param initial_state: The initial state from which to start the search.
+        :param heuristic: The heuristic function used for cost estimation.
+        :param headless: Indicates whether the search runs without a graphical interface.
+        :param cache_size: Maximum number of heuristic values cached during the search, or None to disable the cache.
+        :param table_size: Maximum number of states in the transposition table, or None to disable the table.
+        :param budget: The SearchBudget of every search, or None to search until the goal is found.
+        :param metrics: The SearchMetrics filled in by the algorithm, or None to create one.
+        """
+        self.headless = headless
+        self.heuristic = with_cache(heuristic, cache_size)
+        self.table_size = table_size
+        self.setup_metrics(headless, metrics)
+        self.setup_plan(initial_state, budget)
+        self.plan(initial_state.clone_state())
+
+    def plan(self, s):
+        """
+        Searches a plan from a state and stores it in the algorithm.
+
+        :param s: The state from which the algorithm runs.
+        """
+        self.metrics.start()
+        self.result, self.path, self.moves_list, self.open, self.closed, self.depth = self.run_algorithm(s)
+        self.metrics.stop()
+        self.it = 0
+
+    def returnOpenAndClose(self):
+        return self.open, self.closed, self.depth
+
+    def run_algorithm(self, s):
+        """
+        Executes the IDA* algorithm to find the shortest path.
+
+        If the budget runs out, the result is "PARTIAL" and the path leads to the
+        generated node with the lowest heuristic value.
+
+        :param s: The initial state from which the algorithm runs.
+        :return: A tuple indicating the result of the search, the path found, the
+                 list of moves, the number of open and closed nodes and the depth.
+        """
+        self.start_budget()
+        self.best, self.best_h = None, None  # Node with the lowest heuristic value, the partial plan if the budget runs out
+        A = Node(s, f_cost=self.heuristic.evaluate(s))  # Create a search tree A with root at s
+        self.metrics.evaluate()
+        threshold = A.f_cost  # The first iteration cuts the nodes above h(s)
+        closed = 0  # Number of nodes expanded in all iterations
+
+        while True:
+            n, OPEN_SET, expanded, next_threshold = self.bounded_search(A, threshold)
+            closed += expanded
+
+            if n is not None:  # If the goal was found under the threshold
+                return "SUCCESS", n.antecesores() + [n], n.moves_list(), OPEN_SET, closed, n.depth
+
+            if next_threshold is None:  # If the budget runs out, return the path to the most promising node
+                return "PARTIAL", self.best.antecesores() + [self.best], self.best.moves_list(), OPEN_SET, closed, self.best.depth
+
+            if next_threshold == math.inf:  # If no node was cut, the whole tree was searched
+                return "FAILURE", [], [], 0, closed, 0
+
+            threshold = next_threshold
+
+    def bounded_search(self, root, threshold):
+        """
+        Depth-first search of the nodes whose f_cost is not above the threshold.
+
+        The search uses an explicit stack of the nodes on the current path, each with
+        its successors ordered by f_cost, so deep games do not hit the recursion limit.
+        States already on the path are not expanded again, and the transposition
+        table skips states already reached with an equal or lower g_cost in this iteration.
+
+        :param root: The root node of the search.
+        :param threshold: The highest f_cost of the nodes that are expanded.
+        :return: A tuple with the goal node (or None), the number of successors
+                 pending on the stack, the number of expanded nodes and the lowest
+                 f_cost above the threshold, or None if the budget ran out.
+        """
+        table = OrderedDict() if self.table_size else None  # g_cost of the states reached in this iteration
+        path_keys = {root.value.key()}  # States on the current path
+        stack = [[root, 0, None, 0]]  # Frames [node, g_cost, successors, index of the next successor]
+        next_threshold = math.inf
+        expanded = 0
+        pending = 0  # Successors waiting on the stack, the open list of the iteration
+
+        while stack:
+            frame = stack[-1]
+            n, g_cost, M, i = frame
+
+            if M is None:
+                if n.f_cost > threshold:  # Cut n and remember the lowest f_cost above the threshold
+                    next_threshold = min(next_threshold, n.f_cost)
+                    self._pop_frame(stack, path_keys)
+                    continue
+
+                expanded += 1
+                self.metrics.expand(pending, n.depth)
+
+                if n.value.completed_state():  # If n is the goal
+                    return n, pending, expanded, next_threshold
+
+                with self.metrics.phase('expand'):
+                    generated = n.sucesores()  # Expand n
+                    sucesores = [n2 for n2 in generated if n2.value.key() not in path_keys]  # Without its ancestors
+                self.metrics.generate(len(generated), len(generated) - len(sucesores), clones=len(MOVEMENTS))  # sucesores clones the state once per move
+                with self.metrics.phase('heuristic'):
+                    h_costs = self.evaluate_successors(sucesores, n)  # Score all successors, from the features of n if the heuristic is incremental
+                self.metrics.evaluate(len(sucesores))
+                M = []
+                for n2, h_cost in zip(sucesores, h_costs):
+                    g_cost2 = g_cost + n.value.edge_cost(n2.value)  # Cost to reach n2
+                    n2.father = n  # Pointer of n2 to n
+                    n2.update_f_cost(g_cost2, h_cost)
+                    M.append((n2, g_cost2))
+                    if self.best is None or h_cost < self.best_h:
+                        self.best, self.best_h = n2, h_cost
+                M.sort(key=lambda successor: successor[0].f_cost)  # Visit the most promising successors first
+                frame[2] = M
+                pending += len(M)
+
+                if self.out_of_budget() and self.best is not None:  # Stop the search, run_algorithm returns the partial plan
+                    return None, pending, expanded, None
+
+            if i == len(M):  # Every successor of n has been searched
+                self._pop_frame(stack, path_keys)
+                continue
+
+            n2, g_cost2 = M[i]
+            frame[3] = i + 1
+            pending -= 1
+            key2 = n2.value.key()
+            if table is not None:
+                if table.get(key2, math.inf) <= g_cost2:  # n2 was already reached through a path at least as cheap
+                    self.metrics.generate(0, 1)
+                    continue
+                table[key2] = g_cost2
+                table.move_to_end(key2)
+                if len(table) > self.table_size:
+                    table.popitem(last=False)
+
+            path_keys.add(key2)
+            stack.append([n2, g_cost2, None, 0])
+
+        return None, 0, expanded, next_threshold
+
+    @staticmethod
+    def _pop_frame(stack, path_keys):
+        """Removes the last node of the current path."""
+        n = stack.pop()[0]
+        path_keys.discard(n.value.key())
+
+    def get_next_move(self):
+        """
+        Gets the next move in the sequence of moves, planning again from the
+        current state when a partial plan has been played.
+
+        :return: The next move, or None if the end has been reached.
+        """
+        return self.follow_plan()
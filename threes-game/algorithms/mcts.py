@@ -0,0 +1,257 @@
+import math
+import os
+import random
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from .search_algorithm import SearchAlgorithm
+from structures.movements import MOVEMENTS
+from state import State
+
+DIRECTIONS = ('UP', 'RIGHT', 'DOWN', 'LEFT')
+REWARD_SCALE = 2  # Rewards are measured in units of twice the points of the root of the search
+
+
+class TreeNode:
+    """
+    Node of a Monte Carlo search tree.
+
+    Attributes:
+        state (State): The state of the node.
+        parent (TreeNode): The parent node, None for the root.
+        direction (str): The move that leads from the parent to this node.
+        children (list): The expanded child nodes.
+        untried (list): The moves that change the board and have no child yet, as (direction, state) pairs.
+        visits (int): Number of rollouts through this node.
+        total (float): Sum of the rewards of those rollouts, in units of the bound of the search (see search_tree).
+    """
+
+    __slots__ = ('state', 'parent', 'direction', 'children', 'untried', 'visits', 'total')
+
+    def __init__(self, state, parent=None, direction=None):
+        self.state = state
+        self.parent = parent
+        self.direction = direction
+        self.children = []
+        self.untried = legal_moves(state)
+        self.visits = 0
+        self.total = 0.0
+
+    def uct_child(self, exploration):
+        """Returns the child with the highest UCT value."""
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.total / child.visits
+                   + exploration * math.sqrt(log_visits / child.visits))
+
+
+def legal_moves(state):
+    """
+    Returns the moves that change the board of a state.
+
+    :param state: The state to be moved.
+    :return: A list of (direction, state after the move) pairs.
+    """
+    moves = []
+    key = state.key()
+    for direction in DIRECTIONS:
+        child = state.clone_state()
+        child.move(direction)
+        if child.key() != key:
+            moves.append((direction, child))
+    return moves
+
+
+def rollout(state, rng, policy, heuristic, max_moves):
+    """
+    Plays a game from a state until no move changes the board or max_moves are played.
+
+    :param state: The state where the rollout starts; it is not modified.
+    :param rng: The random.Random used by the policy.
+    :param policy: 'random' to play random moves, or 'greedy' to play the move with the lowest heuristic value.
+    :param heuristic: The heuristic of the greedy policy.
+    :param max_moves: Maximum number of moves of the rollout, or None to play until the end.
+    :return: The total points of the last state.
+    """
+    played = 0
+    while max_moves is None or played < max_moves:
+        moves = legal_moves(state)
+        if not moves:
+            break
+        if policy == 'greedy':
+            h_costs = heuristic.evaluate_states([child for _, child in moves])
+            state = moves[int(np.argmin(h_costs))][1]
+        else:
+            state = rng.choice(moves)[1]
+        played += 1
+    return state.total_points()
+
+
+def search_tree(state, rollouts, time_limit, exploration, policy, heuristic, max_moves, seed):
+    """
+    Builds a UCT tree from a state and returns the statistics of the moves of the root.
+
+    This is the work of a single worker: with root parallelism every worker builds
+    its own tree and only the root statistics are merged.
+
+    :param state: The state of the root.
+    :param rollouts: Maximum number of rollouts, or None to use only the time limit.
+    :param time_limit: Maximum search time in seconds, or None to use only the rollouts.
+    :param exploration: Exploration constant of UCT.
+    :param policy: Rollout policy, 'random' or 'greedy'.
+    :param heuristic: The heuristic of the greedy policy.
+    :param max_moves: Maximum number of moves of every rollout, or None to play until the end.
+    :param seed: Seed of the random number generator of the policy.
+    :return: A tuple with a dict from every root move to its (visits, total reward) and the number of tree nodes.
+    """
+    rng = random.Random(seed)
+    root = TreeNode(state)
+    if not root.untried:  # No move changes the board
+        return {}, 1
+    nodes = 1
+    # Every reward is divided by the same bound, fixed before the first rollout, so the totals of the
+    # nodes stay comparable. The points of a full board of 768 tiles would make every reward tiny
+    # next to the exploration term.
+    bound = max(REWARD_SCALE * state.total_points(), 1.0)
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    done = 0
+
+    while (rollouts is None or done < rollouts) and (deadline is None or time.perf_counter() < deadline):
+        node = root
+        while not node.untried and node.children:  # 1. Selection
+            node = node.uct_child(exploration)
+
+        if node.untried:  # 2. Expansion
+            direction, child_state = node.untried.pop(rng.randrange(len(node.untried)))
+            child = TreeNode(child_state, node, direction)
+            node.children.append(child)
+            node = child
+            nodes += 1
+
+        reward = rollout(node.state, rng, policy, heuristic, max_moves) / bound  # 3. Simulation
+
+        while node is not None:  # 4. Backpropagation
+            node.visits += 1
+            node.total += reward
+            node = node.parent
+        done += 1
+
+    return {child.direction: (child.visits, child.total) for child in root.children}, nodes
+
+
+class MCTS(SearchAlgorithm):
+    """
+    Class that implements Monte Carlo Tree Search with UCT selection, deciding every move online.
+
+    The rollouts of every move are spread over a pool of worker processes with root
+    parallelism: every worker builds its own tree from the current state and the
+    visits of the moves of the roots are added up. Python threads would share one
+    interpreter lock, so processes are used to keep every core busy.
+    """
+
+    def __init__(self, initial_state: State, heuristic, headless=False, rollouts=1000, time_limit_ms=None,
+                 workers=None, exploration=math.sqrt(2), policy='random', max_moves=None, seed=0, budget=None,
+                 metrics=None):
+        """
+        Initializes the MCTS algorithm.
+
+        :param initial_state: The initial state from which to start the game.
+        :param heuristic: The heuristic of the greedy rollout policy (not utilized by the random policy).
+        :param headless: If True, disables console output for debugging.
+        :param rollouts: Rollouts per move, shared among the workers, or None to use only the time limit.
+        :param time_limit_ms: Search time per move in milliseconds, or None to use only the rollouts.
+        :param workers: Number of worker processes, None for one per core. With 1 worker the search runs in this process.
+        :param exploration: Exploration constant of UCT.
+        :param policy: Rollout policy, 'random' or 'greedy'.
+        :param max_moves: Maximum number of moves of every rollout, or None to play until the end.
+        :param seed: Seed of the random number generators of the policies.
+        :param budget: A SearchBudget whose max_expansions (read as the number of rollouts per move) and
+                       time_ms replace rollouts and time_limit_ms.
+        :param metrics: The SearchMetrics filled in by the algorithm, or None to create one. Every tree node
+                        counts as an expansion and every rollout as a generated successor.
+        """
+        if budget is not None:
+            rollouts, time_limit_ms = budget.max_expansions, budget.time_ms
+        if rollouts is None and time_limit_ms is None:
+            raise ValueError("MCTS needs a rollout budget, a time budget or both.")
+        if policy not in ('random', 'greedy'):
+            raise ValueError(f"Unknown rollout policy '{policy}', expected 'random' or 'greedy'.")
+        if policy == 'greedy' and heuristic is None:
+            raise ValueError("The greedy rollout policy needs a heuristic.")
+        self.headless = headless
+        self.heuristic = heuristic
+        self.rollouts = rollouts
+        self.time_limit = None if time_limit_ms is None else time_limit_ms / 1000
+        self.workers = workers or os.cpu_count() or 1
+        self.exploration = exploration
+        self.policy = policy
+        self.max_moves = max_moves
+        self.seed = seed
+        self.setup_metrics(headless, metrics)
+        self.pool = None  # Created on the first move that uses more than one worker
+        self.nodes = 0  # Number of tree nodes built
+        self.simulations = 0  # Number of rollouts played
+        self.state = initial_state.clone_state()  # The game as seen by the algorithm, moved with every decision
+        self.result = "SUCCESS"
+        self.path = []
+        self.moves_list = []  # Moves played so far
+        self.it = 0
+
+    def returnOpenAndClose(self):
+        return self.nodes, self.simulations, len(self.moves_list)
+
+    def best_move(self, state):
+        """
+        Searches the best move for a state, running one tree per worker.
+
+        :param state: The state of the game.
+        :return: The most visited direction, or None if no move changes the board.
+        """
+        seeds = [self.seed + len(self.moves_list) * self.workers + i for i in range(self.workers)]
+        budgets = [None] * self.workers if self.rollouts is None else \
+            [self.rollouts // self.workers + (i < self.rollouts % self.workers) for i in range(self.workers)]
+        jobs = [(state, budget, self.time_limit, self.exploration, self.policy, self.heuristic, self.max_moves, seed)
+                for budget, seed in zip(budgets, seeds) if budget != 0]
+
+        if len(jobs) == 1:
+            results = [search_tree(*jobs[0])]
+        else:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.workers)
+            results = [future.result() for future in [self.pool.submit(search_tree, *job) for job in jobs]]
+
+        visits = {}
+        for stats, nodes in results:
+            self.nodes += nodes
+            self.metrics.expand(0, len(self.moves_list), count=nodes)
+            for direction, (count, _) in stats.items():
+                visits[direction] = visits.get(direction, 0) + count
+                self.simulations += count
+                self.metrics.generate(count)
+        return max(visits, key=visits.get) if visits else None
+
+    def close(self):
+        """Shuts the worker pool down."""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def get_next_move(self):
+        """
+        Searches and plays the next move from the current state of the game.
+
+        :return: The next move, or None if no move changes the board.
+        """
+        self.metrics.start()
+        with self.metrics.phase('rollouts'):
+            direction = self.best_move(self.state)
+        self.metrics.stop()
+        if direction is None:
+            self.close()
+            return None
+        self.state.move(direction)
+        if self.state.completed_state():  # The game is over, the workers are not needed anymore
+            self.close()
+        next_move = MOVEMENTS[direction]
+        self.moves_list.append(next_move)
+        self.it += 1
+        return next_move
@@ -0,0 +1,173 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class SearchMetrics:
+    """
+    Counters and timings filled in by a search algorithm during a game.
+
+    The counters add up every search of the game, including the searches made
+    again from the current state after a partial plan. Every sample_interval
+    expansions a sample of the counters is stored in samples, and printed when
+    verbose, which replaces printing one line per expansion.
+
+    Attributes:
+        sample_interval (int): Expansions between two samples, or None to take no samples.
+        verbose (bool): Whether samples are printed.
+        expansions (int): Number of expanded nodes.
+        generated (int): Number of successors generated.
+        deduped (int): Number of generated successors dropped because their state was already known.
+        heuristic_calls (int): Number of states evaluated with the heuristic.
+        clones (int): Number of states cloned to generate successors.
+        peak_open (int): Largest size of the open list.
+        store_hits (int): Number of nodes whose solution was taken from a TranspositionStore.
+        store_misses (int): Number of nodes looked up in a TranspositionStore without a usable solution.
+        store_moves (int): Number of planned moves taken from a TranspositionStore.
+        open_size (int): Size of the open list at the last expansion.
+        depth (int): Depth of the last expanded node.
+        phase_times (dict): Seconds spent in every phase of the search.
+        samples (list): The samples taken, as dicts.
+
+    Methods:
+        start(): Starts counting the elapsed time.
+        stop(): Stops counting the elapsed time.
+        expand(open_size, depth, count): Counts expansions and takes a sample when it is due.
+        generate(generated, deduped, clones): Counts the successors of an expansion.
+        evaluate(count): Counts heuristic evaluations.
+        store_lookup(moves): Counts a lookup in a TranspositionStore.
+        phase(name): Context manager that adds the time spent inside it to a phase.
+        elapsed(): Returns the seconds spent searching.
+        expansions_per_second(): Returns the expansion rate.
+        as_dict(): Returns the counters as a flat dict.
+    """
+
+    def __init__(self, sample_interval=1000, verbose=False):
+        self.sample_interval = sample_interval
+        self.verbose = verbose
+        self.expansions = 0
+        self.generated = 0
+        self.deduped = 0
+        self.heuristic_calls = 0
+        self.clones = 0
+        self.peak_open = 0
+        self.store_hits = 0
+        self.store_misses = 0
+        self.store_moves = 0
+        self.open_size = 0
+        self.depth = 0
+        self.phase_times = defaultdict(float)
+        self.samples = []
+        self._elapsed = 0.0
+        self._started = None
+
+    def start(self):
+        """Starts counting the elapsed time, if it is not being counted already."""
+        if self._started is None:
+            self._started = time.perf_counter()
+
+    def stop(self):
+        """Stops counting the elapsed time."""
+        if self._started is not None:
+            self._elapsed += time.perf_counter() - self._started
+            self._started = None
+
+    def elapsed(self):
+        """Returns the seconds spent searching."""
+        running = 0.0 if self._started is None else time.perf_counter() - self._started
+        return self._elapsed + running
+
+    def expansions_per_second(self):
+        """Returns the number of expansions per second of search."""
+        elapsed = self.elapsed()
+        return self.expansions / elapsed if elapsed > 0 else 0.0
+
+    def expand(self, open_size, depth, count=1):
+        """
+        Counts expansions and takes a sample every sample_interval expansions.
+
+        Args:
+            open_size (int): The size of the open list after removing the expanded node.
+            depth (int): The depth of the expanded node.
+            count (int): Number of expansions, for algorithms that report them in batches.
+        """
+        before = self.expansions
+        self.expansions += count
+        self.open_size = open_size
+        self.depth = depth
+        if open_size > self.peak_open:
+            self.peak_open = open_size
+        if self.sample_interval and self.expansions // self.sample_interval > before // self.sample_interval:
+            self.sample()
+
+    def generate(self, generated, deduped=0, clones=0):
+        """
+        Counts the successors of an expansion.
+
+        Args:
+            generated (int): Number of successors generated.
+            deduped (int): Number of them dropped because their state was already known.
+            clones (int): Number of states cloned to generate them.
+        """
+        self.generated += generated
+        self.deduped += deduped
+        self.clones += clones
+
+    def evaluate(self, count=1):
+        """Counts heuristic evaluations."""
+        self.heuristic_calls += count
+
+    def store_lookup(self, moves=None):
+        """
+        Counts a lookup in a TranspositionStore.
+
+        Args:
+            moves (list): The moves of the solution taken from the store, or None if there was none.
+        """
+        if moves is None:
+            self.store_misses += 1
+        else:
+            self.store_hits += 1
+            self.store_moves += len(moves)
+
+    @contextmanager
+    def phase(self, name):
+        """Adds the time spent inside the with block to the phase name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_times[name] += time.perf_counter() - start
+
+    def sample(self):
+        """Stores a sample of the counters, and prints it when verbose."""
+        sample = {
+            'expansions': self.expansions,
+            'open': self.open_size,
+            'depth': self.depth,
+            'elapsed': self.elapsed(),
+            'expansions_per_second': self.expansions_per_second()
+        }
+        self.samples.append(sample)
+        if self.verbose:
+            print(f"EXPANSIONS: {sample['expansions']} | OPEN_SET: {sample['open']} | DEPTH: {sample['depth']} | "
+                  f"{sample['expansions_per_second']:.0f} exp/s")
+
+    def as_dict(self):
+        """Returns the counters, the rate and the phase times as a flat dict."""
+        metrics = {
+            'expansions': self.expansions,
+            'generated': self.generated,
+            'deduped': self.deduped,
+            'heuristic_calls': self.heuristic_calls,
+            'clones': self.clones,
+            'peak_open': self.peak_open,
+            'store_hits': self.store_hits,
+            'store_misses': self.store_misses,
+            'store_moves': self.store_moves,
+            'elapsed': self.elapsed(),
+            'expansions_per_second': self.expansions_per_second()
+        }
+        for name, seconds in self.phase_times.items():
+            metrics[f'time_{name}'] = seconds
+        return metrics
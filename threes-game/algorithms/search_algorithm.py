@@ -1,7 +1,86 @@
+import time
 from abc import ABC, abstractmethod
+from .metrics import SearchMetrics
+from .strategy.cached_heuristic import CachedHeuristic
+from structures.node import Node
+from structures.transposition_store import namespace_key
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, where max_memory_mb is ignored
+    resource = None
+
+
+class SearchBudget:
+    """
+    Limits of a single search: wall time, number of expansions and memory.
+
+    The search calls start() before it begins and expand() once per expanded node,
+    and stops as soon as expand() returns True. The memory limit is checked
+    against the peak resident size of the process every check_every expansions.
+
+    Attributes:
+        time_ms (float): Maximum search time in milliseconds, or None.
+        max_expansions (int): Maximum number of expanded nodes, or None. MCTS, which decides every
+            move with rollouts instead of expanding a plan, reads it as the number of rollouts per move.
+        max_memory_mb (float): Maximum peak resident memory of the process in megabytes, or None.
+        expansions (int): Number of nodes expanded since start().
+    """
+
+    def __init__(self, time_ms=None, max_expansions=None, max_memory_mb=None, check_every=64):
+        self.time_ms = time_ms
+        self.max_expansions = max_expansions
+        self.max_memory_mb = max_memory_mb
+        self.check_every = check_every
+        self.expansions = 0
+        self.deadline = None
+
+    def start(self):
+        """Starts counting the time and the expansions of a new search."""
+        self.expansions = 0
+        self.deadline = None if self.time_ms is None else time.perf_counter() + self.time_ms / 1000
+
+    def expand(self):
+        """
+        Counts one expansion.
+
+        :return: True if the budget is exhausted.
+        """
+        self.expansions += 1
+        return self.exhausted()
+
+    def exhausted(self):
+        """Checks whether any of the limits has been reached."""
+        if self.max_expansions is not None and self.expansions >= self.max_expansions:
+            return True
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return True
+        if self.max_memory_mb is not None and resource is not None and self.expansions % self.check_every == 0:
+            # ru_maxrss is in kilobytes on Linux
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 >= self.max_memory_mb
+        return False
+
 
 class SearchAlgorithm(ABC):
-    """Abstract base class for search algorithms."""
+    """
+    Abstract base class for search algorithms.
+
+    Algorithms that compute a plan define plan(s), which searches a plan from a
+    state and stores it in the algorithm, call setup_plan in their constructor and
+    plan from the initial state. Online algorithms (Expectimax, MCTS) choose every
+    move in get_next_move and define no plan. When a SearchBudget runs out, a search returns the
+    result "PARTIAL" with the plan to its most promising node; follow_plan then
+    plays that plan and searches again from the state it leads to.
+    """
+
+    budget = None
+    metrics = None
+    store = None
+    # Whether the plan of a search is the same from every node of a plan it found, as for greedy
+    # search, whose choices depend only on the current state. Then every node of a solution is
+    # recorded in the store and looked up; otherwise only the root of every search is, and the
+    # budget is part of the namespace of the records.
+    store_path = False
 
     @abstractmethod
     def get_next_move(self):
@@ -11,3 +90,141 @@ class SearchAlgorithm(ABC):
         :return: The next move.
         """
         pass
+
+    def setup_metrics(self, headless, metrics):
+        """
+        Prepares the metrics filled in by the algorithm.
+
+        :param headless: If False, the samples of the metrics are printed.
+        :param metrics: The SearchMetrics to fill in, or None to create one with the default sampling interval.
+        """
+        self.metrics = metrics if metrics is not None else SearchMetrics(verbose=not headless)
+
+    def returnOpenAndClose(self):
+        """Returns the size of the open list, the number of expansions and the depth of the last expansion."""
+        return self.metrics.open_size, self.metrics.expansions, self.metrics.depth
+
+    def evaluate_successors(self, successors, parent=None):
+        """
+        Scores the successors of a node with the heuristic of the algorithm.
+
+        Incremental heuristics score every successor from the features of its parent,
+        which are kept in the nodes so they are passed down the search; the rest score
+        all the successors with a single batch call.
+
+        :param successors: The successor nodes.
+        :param parent: The parent of all the successors, or None to use the father of each one.
+        :return: The heuristic value of every successor.
+        """
+        if not successors:
+            return []
+        if not self.heuristic.incremental:
+            return self.heuristic.evaluate_states([n2.value for n2 in successors])
+
+        h_costs = []
+        for n2 in successors:
+            father = parent if parent is not None else n2.father
+            if father.features is None:
+                father.features = self.heuristic.features(father.value)
+            rows, cols = father.value.changed_lines(n2.value)
+            h_cost, n2.features = self.heuristic.evaluate_delta(father.features, n2.value, rows, cols)
+            h_costs.append(h_cost)
+        return h_costs
+
+    def lookup_store(self, n):
+        """
+        Looks up a solution from the state of a node in the TranspositionStore of the algorithm.
+
+        The stored moves are replayed from the node, so the nodes of the solution are
+        built with the same states a search would reach. Every lookup is counted in
+        the metrics, so runs that took their plan from the store can be told apart.
+
+        :param n: The node.
+        :return: The nodes after n and the moves from n to the end of the game, or None
+                 if there is no store, no stored solution or it does not end the game.
+        """
+        if self.store is None:
+            return None
+        solution = self.store.get(n.value, self.store_namespace())
+        if solution is None:
+            self.metrics.store_lookup()
+            return None
+        path = []
+        node = n
+        for move in solution[0]:
+            state = node.value.clone_state()
+            state.move(move.value)
+            node = Node(state, move, node)
+            path.append(node)
+        if not node.value.completed_state():  # A record written by an older version of the engine
+            self.metrics.store_lookup()
+            return None
+        self.metrics.store_lookup(solution[0])
+        return path, solution[0]
+
+    def save_to_store(self):
+        """
+        Records a successful plan in the TranspositionStore, if there is one: the solution of every node
+        of the plan if store_path is set, the solution of its root otherwise.
+        """
+        if self.store is None or self.result != "SUCCESS" or not self.path:
+            return
+        if self.store_path:
+            self.store.put_path(self.path, self.moves_list, self.store_namespace())
+        else:
+            self.store.put(self.path[0].value, self.moves_list, self.path[-1].value.total_points(), self.store_namespace())
+
+    def store_namespace(self):
+        """
+        Returns the namespace of the records of the algorithm in the TranspositionStore.
+
+        Only a search that would find the same plan reuses a record: one of the same
+        algorithm and heuristic and, unless store_path is set, the same budget.
+
+        :return: The namespace, see structures.transposition_store.namespace_key.
+        """
+        heuristic = self.heuristic.heuristic if isinstance(self.heuristic, CachedHeuristic) else self.heuristic
+        parts = [type(self).__name__, type(heuristic).__name__]
+        if not self.store_path and self.budget is not None:
+            parts += [self.budget.time_ms, self.budget.max_expansions, self.budget.max_memory_mb]
+        return namespace_key(*parts)
+
+    def setup_plan(self, initial_state, budget):
+        """
+        Prepares the budget and the copy of the game followed by the plans.
+
+        :param initial_state: The initial state of the game.
+        :param budget: The SearchBudget of every search, or None for unbounded searches.
+        """
+        self.budget = budget
+        self.state = initial_state.clone_state()  # The game as seen by the algorithm, moved with every planned move
+        self.it = 0
+
+    def start_budget(self):
+        """Starts the budget of a new search, if there is one."""
+        if self.budget is not None:
+            self.budget.start()
+
+    def out_of_budget(self):
+        """
+        Counts one expansion against the budget.
+
+        :return: True if the search must stop and return its partial plan.
+        """
+        return self.budget is not None and self.budget.expand()
+
+    def follow_plan(self):
+        """
+        Gets the next move of the plan, searching a new plan from the current state
+        when a partial plan has been played completely.
+
+        :return: The next move, or None if the end has been reached.
+        """
+        if self.result == "PARTIAL" and self.it >= len(self.moves_list) and not self.state.completed_state():
+            self.plan(self.state.clone_state())
+        if self.result != "FAILURE" and self.it < len(self.moves_list):
+            next_move = self.moves_list[self.it]
+            self.it += 1
+            self.state.move(next_move.value)
+            return next_move
+        return None
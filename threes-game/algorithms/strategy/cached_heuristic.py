@@ -0,0 +1,169 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from algorithms.strategy.heuristic import Heuristic
+from state import BitboardState
+
+DEFAULT_CACHE_SIZE = 100000  # Entries of a CachedHeuristic built without a size, a few tens of megabytes
+
+
+class CachedHeuristic(Heuristic):
+    """
+    Heuristic wrapper that remembers the value of every board it has evaluated.
+
+    Values are keyed on the board and the next number of the state, so a board
+    reached through different paths of a search is only evaluated once. A
+    BitboardState is keyed by its packed board, which it already holds, and every
+    other board, from a State or a batch of grids, by the bytes of its int64 grid,
+    so the States and the batches share the same entries.
+
+    The cache is bounded by a number of entries, not of bytes: it keeps at most
+    max_entries values and evicts the least recently used one when it is full.
+    Every entry takes a few hundred bytes.
+
+    Attributes:
+        heuristic (Heuristic): The wrapped heuristic.
+        max_entries (int): Maximum number of cached values (entries, not bytes).
+        hits (int): Number of evaluations answered from the cache.
+        misses (int): Number of evaluations delegated to the wrapped heuristic.
+        evictions (int): Number of values dropped to respect max_entries.
+
+    Methods:
+        evaluate(state): Evaluates the state, using the cache when possible.
+        evaluate_batch(grids, next_numbers): Evaluates a stack of boards, using the cache when possible.
+        evaluate_states(states): Evaluates a list of states with a single batch call for the misses.
+        features(state): Returns the features of the wrapped heuristic.
+        evaluate_delta(parent_features, state, rows, cols): Evaluates incrementally with the wrapped heuristic.
+        clear(): Empties the cache and resets the counters.
+    """
+
+    def __init__(self, heuristic, max_entries=DEFAULT_CACHE_SIZE):
+        """
+        Wraps a heuristic with a cache.
+
+        Args:
+            heuristic (Heuristic): The heuristic to be cached.
+            max_entries (int): Maximum number of cached values (entries, not bytes). Every
+                entry takes a few hundred bytes, so the default keeps the cache in the
+                tens of megabytes.
+        """
+        if max_entries <= 0:
+            raise ValueError("The cache size must be positive.")
+        self.heuristic = heuristic
+        self.max_entries = max_entries
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def state_key(state):
+        """Returns the cache key of a state."""
+        if isinstance(state, BitboardState):
+            return state.board, int(state.next_number)
+        return np.asarray(state.grid, dtype=np.int64).tobytes(), int(state.next_number)
+
+    @staticmethod
+    def grid_keys(grids, next_numbers):
+        """Returns the cache keys of a stack of boards, equal to the keys of their States."""
+        grids = np.asarray(grids, dtype=np.int64)
+        return [(grid.tobytes(), int(next_number)) for grid, next_number in zip(grids, next_numbers)]
+
+    def evaluate(self, state):
+        key = self.state_key(state)
+        value = self._get(key)
+        if value is None:
+            value = self.heuristic.evaluate(state)
+            self._put(key, value)
+        return value
+
+    def evaluate_batch(self, grids, next_numbers):
+        keys = self.grid_keys(grids, next_numbers)
+        return self._evaluate_keys(keys, lambda missing: self.heuristic.evaluate_batch(grids[missing], np.asarray(next_numbers)[missing]))
+
+    def evaluate_states(self, states):
+        keys = [self.state_key(state) for state in states]
+        return self._evaluate_keys(keys, lambda missing: self.heuristic.evaluate_states([states[i] for i in missing]))
+
+    @property
+    def incremental(self):
+        """Whether the wrapped heuristic can be evaluated incrementally."""
+        return self.heuristic.incremental
+
+    def features(self, state):
+        return self.heuristic.features(state)
+
+    def evaluate_delta(self, parent_features, state, rows=(), cols=()):
+        """
+        Evaluates incrementally with the wrapped heuristic. The features are needed
+        for the children anyway, so the cache is not consulted, only filled.
+        """
+        value, features = self.heuristic.evaluate_delta(parent_features, state, rows, cols)
+        self._put(self.state_key(state), value)
+        return value, features
+
+    def clear(self):
+        """Empties the cache and resets the counters."""
+        self.cache.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def hit_rate(self):
+        """Returns the fraction of evaluations answered from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _evaluate_keys(self, keys, evaluate_missing):
+        """
+        Looks up every key and evaluates the missing ones with a single call.
+
+        Args:
+            keys (list): The cache keys of the boards.
+            evaluate_missing (callable): Receives the indices of the missing boards
+                and returns their heuristic values.
+
+        Returns:
+            np.ndarray: The heuristic value of every board.
+        """
+        values = [self._get(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+        if missing:
+            for i, value in zip(missing, evaluate_missing(missing)):
+                values[i] = value
+                self._put(keys[i], value)
+        return np.array(values)
+
+    def _get(self, key):
+        """Returns the cached value of a key, or None, updating the counters."""
+        value = self.cache.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.cache.move_to_end(key)
+        return value
+
+    def _put(self, key, value):
+        """Stores a value, evicting the least recently used one if the cache is full."""
+        self.cache[key] = value
+        if len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+            self.evictions += 1
+
+
+def with_cache(heuristic, cache_size):
+    """
+    Wraps a heuristic with a CachedHeuristic when caching is enabled.
+
+    Args:
+        heuristic (Heuristic): The heuristic of a search.
+        cache_size (int | None): Maximum number of cached values (entries, not bytes), or None
+            to disable the cache, which is the default of every search.
+
+    Returns:
+        Heuristic: The heuristic itself if the cache is disabled or it is already
+            cached, a CachedHeuristic wrapping it otherwise.
+    """
+    if cache_size is None or isinstance(heuristic, CachedHeuristic):
+        return heuristic
+    return CachedHeuristic(heuristic, cache_size)
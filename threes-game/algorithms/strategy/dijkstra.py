@@ -1,4 +1,5 @@
 from algorithms.strategy.heuristic import Heuristic
+import numpy as np
 
 
 class Dijkstra(Heuristic):
@@ -10,6 +11,7 @@ class Dijkstra(Heuristic):
 
     Methods:
         evaluate(state): Evaluates the given state. In this case, always returns 0.
+        evaluate_batch(grids, next_numbers): Vectorized version of evaluate.
     """
 
     def evaluate(self, state):
@@ -27,3 +29,16 @@ class Dijkstra(Heuristic):
             int: Always returns 0.
         """
         return 0
+
+    def evaluate_batch(self, grids, next_numbers):
+        """
+        Vectorized version of evaluate.
+
+        Args:
+            grids: (N, size, size) array with the boards to be evaluated.
+            next_numbers: (N,) array with the next number of every board.
+
+        Returns:
+            np.ndarray: An array of N zeros.
+        """
+        return np.zeros(len(grids), dtype=int)
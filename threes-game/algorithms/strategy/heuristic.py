@@ -1,17 +1,38 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+from state import State
+
 
 class Heuristic(ABC):
     """
     Abstract base class for heuristic evaluation.
 
     This class serves as a blueprint for creating heuristic algorithms that
-    evaluate a given state. Subclasses must implement the evaluate method.
+    evaluate a given state. Subclasses must implement the evaluate method, and
+    should override evaluate_batch with a vectorized version of it.
+
+    Heuristics whose value is made of features of the cells and of the pairs of
+    adjacent cells can also be evaluated incrementally: they set incremental to
+    True and implement features and evaluate_delta, which scores a child from the
+    features of its parent by looking only at the cells the move changed.
+
+    Attributes:
+        incremental (bool): Whether evaluate_delta is faster than evaluate.
 
     Methods:
         evaluate(state): Abstract method to evaluate a given state.
+        evaluate_batch(grids, next_numbers): Evaluates a stack of boards at once.
+        evaluate_states(states): Evaluates a list of states with a single batch call.
+        features(state): Returns the features of a state used by evaluate_delta.
+        evaluate_delta(parent_features, state, rows, cols): Evaluates a child from the features of its parent.
+        changed_cells(old, new, size, rows, cols): Lists the cells of some rows or columns whose value changed.
+        touched_pairs(cells, size): Lists the pairs of adjacent cells that contain any of the given cells.
     """
 
+    incremental = False
+
     @abstractmethod
     def evaluate(self, state):
         """
@@ -24,3 +45,110 @@ class Heuristic(ABC):
             state: The state to be evaluated.
         """
         pass
+
+    def evaluate_batch(self, grids, next_numbers):
+        """
+        Evaluates a stack of boards at once.
+
+        Vectorized implementations must return exactly what evaluate returns for
+        every board. This default implementation evaluates the boards one by one.
+
+        Args:
+            grids (np.ndarray): (N, size, size) array with the tile values of every board.
+            next_numbers (np.ndarray): (N,) array with the next number of every board.
+
+        Returns:
+            np.ndarray: (N,) array with the heuristic value of every board.
+        """
+        values = []
+        for grid, next_number in zip(grids, next_numbers):
+            values.append(self.evaluate(State.from_grid(grid, next_number)))
+        return np.array(values)
+
+    def evaluate_states(self, states):
+        """
+        Evaluates a list of states with a single evaluate_batch call.
+
+        Args:
+            states (list): The states to be evaluated.
+
+        Returns:
+            np.ndarray: (N,) array with the heuristic value of every state.
+        """
+        grids = np.array([state.grid for state in states])
+        next_numbers = np.array([state.next_number for state in states])
+        return self.evaluate_batch(grids, next_numbers)
+
+    def features(self, state):
+        """
+        Returns the features of a state from which evaluate_delta scores its children.
+
+        Args:
+            state: The state whose features are computed.
+
+        Returns:
+            The features of the state, or None if the heuristic is not incremental.
+        """
+        return None
+
+    def evaluate_delta(self, parent_features, state, rows=(), cols=()):
+        """
+        Evaluates a child state from the features of its parent.
+
+        The cells of the child that differ from the parent must lie in the given rows
+        or columns. This default implementation evaluates the child from scratch.
+
+        Args:
+            parent_features: The features of the parent, as returned by features or evaluate_delta.
+            state: The child state to be evaluated.
+            rows (iterable): The rows where the child may differ from the parent.
+            cols (iterable): The columns where the child may differ from the parent.
+
+        Returns:
+            tuple: The heuristic value of the child and its features.
+        """
+        return self.evaluate(state), self.features(state)
+
+    @staticmethod
+    def changed_cells(old, new, size, rows=(), cols=()):
+        """
+        Lists the cells of some rows or columns whose value changed.
+
+        Args:
+            old (list): The values of the parent, as a flattened grid.
+            new (list): The values of the child, as a flattened grid.
+            size (int): Size of the grid.
+            rows (iterable): The rows to be checked.
+            cols (iterable): The columns to be checked.
+
+        Returns:
+            list: The indices in the flattened grid of the cells that changed.
+        """
+        cells = dict.fromkeys([r * size + c for r in rows for c in range(size)]
+                              + [r * size + c for c in cols for r in range(size)])
+        return [i for i in cells if old[i] != new[i]]
+
+    @staticmethod
+    def touched_pairs(cells, size):
+        """
+        Lists the pairs of horizontally or vertically adjacent cells that contain any of the given cells.
+
+        Args:
+            cells (iterable): Indices in the flattened grid.
+            size (int): Size of the grid.
+
+        Returns:
+            set: The pairs, as (i, j) indices in the flattened grid with i < j.
+        """
+        pairs = set()
+        for i in cells:
+            r, c = divmod(i, size)
+            if c > 0:
+                pairs.add((i - 1, i))
+            if c < size - 1:
+                pairs.add((i, i + 1))
+            if r > 0:
+                pairs.add((i - size, i))
+            if r < size - 1:
+                pairs.add((i, i + size))
+        return pairs
@@ -1,4 +1,5 @@
 from algorithms.strategy.heuristic import Heuristic
+import numpy as np
 
 
 class MaxAchievableMinusCurrentScore(Heuristic):
@@ -12,6 +13,7 @@ class MaxAchievableMinusCurrentScore(Heuristic):
     Methods:
         evaluate(state): Evaluates the state by calculating the difference 
                          between max achievable points and total points.
+        evaluate_batch(grids, next_numbers): Vectorized version of evaluate.
     """
 
     def evaluate(self, state):
@@ -29,3 +31,21 @@ class MaxAchievableMinusCurrentScore(Heuristic):
         """
         total_max_score = state.max_points()
         return total_max_score - state.total_points()
+
+    def evaluate_batch(self, grids, next_numbers):
+        """
+        Vectorized version of evaluate.
+
+        Args:
+            grids: (N, size, size) array with the boards to be evaluated.
+            next_numbers: (N,) array with the next number of every board.
+
+        Returns:
+            np.ndarray: The difference between the maximum achievable score and the
+                        total points of every board.
+        """
+        size = grids.shape[-1]
+        total_max_score = 3 ** (1 + np.log2(768 / 3)) * size ** 2
+        with np.errstate(divide='ignore'):
+            points = np.where(grids >= 3, 3.0 ** (1 + np.log2(grids / 3)), 0.0)
+        return total_max_score - points.reshape(len(grids), -1).sum(axis=1)
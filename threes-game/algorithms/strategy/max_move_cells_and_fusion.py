@@ -1,9 +1,16 @@
 from algorithms.strategy.heuristic import Heuristic
+from engine import tables
+from state import BitboardState
+import numpy as np
 
 
 class MaxMoveCellsAndFusion(Heuristic):
 
     def evaluate(self, state):
+        if isinstance(state, BitboardState):  # Table lookups on the packed rows and columns, see engine.tables
+            board = state.board
+            return tables.line_sum(tables.ROW_MOBILITY, board) - 2 * tables.line_sum(tables.ROW_EQUAL_PAIRS, board)
+
         fusiones_posibles = 0
         movimientos_necesarios = 0
         
@@ -24,4 +31,26 @@ class MaxMoveCellsAndFusion(Heuristic):
         
         # Cuanto más fusiones, menor el coste heurístico
         # Cuantos más movimientos necesarios, mayor el coste, pero compensado por fusiones posibles
-        return movimientos_necesarios - fusiones_posibles
\ No newline at end of file
+        return movimientos_necesarios - fusiones_posibles
+
+    def evaluate_batch(self, grids, next_numbers):
+        """
+        Vectorized version of evaluate.
+
+        Every pair of adjacent equal tiles counts as a possible fusion for each of
+        its two tiles, and every pair made of a tile and an empty cell counts as one
+        necessary move.
+
+        Args:
+            grids: (N, size, size) array with the boards to be evaluated.
+            next_numbers: (N,) array with the next number of every board.
+
+        Returns:
+            np.ndarray: The number of necessary moves minus the possible fusions of every board.
+        """
+        fusiones_posibles = np.zeros(len(grids), dtype=int)
+        movimientos_necesarios = np.zeros(len(grids), dtype=int)
+        for a, b in ((grids[:, :, :-1], grids[:, :, 1:]), (grids[:, :-1, :], grids[:, 1:, :])):
+            fusiones_posibles += 2 * ((a == b) & (a != 0)).sum(axis=(1, 2))
+            movimientos_necesarios += ((a == 0) != (b == 0)).sum(axis=(1, 2))
+        return movimientos_necesarios - fusiones_posibles
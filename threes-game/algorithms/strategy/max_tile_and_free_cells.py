@@ -1,4 +1,6 @@
 from algorithms.strategy.heuristic import Heuristic
+from engine import tables
+from state import BitboardState
 
 
 class MaxTileAndFreeCells(Heuristic):
@@ -11,8 +13,13 @@ class MaxTileAndFreeCells(Heuristic):
 
     Methods:
         evaluate(state): Evaluates the state based on the heuristic formula.
+        evaluate_batch(grids, next_numbers): Vectorized version of evaluate.
+        features(state): Returns the values, empty cells and low-value tiles of the state.
+        evaluate_delta(parent_features, state, rows, cols): Incremental version of evaluate.
     """
 
+    incremental = True
+
     def evaluate(self, state):
         """
         Evaluates the given state based on the maximum tile value, the number 
@@ -20,16 +27,56 @@ class MaxTileAndFreeCells(Heuristic):
 
         Args:
             state: An object representing the current state, which must implement 
-                   a grid property (2D list) with numerical tile values.
+                   a grid property (2D list) with numerical tile values and empty_cells().
 
         Returns:
             int: The computed heuristic score, calculated as:
                   max_tile + (2 * empty_cells) - low_tiles_count
         """
-        empty_cells = sum(1 for row in state.grid for cell in row if cell == 0)
+        if isinstance(state, BitboardState):  # Table lookups on the packed rows, see engine.tables
+            board = state.board
+            return tables.max_tile(board) + 2 * tables.empty_cells(board) - tables.row_sum(tables.ROW_LOW, board)
+
+        empty_cells = state.empty_cells()
 
         max_tile = max(max(row) for row in state.grid)
 
         low_tiles_count = sum(1 for row in state.grid for cell in row if cell in {1, 2, 3})
 
         return max_tile + 2 * empty_cells - low_tiles_count
+
+    def evaluate_batch(self, grids, next_numbers):
+        """
+        Vectorized version of evaluate.
+
+        Args:
+            grids: (N, size, size) array with the boards to be evaluated.
+            next_numbers: (N,) array with the next number of every board.
+
+        Returns:
+            np.ndarray: The heuristic score of every board.
+        """
+        empty_cells = (grids == 0).sum(axis=(1, 2))
+        max_tile = grids.max(axis=(1, 2))
+        low_tiles_count = ((grids >= 1) & (grids <= 3)).sum(axis=(1, 2))
+        return max_tile + 2 * empty_cells - low_tiles_count
+
+    def features(self, state):
+        """
+        Returns the features of the state: its values as a flattened grid, its number
+        of empty cells and its count of low-value tiles.
+        """
+        values = state.grid.ravel().tolist()
+        return values, values.count(0), sum(1 for value in values if 1 <= value <= 3)
+
+    def evaluate_delta(self, parent_features, state, rows=(), cols=()):
+        """
+        Incremental version of evaluate, which updates the counts of the parent with
+        the cells the move changed.
+        """
+        old, empty_cells, low_tiles_count = parent_features
+        values = state.grid.ravel().tolist()
+        for i in self.changed_cells(old, values, state.size, rows, cols):
+            empty_cells += (values[i] == 0) - (old[i] == 0)
+            low_tiles_count += (1 <= values[i] <= 3) - (1 <= old[i] <= 3)
+        return max(values) + 2 * empty_cells - low_tiles_count, (values, empty_cells, low_tiles_count)
@@ -1,4 +1,7 @@
 from algorithms.strategy.heuristic import Heuristic
+from engine import tables
+from state import BitboardState
+import numpy as np
 
 
 class MaxTilesCombinationPotential(Heuristic):
@@ -12,11 +15,22 @@ class MaxTilesCombinationPotential(Heuristic):
 
     Methods:
         evaluate(state): Evaluates the state based on the heuristic formula.
+        evaluate_batch(grids, next_numbers): Vectorized version of evaluate.
+        features(state): Returns the values, empty cells, equal pairs and mobility of the state.
+        evaluate_delta(parent_features, state, rows, cols): Incremental version of evaluate.
     """
 
+    incremental = True
+
     def evaluate(self, state):
+        if isinstance(state, BitboardState):  # Table lookups on the packed rows and columns, see engine.tables
+            features = tables.board_features(state.board)
+            empty_cells, combination_potential = features.empty, 2 * features.equal_pairs
+            return (-features.max_tile + empty_cells + 2 * combination_potential + features.mobility
+                    - 0.5 * (empty_cells - combination_potential))
+
         max_tile = max(max(row) for row in state.grid)
-        empty_cells = sum(1 for row in state.grid for cell in row if cell == 0)
+        empty_cells = state.empty_cells()
         
         combination_potential = 0
         mobility_score = 0
@@ -44,3 +58,59 @@ class MaxTilesCombinationPotential(Heuristic):
                         mobility_score += 1
         
         return -max_tile + empty_cells + 2 * combination_potential + mobility_score - 0.5 * (empty_cells - combination_potential)
+
+    def evaluate_batch(self, grids, next_numbers):
+        """
+        Vectorized version of evaluate.
+
+        Every pair of adjacent equal tiles adds to the combination potential of each
+        of its two tiles, and every pair made of a tile and an empty cell adds one
+        to the mobility score.
+
+        Args:
+            grids: (N, 4, 4) array with the boards to be evaluated.
+            next_numbers: (N,) array with the next number of every board.
+
+        Returns:
+            np.ndarray: The heuristic score of every board.
+        """
+        max_tile = grids.max(axis=(1, 2))
+        empty_cells = (grids == 0).sum(axis=(1, 2))
+
+        combination_potential = np.zeros(len(grids), dtype=int)
+        mobility_score = np.zeros(len(grids), dtype=int)
+        for a, b in ((grids[:, :, :-1], grids[:, :, 1:]), (grids[:, :-1, :], grids[:, 1:, :])):
+            combination_potential += 2 * ((a == b) & (a != 0)).sum(axis=(1, 2))
+            mobility_score += ((a == 0) != (b == 0)).sum(axis=(1, 2))
+
+        return -max_tile + empty_cells + 2 * combination_potential + mobility_score - 0.5 * (empty_cells - combination_potential)
+
+    def features(self, state):
+        """
+        Returns the features of the state: its values as a flattened grid, its number
+        of empty cells, its number of pairs of adjacent equal tiles and its mobility score.
+        """
+        values = state.grid.ravel().tolist()
+        equal_pairs = mobility_score = 0
+        for i, j in self.touched_pairs(range(len(values)), state.size):
+            equal_pairs += values[i] == values[j] != 0
+            mobility_score += (values[i] == 0) != (values[j] == 0)
+        return values, values.count(0), equal_pairs, mobility_score
+
+    def evaluate_delta(self, parent_features, state, rows=(), cols=()):
+        """
+        Incremental version of evaluate, which only checks again the cells and the
+        pairs of adjacent cells the move changed.
+        """
+        old, empty_cells, equal_pairs, mobility_score = parent_features
+        values = state.grid.ravel().tolist()
+        changed = self.changed_cells(old, values, state.size, rows, cols)
+        for i in changed:
+            empty_cells += (values[i] == 0) - (old[i] == 0)
+        for i, j in self.touched_pairs(changed, state.size):
+            equal_pairs += (values[i] == values[j] != 0) - (old[i] == old[j] != 0)
+            mobility_score += ((values[i] == 0) != (values[j] == 0)) - ((old[i] == 0) != (old[j] == 0))
+
+        combination_potential = 2 * equal_pairs  # Every pair counts for each of its two tiles
+        score = -max(values) + empty_cells + 2 * combination_potential + mobility_score - 0.5 * (empty_cells - combination_potential)
+        return score, (values, empty_cells, equal_pairs, mobility_score)
@@ -1,4 +1,5 @@
 from algorithms.strategy.heuristic import Heuristic
+import numpy as np
 
 
 class MaxValueAndAdjacent(Heuristic):
@@ -11,11 +12,16 @@ class MaxValueAndAdjacent(Heuristic):
 
     Methods:
         evaluate(state): Evaluates the state based on the heuristic formula.
+        evaluate_batch(grids, next_numbers): Vectorized version of evaluate.
+        features(state): Returns the values and empty cells of the state.
+        evaluate_delta(parent_features, state, rows, cols): Incremental version of evaluate.
     """
 
+    incremental = True
+
     def evaluate(self, state):
         max_tile = max(max(row) for row in state.grid)
-        empty_cells = sum(1 for row in state.grid for cell in row if cell == 0)
+        empty_cells = state.empty_cells()
         
         adjacent_value_sum = 0
         for i in range(len(state.grid)):
@@ -31,3 +37,56 @@ class MaxValueAndAdjacent(Heuristic):
                         adjacent_value_sum += state.grid[i][j + 1]
 
         return -max_tile + empty_cells + 0.1 * adjacent_value_sum
+
+    def evaluate_batch(self, grids, next_numbers):
+        """
+        Vectorized version of evaluate.
+
+        Args:
+            grids: (N, size, size) array with the boards to be evaluated.
+            next_numbers: (N,) array with the next number of every board.
+
+        Returns:
+            np.ndarray: The heuristic score of every board.
+        """
+        max_tile = grids.max(axis=(1, 2))
+        empty_cells = (grids == 0).sum(axis=(1, 2))
+
+        # Sum of the values around every cell
+        padded = np.pad(grids, ((0, 0), (1, 1), (1, 1)))
+        neighbours = padded[:, :-2, 1:-1] + padded[:, 2:, 1:-1] + padded[:, 1:-1, :-2] + padded[:, 1:-1, 2:]
+        adjacent_value_sum = np.where(grids == max_tile[:, None, None], neighbours, 0).sum(axis=(1, 2))
+
+        return -max_tile + empty_cells + 0.1 * adjacent_value_sum
+
+    def features(self, state):
+        """Returns the features of the state: its values as a flattened grid and its number of empty cells."""
+        values = state.grid.ravel().tolist()
+        return values, values.count(0)
+
+    def evaluate_delta(self, parent_features, state, rows=(), cols=()):
+        """
+        Incremental version of evaluate. The empty cells are updated with the cells the
+        move changed; the adjacent values are only summed around the cells of the maximum tile.
+        """
+        old, empty_cells = parent_features
+        values = state.grid.ravel().tolist()
+        size = state.size
+        for i in self.changed_cells(old, values, size, rows, cols):
+            empty_cells += (values[i] == 0) - (old[i] == 0)
+
+        max_tile = max(values)
+        adjacent_value_sum = 0
+        for i, value in enumerate(values):
+            if value == max_tile:
+                r, c = divmod(i, size)
+                if r > 0:
+                    adjacent_value_sum += values[i - size]
+                if r < size - 1:
+                    adjacent_value_sum += values[i + size]
+                if c > 0:
+                    adjacent_value_sum += values[i - 1]
+                if c < size - 1:
+                    adjacent_value_sum += values[i + 1]
+
+        return -max_tile + empty_cells + 0.1 * adjacent_value_sum, (values, empty_cells)
@@ -1,5 +1,4 @@
 from algorithms.strategy.heuristic import Heuristic
-import numpy as np
 
 
 class MinNonFreeCells(Heuristic):
@@ -10,7 +9,21 @@ class MinNonFreeCells(Heuristic):
 
     Methods:
         evaluate(state): Evaluates the state based on the heuristic formula.
+        evaluate_batch(grids, next_numbers): Vectorized version of evaluate.
     """
 
     def evaluate(self, state):
-        return np.sum(state.grid != 0)
+        return state.size * state.size - state.empty_cells()
+
+    def evaluate_batch(self, grids, next_numbers):
+        """
+        Vectorized version of evaluate.
+
+        Args:
+            grids: (N, size, size) array with the boards to be evaluated.
+            next_numbers: (N,) array with the next number of every board.
+
+        Returns:
+            np.ndarray: The number of non-empty cells of every board.
+        """
+        return (grids != 0).sum(axis=(1, 2))
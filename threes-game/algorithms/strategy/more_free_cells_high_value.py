@@ -1,4 +1,6 @@
 from algorithms.strategy.heuristic import Heuristic
+from engine import tables
+from state import BitboardState
 
 
 class MoreFreeCellsHighValue(Heuristic):
@@ -11,9 +13,28 @@ class MoreFreeCellsHighValue(Heuristic):
 
     Methods:
         evaluate(state): Evaluates the state based on the heuristic formula.
+        evaluate_batch(grids, next_numbers): Vectorized version of evaluate.
     """
 
     def evaluate(self, state):
-        empty_cells = sum(1 for row in state.grid for cell in row if cell == 0)
+        if isinstance(state, BitboardState):  # Table lookups on the packed rows, see engine.tables
+            return -tables.max_tile(state.board) + tables.empty_cells(state.board)
+
+        empty_cells = state.empty_cells()
         max_tile = max(max(row) for row in state.grid)
         return -max_tile + empty_cells
+
+    def evaluate_batch(self, grids, next_numbers):
+        """
+        Vectorized version of evaluate.
+
+        Args:
+            grids: (N, size, size) array with the boards to be evaluated.
+            next_numbers: (N,) array with the next number of every board.
+
+        Returns:
+            np.ndarray: The heuristic score of every board.
+        """
+        empty_cells = (grids == 0).sum(axis=(1, 2))
+        max_tile = grids.max(axis=(1, 2))
+        return -max_tile + empty_cells
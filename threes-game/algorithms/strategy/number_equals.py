@@ -1,4 +1,7 @@
 from algorithms.strategy.heuristic import Heuristic
+from engine import bitboard, tables
+from state import BitboardState
+import numpy as np
 
 
 class NumberEquals(Heuristic):
@@ -11,9 +14,20 @@ class NumberEquals(Heuristic):
 
     Methods:
         evaluate(state): Evaluates the state based on the heuristic formula.
+        evaluate_batch(grids, next_numbers): Vectorized version of evaluate.
+        features(state): Returns the border weights and the matches of every row and column of the state.
+        evaluate_delta(parent_features, state, rows, cols): Incremental version of evaluate.
     """
 
+    incremental = True
+
+    # Tile that matches every next number: 2 for a 1, 1 for a 2 and 3 for a 3
+    NEXT_PARTNERS = {1: 2, 2: 1, 3: 3}
+
     def evaluate(self, state):
+        if isinstance(state, BitboardState):
+            return self._evaluate_board(state.board, state.next_number)
+
         matches = 0
         rows = len(state.grid)
         cols = len(state.grid[0])
@@ -58,6 +72,119 @@ class NumberEquals(Heuristic):
 
         return 16 - matches
 
+    def evaluate_batch(self, grids, next_numbers):
+        """
+        Vectorized version of evaluate.
+
+        A tile on the border of the board scores when it can be merged with the next
+        number (twice on the main diagonal), and every tile scores once more for each
+        of its row and column that contains another tile it can be merged with.
+
+        Args:
+            grids: (N, size, size) array with the boards to be evaluated.
+            next_numbers: (N,) array with the next number of every board.
+
+        Returns:
+            np.ndarray: 16 minus the number of matches of every board.
+        """
+        n, rows, cols = grids.shape
+        row_index, col_index = np.indices((rows, cols))
+        border = (row_index == 0) | (col_index == 0) | (row_index == rows - 1) | (col_index == cols - 1)
+        weight = np.where(row_index == col_index, 2, 1)
+
+        next_number = np.asarray(next_numbers)[:, None, None]
+        next_matches = (grids != 0) & border & self._can_match(grids, next_number)
+        matches = np.where(next_matches, weight, 0).sum(axis=(1, 2))
+
+        # pairs[n, r, c, k] tells whether cell (r, c) matches cell (r, k), and the same for columns
+        row_pairs = self._can_match(grids[:, :, :, None], grids[:, :, None, :]) & ~np.eye(cols, dtype=bool)
+        col_pairs = self._can_match(grids[:, :, :, None], grids.transpose(0, 2, 1)[:, None, :, :])
+        col_pairs &= ~(row_index[:, :, None] == np.arange(rows))
+        matches += row_pairs.any(axis=3).sum(axis=(1, 2))
+        matches += col_pairs.any(axis=3).sum(axis=(1, 2))
+
+        return 16 - matches
+
+    @staticmethod
+    def _can_match(value, other):
+        """Element-wise matching rule of evaluate: 1 with 2, 2 with 1, or equal tiles from 3 up."""
+        return ((value == 1) & (other == 2)) | ((value == 2) & (other == 1)) | ((value >= 3) & (value == other))
+
+    def _evaluate_board(self, board, next_number):
+        """
+        Evaluates a packed board: the matches inside rows and columns are looked up in
+        the feature tables (see engine.tables), and only the border cells are read.
+        """
+        matches = tables.line_sum(tables.ROW_MATCHES, board)
+        partner = self.NEXT_PARTNERS[next_number]  # Ranks 1, 2 and 3 are the values 1, 2 and 3
+        size = bitboard.SIZE
+        for r in range(size):
+            for c in ((0, size - 1) if 0 < r < size - 1 else range(size)):
+                if bitboard.get_cell(board, r, c) == partner:
+                    matches += 2 if r == c else 1
+        return 16 - matches
+
+    def features(self, state):
+        """
+        Returns the features of the state: its values as a flattened grid, the weight
+        of the tiles 1, 2 and 3 on the border, and the matches inside every row and column.
+        """
+        values = state.grid.ravel().tolist()
+        size = state.size
+        border_weights = [0, 0, 0, 0]  # Indexed by tile value, only 1, 2 and 3 can match a next number
+        for i, value in enumerate(values):
+            if 1 <= value <= 3 and self._is_border(i, size):
+                border_weights[value] += self._border_weight(i, size)
+        row_matches = [self._line_matches(values[r * size:(r + 1) * size]) for r in range(size)]
+        col_matches = [self._line_matches(values[c::size]) for c in range(size)]
+        return values, border_weights, row_matches, col_matches
+
+    def evaluate_delta(self, parent_features, state, rows=(), cols=()):
+        """
+        Incremental version of evaluate, which updates the border weights with the
+        cells the move changed and only counts again the matches of the rows and
+        columns that contain them.
+        """
+        old, border_weights, row_matches, col_matches = parent_features
+        values = state.grid.ravel().tolist()
+        size = state.size
+        changed = self.changed_cells(old, values, size, rows, cols)
+        if changed:
+            border_weights, row_matches, col_matches = border_weights[:], row_matches[:], col_matches[:]
+        for i in changed:
+            if self._is_border(i, size):
+                weight = self._border_weight(i, size)
+                if 1 <= old[i] <= 3:
+                    border_weights[old[i]] -= weight
+                if 1 <= values[i] <= 3:
+                    border_weights[values[i]] += weight
+        for r in {i // size for i in changed}:
+            row_matches[r] = self._line_matches(values[r * size:(r + 1) * size])
+        for c in {i % size for i in changed}:
+            col_matches[c] = self._line_matches(values[c::size])
+
+        matches = border_weights[self.NEXT_PARTNERS[state.next_number]] + sum(row_matches) + sum(col_matches)
+        return 16 - matches, (values, border_weights, row_matches, col_matches)
+
+    @staticmethod
+    def _is_border(i, size):
+        """Checks whether a cell of the flattened grid is on the border of the board."""
+        r, c = divmod(i, size)
+        return r == 0 or c == 0 or r == size - 1 or c == size - 1
+
+    @staticmethod
+    def _border_weight(i, size):
+        """Weight of a match with the next number: 2 on the main diagonal, 1 elsewhere."""
+        r, c = divmod(i, size)
+        return 2 if r == c else 1
+
+    @staticmethod
+    def _line_matches(line):
+        """Counts the tiles of a row or column that can be merged with another tile of it."""
+        return sum(1 for k, value in enumerate(line) if value != 0 and any(
+            (value == 1 and other == 2) or (value == 2 and other == 1) or (value not in (1, 2) and value == other)
+            for m, other in enumerate(line) if m != k))
+
     def get_matches(self, row, grid):
         matches = 0
         for col in range(len(grid[row])):
@@ -0,0 +1,52 @@
+"""
+Micro-benchmark of State.clone_state.
+
+Compares the current clone_state against the previous implementation, which built
+a whole new State (reseeding the generator, populating the initial tiles and
+drawing the next number) before copying the grid and the generator state, for
+both backends and random number generator modes.
+
+Run it from the threes-game directory:
+
+    python -m benchmarks.clone_state
+"""
+import pickle
+import timeit
+
+import numpy as np
+
+from engine.rng import RNG_MODES
+from state import State, BitboardState
+
+SEED = 1234
+NUMBER = 20000
+
+
+def reinit_clone(state):
+    """Clone the way clone_state did before it skipped __init__."""
+    clone = type(state)(state.seed, state.size, state.rnd.MODE)
+    clone.rnd = state.rnd.clone()
+    clone.grid = np.array(state.grid)
+    clone.next_number = state.next_number
+    return clone
+
+
+def time_per_call(function, number=NUMBER):
+    """Returns the mean time of a call in microseconds."""
+    return timeit.timeit(function, number=number) / number * 1e6
+
+
+def main():
+    print(f"{'backend':<15}{'rng':<9}{'before (us)':>14}{'after (us)':>14}{'speedup':>10}{'pickle (B)':>12}")
+    for state_class in (State, BitboardState):
+        for rng_mode in RNG_MODES:
+            state = state_class(SEED, rng_mode=rng_mode)
+            before = time_per_call(lambda: reinit_clone(state))
+            after = time_per_call(state.clone_state)
+            size = len(pickle.dumps(state.clone_state()))
+            print(f"{state_class.__name__:<15}{rng_mode:<9}{before:>14.2f}{after:>14.2f}"
+                  f"{before / after:>9.1f}x{size:>12}")
+
+
+if __name__ == "__main__":
+    main()
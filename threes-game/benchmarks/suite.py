@@ -0,0 +1,284 @@
+"""
+Benchmark suite with stored baselines.
+
+Micro-benchmarks time the operations every search repeats on every node: State.move
+in each direction, clone_state, completed_state, edge_cost, total_points and the
+evaluate method of every heuristic, for both State backends, over a corpus of
+mid-game positions. Macro-benchmarks play whole games over a fixed seed corpus
+with every algorithm, and a batch of random games in lockstep with
+engine.selfplay.BatchSimulator.
+
+The results are saved as a JSON baseline, and compare flags every benchmark
+that got slower than the baseline by more than a threshold. Macro-benchmarks
+whose points changed are flagged as well, since the engine must play the same
+games after an optimization.
+
+Run it from the threes-game directory:
+
+    python -m benchmarks.suite run --output benchmarks/baseline.json
+    python -m benchmarks.suite run --output current.json
+    python -m benchmarks.suite compare benchmarks/baseline.json current.json --threshold 0.1
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+from algorithms.search_algorithm import SearchBudget
+from engine.selfplay import BatchSimulator, random_policy
+from headless_game import HeadlessGame
+from state import State, BitboardState
+from structures.utils import ALGORITHMS
+from sweep import HEURISTICS
+
+SEEDS = [11, 23, 101, 577, 1234, 4321, 9001, 31337]  # Seed corpus of the end-to-end solves
+POSITIONS = 64  # Mid-game positions of the micro-benchmarks
+SELFPLAY_GAMES = 4096  # Games of the lockstep self-play benchmark
+DIRECTIONS = ('UP', 'RIGHT', 'DOWN', 'LEFT')
+
+# Heuristic and search budget of the end-to-end solve of every algorithm. The budgets
+# keep every game short enough to be timed, and make the uninformed searches replan.
+MACRO = {
+    ALGORITHMS.DEPTH_FIRST_SEARCH: (None, SearchBudget(max_expansions=500)),
+    ALGORITHMS.BREADTH_FIRST_SEARCH: (None, SearchBudget(max_expansions=500)),
+    ALGORITHMS.GREEDY_SEARCH: ('MaxTileAndFreeCells', None),
+    ALGORITHMS.A_STAR: ('MaxTileAndFreeCells', SearchBudget(max_expansions=2000)),
+    ALGORITHMS.A_STAR_MODIFIED: ('MaxTileAndFreeCells', SearchBudget(max_expansions=2000)),
+    ALGORITHMS.IDA_STAR: ('MaxTileAndFreeCells', SearchBudget(max_expansions=2000)),
+    ALGORITHMS.BEAM_SEARCH: ('MaxTileAndFreeCells', SearchBudget(max_expansions=2000)),
+    ALGORITHMS.EXPECTIMAX: ('MaxTileAndFreeCells', None),
+    ALGORITHMS.MCTS: ('MaxTileAndFreeCells', SearchBudget(max_expansions=100))
+}
+
+
+def positions(state_class, count=POSITIONS, seed=0):
+    """
+    Builds a corpus of mid-game positions by playing random moves from fixed seeds.
+
+    Args:
+        state_class (type): State or BitboardState.
+        count (int): Number of positions.
+        seed (int): Seed of the random moves.
+
+    Returns:
+        list: The positions, none of them completed.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    while len(corpus) < count:
+        state = state_class(rng.randrange(100000))
+        for _ in range(rng.randrange(5, 40)):
+            child = state.clone_state()
+            child.move(rng.choice(DIRECTIONS))
+            if child.completed_state():
+                break
+            state = child
+        corpus.append(state)
+    return corpus
+
+
+def time_calls(function, arguments, repeat):
+    """
+    Times a function over a list of arguments.
+
+    Args:
+        function (callable): Function called once per argument.
+        arguments (list): The arguments of the calls.
+        repeat (int): Number of times the whole list is timed; the fastest time is kept.
+
+    Returns:
+        float: The mean time of a call in microseconds.
+    """
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for argument in arguments:
+            function(argument)
+        best = min(best, time.perf_counter() - start)
+    return best / len(arguments) * 1e6
+
+
+def micro_benchmarks(repeat=5, rounds=20):
+    """
+    Runs the micro-benchmarks of both State backends.
+
+    Args:
+        repeat (int): Number of timings of every benchmark; the fastest one is kept.
+        rounds (int): Number of times the corpus is used in every timing.
+
+    Returns:
+        dict: The mean time of a call in microseconds of every benchmark, by name.
+    """
+    results = {}
+    heuristics = {name: heuristic() for name, heuristic in HEURISTICS.items()}
+    for state_class in (State, BitboardState):
+        corpus = positions(state_class) * rounds
+        prefix = f"micro/{state_class.__name__}"
+
+        for direction in DIRECTIONS:
+            def move(state, direction=direction):
+                state.move(direction)
+            best = np.inf
+            for _ in range(repeat):  # move changes the state, so every timing moves fresh clones
+                clones = [state.clone_state() for state in corpus]
+                best = min(best, time_calls(move, clones, 1))
+            results[f"{prefix}/move_{direction}"] = best
+
+        results[f"{prefix}/clone_state"] = time_calls(lambda state: state.clone_state(), corpus, repeat)
+        results[f"{prefix}/completed_state"] = time_calls(lambda state: state.completed_state(), corpus, repeat)
+        results[f"{prefix}/total_points"] = time_calls(lambda state: state.total_points(), corpus, repeat)
+
+        pairs = []
+        for state in corpus:
+            child = state.clone_state()
+            child.move(DIRECTIONS[len(pairs) % len(DIRECTIONS)])
+            pairs.append((state, child))
+        results[f"{prefix}/edge_cost"] = time_calls(lambda pair: pair[0].edge_cost(pair[1]), pairs, repeat)
+
+        for name, heuristic in heuristics.items():
+            results[f"{prefix}/evaluate_{name}"] = time_calls(heuristic.evaluate, corpus, repeat)
+    return results
+
+
+def macro_benchmarks(seeds=SEEDS, algorithms=None):
+    """
+    Plays a whole game with every algorithm over the seed corpus.
+
+    Args:
+        seeds (list): The seeds of the games.
+        algorithms (list): The names of the algorithms to play, or None for all of them.
+
+    Returns:
+        dict: The elapsed seconds, points and expansions of every game, by name.
+    """
+    results = {}
+    for algorithm, (heuristic, budget) in MACRO.items():
+        if algorithms is not None and algorithm.name not in algorithms:
+            continue
+        for seed in seeds:
+            heu = HEURISTICS[heuristic]() if heuristic else None
+            game = HeadlessGame(seed, algorithm, heu, budget=budget)
+            points, elapsed, _, _, _, metrics = game.run()
+            results[f"macro/{algorithm.name}/{heuristic}/{seed}"] = {
+                'time': elapsed,
+                'points': float(points),
+                'expansions': metrics.expansions
+            }
+    return results
+
+
+def selfplay_benchmarks(games=SELFPLAY_GAMES):
+    """
+    Plays a batch of games with random moves in lockstep.
+
+    Args:
+        games (int): Number of games, with the seeds 0 to games - 1.
+
+    Returns:
+        dict: The elapsed seconds, total points and moves of the batch, by name.
+    """
+    simulator = BatchSimulator(range(games))
+    start = time.perf_counter()
+    points = simulator.run(random_policy(seed=0))
+    elapsed = time.perf_counter() - start
+    return {f"selfplay/random/{games}": {
+        'time': elapsed,
+        'points': float(points.sum()),
+        'moves': int(simulator.moves.sum())
+    }}
+
+
+def run(args):
+    """Runs the selected benchmarks and saves them as a JSON baseline."""
+    results = {}
+    if args.only in (None, 'micro'):
+        results.update({name: {'time': value} for name, value in micro_benchmarks(args.repeat).items()})
+    if args.only in (None, 'macro'):
+        results.update(macro_benchmarks(args.seeds, args.algorithms))
+        results.update(selfplay_benchmarks())
+
+    baseline = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor()
+        },
+        'results': results
+    }
+    if args.output == '-':
+        json.dump(baseline, sys.stdout, indent=2)
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(baseline, f, indent=2)
+    return 0
+
+
+def compare(args):
+    """
+    Compares two baselines and prints one line per benchmark present in both.
+
+    Returns:
+        int: 1 if any benchmark regressed or changed its points, 0 otherwise.
+    """
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    with open(args.current) as f:
+        current = json.load(f)['results']
+
+    flagged = 0
+    print(f"{'benchmark':<60}{'baseline':>12}{'current':>12}{'change':>9}  status")
+    for name in sorted(set(baseline) & set(current)):
+        before, after = baseline[name], current[name]
+        change = after['time'] / before['time'] - 1 if before['time'] > 0 else 0.0
+        if 'points' in before and before['points'] != after.get('points'):
+            status = 'CHANGED'
+        elif change > args.threshold:
+            status = 'REGRESSION'
+        elif change < -args.threshold:
+            status = 'faster'
+        else:
+            status = 'ok'
+        flagged += status in ('CHANGED', 'REGRESSION')
+        print(f"{name:<60}{before['time']:>12.4g}{after['time']:>12.4g}{change:>+8.1%}  {status}")
+
+    for name in sorted(set(baseline) ^ set(current)):
+        print(f"{name:<60}  only in the {'baseline' if name in baseline else 'current results'}")
+    print(f"{flagged} benchmark(s) flagged with a threshold of {args.threshold:.0%}.")
+    return 1 if flagged else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite or compare two baselines.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run the benchmarks and save the results as a JSON baseline.")
+    run_parser.add_argument('--output', default='-', help="Output file, '-' for the standard output.")
+    run_parser.add_argument('--only', choices=['micro', 'macro'], default=None, help="Run only one kind of benchmark.")
+    run_parser.add_argument('--seeds', nargs='+', type=int, default=SEEDS, help="Seed corpus of the end-to-end solves.")
+    run_parser.add_argument('--algorithms', nargs='+', choices=[algorithm.name for algorithm in MACRO],
+                            default=None, help="Algorithms of the end-to-end solves (default: all).")
+    run_parser.add_argument('--repeat', type=int, default=5, help="Timings of every micro-benchmark, the fastest is kept.")
+    run_parser.set_defaults(function=run)
+
+    compare_parser = commands.add_parser('compare', help="Flag the benchmarks that regressed against a baseline.")
+    compare_parser.add_argument('baseline', help="JSON baseline.")
+    compare_parser.add_argument('current', help="JSON results to compare with the baseline.")
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help="Relative slowdown flagged as a regression (default: 0.1, 10%%).")
+    compare_parser.set_defaults(function=compare)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    return args.function(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Vectorized move engine for many boards at once.
+
+Boards are stacked in a (N, size, size) uint8 array of tile ranks (see
+engine.bitboard: 0, 1, 2, 3, 6, 12, ... are stored as 0, 1, 2, 3, 4, 5, ...) and
+a move is applied to all of them with a handful of NumPy operations, following
+the same rules as State.move_in_direction. Like bitboard.move, the engine only
+resolves the move itself: adding the next tile is left to the caller, since it
+depends on the random number generator of every game.
+"""
+import numpy as np
+
+from engine.bitboard import RANK_VALUES, move_lines
+
+# Same order as Node.sucesores: orthogonal movements in clockwise direction.
+DIRECTIONS = ('UP', 'RIGHT', 'DOWN', 'LEFT')
+
+
+def to_ranks(grids):
+    """
+    Converts an array of tile values into an array of uint8 tile ranks.
+
+    Args:
+        grids (np.ndarray): Array of tile values, for example a (N, 4, 4) stack of State.grid.
+
+    Returns:
+        np.ndarray: Array of the same shape with the ranks of the tiles.
+    """
+    grids = np.asarray(grids)
+    ranks = np.searchsorted(RANK_VALUES, grids).astype(np.uint8)
+    if not np.array_equal(RANK_VALUES[ranks], grids):
+        raise ValueError("The grids contain values that are not valid tiles.")
+    return ranks
+
+
+def to_values(ranks):
+    """
+    Converts an array of tile ranks back into an array of tile values.
+
+    Args:
+        ranks (np.ndarray): Array of tile ranks.
+
+    Returns:
+        np.ndarray: Array of the same shape with the values of the tiles.
+    """
+    return RANK_VALUES[ranks]
+
+
+def _orient(boards, direction):
+    """Returns a view of the boards in which the direction moves towards column 0."""
+    if direction == 'LEFT':
+        return boards
+    if direction == 'RIGHT':
+        return boards[..., ::-1]
+    if direction == 'UP':
+        return boards.swapaxes(-1, -2)
+    if direction == 'DOWN':
+        return boards.swapaxes(-1, -2)[..., ::-1]
+    raise ValueError("Invalid direction. Use 'LEFT', 'RIGHT', 'UP', or 'DOWN'.")
+
+
+def _unorient(boards, direction):
+    """Inverse of _orient."""
+    if direction == 'DOWN':
+        return boards[..., ::-1].swapaxes(-1, -2)
+    return _orient(boards, direction)
+
+
+def move_batch(boards, direction):
+    """
+    Applies one move to every board of a stack.
+
+    Args:
+        boards (np.ndarray): (N, size, size) uint8 array of tile ranks.
+        direction (str): One of 'LEFT', 'RIGHT', 'UP' or 'DOWN'.
+
+    Returns:
+        tuple: The (N, size, size) array of boards after the move, a (N,) boolean
+            array telling which boards moved and a (N,) array with the number of
+            cells that changed in every board.
+    """
+    boards = np.asarray(boards, dtype=np.uint8)
+    moved_boards = np.ascontiguousarray(_unorient(move_lines(_orient(boards, direction)), direction))
+    changed = np.count_nonzero(moved_boards != boards, axis=(-2, -1))
+    return moved_boards, changed > 0, changed
+
+
+def move_all(boards):
+    """
+    Applies the four moves to every board of a stack.
+
+    Args:
+        boards (np.ndarray): (N, size, size) uint8 array of tile ranks.
+
+    Returns:
+        tuple: The (N, 4, size, size) array of boards after each move, and the
+            (N, 4) moved mask and changed cell counts, with the moves in the
+            order given by DIRECTIONS.
+    """
+    boards = np.asarray(boards, dtype=np.uint8)
+    results = [move_batch(boards, direction) for direction in DIRECTIONS]
+    moved_boards = np.stack([result[0] for result in results], axis=1)
+    moved = np.stack([result[1] for result in results], axis=1)
+    changed = np.stack([result[2] for result in results], axis=1)
+    return moved_boards, moved, changed
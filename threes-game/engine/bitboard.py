@@ -0,0 +1,217 @@
+"""
+Bitboard representation of a 4x4 Threes board.
+
+The whole board is packed into a single 64-bit integer. Every cell uses 4 bits
+and stores the rank of its tile instead of the tile value:
+
+    value: 0  1  2  3  6  12  24  ...  12288
+    rank:  0  1  2  3  4  5   6   ...  15
+
+Cell (r, c) is stored in the nibble 4 * r + c, so every row is a 16-bit chunk whose
+lowest nibble is the leftmost cell. Moves are resolved with tables precomputed
+for every one of the 65536 possible rows (or columns), which follow exactly the
+rules of State.shift_tile and State.can_merge: every tile moves at most one cell,
+1 and 2 merge into 3 and equal tiles greater or equal than 3 merge into their double.
+"""
+import numpy as np
+
+SIZE = 4
+MAX_RANK = 15
+
+LEFT, RIGHT, UP, DOWN = 'LEFT', 'RIGHT', 'UP', 'DOWN'
+
+ROW_MASK = 0xFFFF
+CELL_MASK = 0xF
+
+# RANK_VALUES[rank] is the tile value of a rank; VALUE_RANKS is the inverse mapping.
+RANK_VALUES = np.array([0, 1, 2] + [3 * 2 ** (rank - 3) for rank in range(3, MAX_RANK + 1)], dtype=int)
+VALUE_RANKS = {int(value): rank for rank, value in enumerate(RANK_VALUES)}
+
+
+def can_merge_ranks(a, b):
+    """
+    Vectorized rank version of State.can_merge.
+
+    Tiles of the highest rank are never merged because their result would not
+    fit in a nibble.
+
+    Args:
+        a (np.ndarray): The ranks of the moving tiles.
+        b (np.ndarray): The ranks of the tiles they move into.
+
+    Returns:
+        np.ndarray: True where the tiles can be merged.
+    """
+    return ((a == 1) & (b == 2)) | ((a == 2) & (b == 1)) | ((a >= 3) & (a < MAX_RANK) & (a == b))
+
+
+def move_lines(lines):
+    """
+    Moves every line of an array of ranks towards the first cell of its last axis.
+
+    The line is scanned from the first to the last cell and every tile is shifted
+    one position towards the start when the destination is empty or mergeable,
+    which is what State.move_in_direction does for every row or column.
+
+    Args:
+        lines (np.ndarray): Array of ranks whose last axis holds the lines.
+
+    Returns:
+        np.ndarray: A new array with the ranks after the move.
+    """
+    lines = lines.copy()
+    for i in range(1, lines.shape[-1]):
+        moving, target = lines[..., i], lines[..., i - 1]
+        empty = (moving != 0) & (target == 0)
+        merge = can_merge_ranks(moving, target)
+        lines[..., i - 1] = np.where(empty, moving, np.where(merge, np.where(moving < 3, 3, moving + 1), target))
+        lines[..., i] = np.where(empty | merge, 0, moving)
+    return lines
+
+
+def _build_tables():
+    """Precomputes the transition tables for every possible row value."""
+    rows = np.arange(ROW_MASK + 1, dtype=np.uint64)
+    ranks = np.stack([(rows >> np.uint64(4 * i)) & np.uint64(CELL_MASK) for i in range(SIZE)], axis=1)
+    left = move_lines(ranks)
+    right = move_lines(ranks[:, ::-1])[:, ::-1]
+
+    row_shifts = np.array([4 * i for i in range(SIZE)], dtype=np.uint64)
+    col_shifts = np.array([16 * i for i in range(SIZE)], dtype=np.uint64)
+
+    mergeable = np.zeros(len(rows), dtype=bool)
+    for i in range(SIZE - 1):
+        mergeable |= can_merge_ranks(ranks[:, i], ranks[:, i + 1])
+    locked = np.all(ranks != 0, axis=1) & ~mergeable
+
+    return (
+        np.bitwise_or.reduce(left << row_shifts, axis=1).tolist(),
+        np.bitwise_or.reduce(right << row_shifts, axis=1).tolist(),
+        np.bitwise_or.reduce(left << col_shifts, axis=1).tolist(),
+        np.bitwise_or.reduce(right << col_shifts, axis=1).tolist(),
+        locked.astype(np.uint8).tobytes(),
+    )
+
+
+# ROW_LEFT[row] / ROW_RIGHT[row] are the rows after a move; COL_UP[col] / COL_DOWN[col]
+# are the columns (top cell first) after a move, already spread in the first column
+# of a board. ROW_LOCKED[row] is 1 when no move can change the row. Features of the
+# rows other than moves are precomputed in engine.tables.
+ROW_LEFT, ROW_RIGHT, COL_UP, COL_DOWN, ROW_LOCKED = _build_tables()
+
+
+def pack(grid):
+    """
+    Packs a 4x4 grid of tile values into a 64-bit board.
+
+    Args:
+        grid (np.ndarray): The grid of tile values.
+
+    Returns:
+        int: The packed board.
+    """
+    board = 0
+    for i, value in enumerate(np.asarray(grid).flatten()):
+        board |= VALUE_RANKS[int(value)] << (4 * i)
+    return board
+
+
+def unpack(board):
+    """
+    Unpacks a 64-bit board into a 4x4 grid of tile values.
+
+    Args:
+        board (int): The packed board.
+
+    Returns:
+        np.ndarray: The grid of tile values.
+    """
+    packed = np.frombuffer(board.to_bytes(8, 'little'), dtype=np.uint8)
+    ranks = np.empty(SIZE * SIZE, dtype=np.uint8)
+    ranks[0::2] = packed & CELL_MASK
+    ranks[1::2] = packed >> 4
+    return RANK_VALUES[ranks].reshape(SIZE, SIZE)
+
+
+def transpose(board):
+    """Swaps rows and columns of a packed board."""
+    a1 = board & 0xF0F00F0FF0F00F0F
+    a2 = board & 0x0000F0F00000F0F0
+    a3 = board & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+
+def get_cell(board, r, c):
+    """Returns the rank of the cell (r, c)."""
+    return (board >> (4 * (SIZE * r + c))) & CELL_MASK
+
+
+def set_cell(board, r, c, rank):
+    """Returns the board with the cell (r, c) set to the given rank."""
+    shift = 4 * (SIZE * r + c)
+    return (board & ~(CELL_MASK << shift)) | (rank << shift)
+
+
+def move(board, direction):
+    """
+    Moves a packed board in the given direction without adding a new tile.
+
+    Args:
+        board (int): The packed board.
+        direction (str): One of 'LEFT', 'RIGHT', 'UP' or 'DOWN'.
+
+    Returns:
+        tuple: The packed board after the move and whether any tile moved.
+    """
+    if direction == LEFT or direction == RIGHT:
+        table = ROW_LEFT if direction == LEFT else ROW_RIGHT
+        new_board = (table[board & ROW_MASK]
+                     | table[(board >> 16) & ROW_MASK] << 16
+                     | table[(board >> 32) & ROW_MASK] << 32
+                     | table[(board >> 48) & ROW_MASK] << 48)
+    elif direction == UP or direction == DOWN:
+        table = COL_UP if direction == UP else COL_DOWN
+        t = transpose(board)
+        new_board = (table[t & ROW_MASK]
+                     | table[(t >> 16) & ROW_MASK] << 4
+                     | table[(t >> 32) & ROW_MASK] << 8
+                     | table[(t >> 48) & ROW_MASK] << 12)
+    else:
+        raise ValueError("Invalid direction. Use 'LEFT', 'RIGHT', 'UP', or 'DOWN'.")
+    return new_board, new_board != board
+
+
+def is_locked(board):
+    """
+    Checks whether no move can change the board, which is State.completed_state.
+    """
+    t = transpose(board)
+    return bool(ROW_LOCKED[board & ROW_MASK] and ROW_LOCKED[(board >> 16) & ROW_MASK]
+                and ROW_LOCKED[(board >> 32) & ROW_MASK] and ROW_LOCKED[board >> 48]
+                and ROW_LOCKED[t & ROW_MASK] and ROW_LOCKED[(t >> 16) & ROW_MASK]
+                and ROW_LOCKED[(t >> 32) & ROW_MASK] and ROW_LOCKED[t >> 48])
+
+
+def changed_lines(a, b):
+    """
+    Lists the rows and the columns where two packed boards differ.
+
+    Returns:
+        tuple: The indices of the changed rows and of the changed columns.
+    """
+    x = a ^ b
+    t = transpose(x)
+    return ([r for r in range(SIZE) if (x >> (16 * r)) & ROW_MASK],
+            [c for c in range(SIZE) if (t >> (16 * c)) & ROW_MASK])
+
+
+def changed_cells(a, b):
+    """Counts the cells that differ between two packed boards."""
+    x = a ^ b
+    x |= x >> 2
+    x |= x >> 1
+    return bin(x & 0x1111111111111111).count('1')
@@ -0,0 +1,150 @@
+"""
+Random number generators used by State.
+
+A State only draws random numbers through random(), randint(), choice() and
+sample(), so any object with those methods (plus clone()) can drive a game. Two
+modes are available:
+
+    'mt':      MersenneRandom, the random.Random generator used so far. Games are
+               the same as before for every seed, but cloning a state copies the
+               whole Mersenne Twister state (625 words).
+    'counter': CounterRandom, where every draw is a pure hash (SplitMix64) of the
+               seed and a draw counter, so a state only carries one integer to
+               replay its future tiles.
+"""
+import hashlib
+import random
+import struct
+
+MASK64 = (1 << 64) - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+def mix64(z):
+    """SplitMix64 finalizer: scrambles a 64-bit integer."""
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+
+def seed_key(seed):
+    """
+    Derives the 64-bit key of a counter generator from a seed.
+
+    Integer seeds are used directly; any other seed (the game UI passes strings)
+    is hashed, so the key does not depend on the per-process hash randomization.
+    """
+    if isinstance(seed, int):
+        return mix64(seed & MASK64)
+    digest = hashlib.blake2b(str(seed).encode(), digest_size=8).digest()
+    return mix64(int.from_bytes(digest, 'little'))
+
+
+class MersenneRandom(random.Random):
+    """random.Random with a clone method; the compatibility mode for existing seeds."""
+
+    MODE = 'mt'
+
+    def clone(self):
+        """Returns an independent generator at the same position."""
+        rng = MersenneRandom.__new__(MersenneRandom)
+        rng.setstate(self.getstate())
+        return rng
+
+    def position(self):
+        """
+        Returns a 64-bit digest of the position of the generator: two generators with
+        the same position draw the same numbers from now on.
+        """
+        _, internal, _ = self.getstate()
+        digest = hashlib.blake2b(struct.pack(f'<{len(internal)}I', *internal), digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
+
+
+class CounterRandom:
+    """
+    Counter-based generator: the n-th draw is mix64(key + n * GOLDEN_GAMMA).
+
+    Attributes:
+        seed: The seed the generator was created with.
+        key (int): 64-bit key derived from the seed.
+        counter (int): Number of draws done so far.
+    """
+    MODE = 'counter'
+
+    __slots__ = ('seed', 'key', 'counter')
+
+    def __init__(self, seed, counter=0):
+        self.seed = seed
+        self.key = seed_key(seed)
+        self.counter = counter
+
+    def clone(self):
+        """Returns an independent generator at the same position."""
+        rng = CounterRandom.__new__(CounterRandom)
+        rng.seed = self.seed
+        rng.key = self.key
+        rng.counter = self.counter
+        return rng
+
+    def position(self):
+        """
+        Returns a 64-bit digest of the position of the generator: two generators with
+        the same position draw the same numbers from now on.
+        """
+        return mix64(self.key ^ mix64(self.counter))
+
+    def next64(self):
+        """Returns the next 64-bit draw and advances the counter."""
+        self.counter += 1
+        return mix64((self.key + self.counter * GOLDEN_GAMMA) & MASK64)
+
+    def random(self):
+        """Returns a float in [0, 1) built from the 53 high bits of the next draw."""
+        return (self.next64() >> 11) * (1.0 / (1 << 53))
+
+    def randbelow(self, n):
+        """Returns an integer in [0, n) for 0 < n < 2**32."""
+        return ((self.next64() >> 32) * n) >> 32
+
+    def randint(self, a, b):
+        """Returns an integer in [a, b]."""
+        return a + self.randbelow(b - a + 1)
+
+    def choice(self, seq):
+        """Returns a random element of a non-empty sequence."""
+        if not seq:
+            raise IndexError('Cannot choose from an empty sequence')
+        return seq[self.randbelow(len(seq))]
+
+    def sample(self, population, k):
+        """Returns k distinct elements of the population (partial Fisher-Yates shuffle)."""
+        pool = list(population)
+        if not 0 <= k <= len(pool):
+            raise ValueError('Sample larger than population or is negative')
+        for i in range(k):
+            j = i + self.randbelow(len(pool) - i)
+            pool[i], pool[j] = pool[j], pool[i]
+        return pool[:k]
+
+
+RNG_MODES = {
+    MersenneRandom.MODE: MersenneRandom,
+    CounterRandom.MODE: CounterRandom
+}
+
+
+def make_rng(seed, mode='mt'):
+    """
+    Creates the random number generator of a State.
+
+    Args:
+        seed: The seed of the game.
+        mode (str): 'mt' (random.Random compatibility) or 'counter'.
+
+    Returns:
+        MersenneRandom | CounterRandom: The generator.
+    """
+    if mode not in RNG_MODES:
+        raise ValueError(f"Invalid RNG mode. Use one of {', '.join(RNG_MODES)}.")
+    return RNG_MODES[mode](seed)
@@ -0,0 +1,250 @@
+"""
+Lockstep self-play of many games at once.
+
+BatchSimulator keeps N games as arrays: the boards as a (N, size, size) stack of
+tile ranks (see engine.batch), the next number and the generator counter of every
+game, and a mask of the finished games. Every step applies one move per game with
+the vectorized engine of engine.batch, adds the next number to every game whose
+board changed and draws the following next number, all with NumPy operations
+over the whole batch.
+
+The games use the counter generator of engine.rng, whose draws are a pure hash of
+the seed and a draw counter, so the draws of all the games are computed together
+and every game is the same game a State created with rng_mode='counter' plays with
+the same moves. The Mersenne Twister games cannot be advanced in lockstep.
+
+A policy is any callable that takes the boards and next numbers of the games that
+are still running and returns the index in DIRECTIONS of the move of every game:
+
+    simulator = BatchSimulator(range(10000))
+    points = simulator.run(greedy_policy(MaxTileAndFreeCells()))
+"""
+import math
+
+import numpy as np
+
+from engine.batch import DIRECTIONS, move_batch, move_all, to_ranks, to_values
+from engine.bitboard import RANK_VALUES, can_merge_ranks
+from engine.rng import GOLDEN_GAMMA
+from state import make_state
+
+# Points of a tile of every rank, as State.total_points
+RANK_POINTS = np.array([3 ** (1 + math.log2(value / 3)) if value >= 3 else 0.0 for value in RANK_VALUES])
+
+# Cumulative probabilities of the next numbers 1, 2 and 3, as State.gen_next_number
+NEXT_NUMBERS = np.array([1, 2, 3], dtype=np.uint8)
+NEXT_THRESHOLDS = np.cumsum([int(value) / int(NEXT_NUMBERS.sum()) for value in NEXT_NUMBERS])
+
+
+def _mix64(z):
+    """Vectorized engine.rng.mix64 of a uint64 array."""
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _draw(keys, counters):
+    """Vectorized CounterRandom.next64: the draw number counter of every generator."""
+    return _mix64(keys + counters * np.uint64(GOLDEN_GAMMA))
+
+
+def _edge(boards, direction):
+    """
+    Returns a view of the cells where a move adds the next number: the edge opposite
+    to the move, in the order in which State.add_random_tile lists them.
+    """
+    if direction == 'LEFT':
+        return boards[:, :, -1]
+    if direction == 'RIGHT':
+        return boards[:, :, 0]
+    if direction == 'UP':
+        return boards[:, -1, :]
+    return boards[:, 0, :]
+
+
+def completed(boards):
+    """
+    Checks which boards of a stack are completed, as State.completed_state: no
+    empty cells and no adjacent tiles that can be merged.
+
+    Args:
+        boards (np.ndarray): (N, size, size) uint8 array of tile ranks.
+
+    Returns:
+        np.ndarray: (N,) boolean array.
+    """
+    full = (boards != 0).all(axis=(1, 2))
+    merges = (can_merge_ranks(boards[:, :, :-1], boards[:, :, 1:]).any(axis=(1, 2))
+              | can_merge_ranks(boards[:, :-1, :], boards[:, 1:, :]).any(axis=(1, 2)))
+    return full & ~merges
+
+
+class BatchSimulator:
+    """
+    N games played in lockstep, stored as arrays.
+
+    Attributes:
+        seeds (list): The seed of every game.
+        size (int): Size of the boards.
+        boards (np.ndarray): (N, size, size) uint8 array with the tile ranks of every game.
+        next_numbers (np.ndarray): (N,) uint8 array with the next number of every game.
+        keys (np.ndarray): (N,) uint64 array with the key of the generator of every game.
+        counters (np.ndarray): (N,) uint64 array with the draw counter of every game.
+        moves (np.ndarray): (N,) array with the number of moves played by every game.
+        done (np.ndarray): (N,) boolean array of the finished games.
+    """
+
+    def __init__(self, seeds, size=4):
+        """
+        Starts a game for every seed, with the same initial board as State.
+
+        Args:
+            seeds (iterable): The seeds of the games.
+            size (int): Size of the boards.
+        """
+        self.seeds = list(seeds)
+        self.size = size
+        states = [make_state(seed, size, 'counter') for seed in self.seeds]
+        grids = np.array([state.grid for state in states], dtype=int).reshape(len(states), size, size)
+        self.boards = to_ranks(grids)
+        self.next_numbers = np.array([state.next_number for state in states], dtype=np.uint8)
+        self.keys = np.array([state.rnd.key for state in states], dtype=np.uint64)
+        self.counters = np.array([state.rnd.counter for state in states], dtype=np.uint64)
+        self.moves = np.zeros(len(states), dtype=np.int64)
+        self.done = completed(self.boards)
+
+    def __len__(self):
+        return len(self.boards)
+
+    def step(self, moves):
+        """
+        Applies one move to every game that is not finished, and adds the next
+        number to every game whose board changed.
+
+        Args:
+            moves (np.ndarray): (N,) array with the index in DIRECTIONS of the move of
+                every game. The moves of the finished games are ignored.
+
+        Returns:
+            np.ndarray: (N,) boolean array of the games whose board changed.
+        """
+        moves = np.asarray(moves)
+        moved = np.zeros(len(self.boards), dtype=bool)
+        for index, direction in enumerate(DIRECTIONS):
+            games = np.flatnonzero(~self.done & (moves == index))
+            if len(games) == 0:
+                continue
+            boards, changed, _ = move_batch(self.boards[games], direction)
+            games, boards = games[changed], boards[changed]  # A move that changes nothing adds no tile
+            self._spawn(games, boards, direction)
+            self.boards[games] = boards
+            moved[games] = True
+
+        self.moves += moved
+        self.done[moved] = completed(self.boards[moved])
+        return moved
+
+    def _spawn(self, games, boards, direction):
+        """
+        Adds the next number on a random empty cell of the edge opposite to the move
+        and draws the following next number, with the same draws as State.add_random_tile.
+
+        Args:
+            games (np.ndarray): Indices of the games whose board changed.
+            boards (np.ndarray): Their boards after the move, changed in place.
+            direction (str): The move.
+        """
+        edge = _edge(boards, direction)
+        empty = edge == 0
+        count = empty.sum(axis=1).astype(np.uint64)
+        spawn = np.flatnonzero(count > 0)  # Always every game, a move vacates the trailing cell of the lines it moves
+        games, empty, count = games[spawn], empty[spawn], count[spawn]
+        keys, counters = self.keys[games], self.counters[games]
+
+        # rnd.choice of the empty cells of the edge
+        choice = (((_draw(keys, counters + np.uint64(1)) >> np.uint64(32)) * count) >> np.uint64(32)).astype(np.int64)
+        cell = np.argmax(np.cumsum(empty, axis=1) > choice[:, None], axis=1)
+        edge[spawn, cell] = self.next_numbers[games]  # The ranks of 1, 2 and 3 are the numbers themselves
+
+        # gen_next_number: the first threshold above the draw, or the same number if there is none
+        value = (_draw(keys, counters + np.uint64(2)) >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+        self.next_numbers[games] = np.select([value < threshold for threshold in NEXT_THRESHOLDS], list(NEXT_NUMBERS),
+                                             default=self.next_numbers[games])
+        self.counters[games] = counters + np.uint64(2)
+
+    def scores(self):
+        """
+        Returns the points of every game, as State.total_points.
+
+        Returns:
+            np.ndarray: (N,) float array.
+        """
+        return RANK_POINTS[self.boards].sum(axis=(1, 2))
+
+    def run(self, policy, max_steps=None):
+        """
+        Plays every game until it is finished, asking the policy for the moves of
+        all the running games at every step.
+
+        A game whose move does not change its board is finished as well, as a
+        HeadlessGame ends when its algorithm has no more moves.
+
+        Args:
+            policy (callable): Takes the (M, size, size) boards and (M,) next numbers
+                of the running games and returns the (M,) indices in DIRECTIONS of their moves.
+            max_steps (int): Maximum number of steps, or None to play until every game is finished.
+
+        Returns:
+            np.ndarray: (N,) float array with the points of every game.
+        """
+        steps = 0
+        while not self.done.all() and (max_steps is None or steps < max_steps):
+            running = np.flatnonzero(~self.done)
+            moves = np.zeros(len(self.boards), dtype=np.int64)
+            moves[running] = policy(self.boards[running], self.next_numbers[running])
+            moved = self.step(moves)
+            self.done[running[~moved[running]]] = True
+            steps += 1
+        return self.scores()
+
+
+def greedy_policy(heuristic):
+    """
+    Returns a policy that chooses, for every board, the move whose resulting board
+    has the lowest value of a heuristic, among the moves that change the board.
+
+    The boards are scored before the next number is added, since the cell where it
+    lands is only drawn by the simulator.
+
+    Args:
+        heuristic (Heuristic): The heuristic, whose evaluate_batch scores the boards.
+
+    Returns:
+        callable: The policy.
+    """
+    def policy(boards, next_numbers):
+        count, size = len(boards), boards.shape[-1]
+        after, moved, _ = move_all(boards)
+        values = heuristic.evaluate_batch(to_values(after.reshape(count * len(DIRECTIONS), size, size)),
+                                          np.repeat(next_numbers.astype(int), len(DIRECTIONS)))
+        values = np.where(moved, np.asarray(values, dtype=float).reshape(count, len(DIRECTIONS)), np.inf)
+        return np.argmin(values, axis=1)
+    return policy
+
+
+def random_policy(seed=None):
+    """
+    Returns a policy that chooses a random move among the moves that change every board.
+
+    Args:
+        seed (int): Seed of the choices, or None for a random seed.
+
+    Returns:
+        callable: The policy.
+    """
+    rng = np.random.default_rng(seed)
+
+    def policy(boards, next_numbers):
+        _, moved, _ = move_all(boards)
+        return np.argmax(np.where(moved, rng.random(moved.shape), -1.0), axis=1)
+    return policy
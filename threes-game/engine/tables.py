@@ -0,0 +1,165 @@
+"""
+Per-row feature tables for packed boards.
+
+Most features of a board add up over its rows and columns: empty cells, low-value
+tiles, points, pairs of adjacent equal or mergeable tiles, mobility next to empty
+cells and the matches of NumberEquals. This module precomputes them for every one
+of the 65536 possible packed rows (see engine.bitboard), so the features of a board
+are four lookups for its rows plus four for its columns.
+
+The tables are built the first time the module is imported and saved next to it
+as a .npy file, which later imports load instead of building them again.
+"""
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from engine import bitboard
+from engine.bitboard import SIZE, ROW_MASK, CELL_MASK, RANK_VALUES, can_merge_ranks
+
+VERSION = 1
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), f'row_tables_v{VERSION}.npy')
+
+# Features of every row, in the order of the table columns. The first ones only
+# depend on the cells; the pair features are also looked up for the columns.
+EMPTY, LOW, MAX_RANK, POINTS, EQUAL_PAIRS, MERGE_PAIRS, MOBILITY, MATCHES = range(8)
+
+BoardFeatures = namedtuple('BoardFeatures', ['empty', 'low', 'max_tile', 'points', 'equal_pairs',
+                                             'merge_pairs', 'mobility', 'matches'])
+
+
+def _line_matches(ranks):
+    """
+    Vectorized NumberEquals._line_matches: counts the tiles of every line that can
+    be merged with another tile of the same line.
+    """
+    matches = np.zeros(len(ranks), dtype=np.int64)
+    for k in range(SIZE):
+        found = np.zeros(len(ranks), dtype=bool)
+        for m in range(SIZE):
+            if m != k:
+                a, b = ranks[:, k], ranks[:, m]
+                found |= ((a == 1) & (b == 2)) | ((a == 2) & (b == 1)) | ((a >= 3) & (a == b))
+        matches += (ranks[:, k] != 0) & found
+    return matches
+
+
+def build_tables():
+    """
+    Computes the features of every packed row.
+
+    Returns:
+        np.ndarray: (8, 65536) float64 array, one row per feature.
+    """
+    rows = np.arange(ROW_MASK + 1, dtype=np.uint64)
+    ranks = np.stack([(rows >> np.uint64(4 * i)) & np.uint64(CELL_MASK) for i in range(SIZE)], axis=1).astype(np.int64)
+    values = RANK_VALUES[ranks]
+
+    tables = np.zeros((8, len(rows)))
+    tables[EMPTY] = (ranks == 0).sum(axis=1)
+    tables[LOW] = ((ranks >= 1) & (ranks <= 3)).sum(axis=1)
+    tables[MAX_RANK] = ranks.max(axis=1)
+    with np.errstate(divide='ignore'):
+        tables[POINTS] = np.where(values >= 3, 3.0 ** (1 + np.log2(values / 3)), 0.0).sum(axis=1)
+    for i in range(SIZE - 1):
+        a, b = ranks[:, i], ranks[:, i + 1]
+        tables[EQUAL_PAIRS] += (a == b) & (a != 0)
+        tables[MERGE_PAIRS] += can_merge_ranks(a, b)
+        tables[MOBILITY] += (a == 0) != (b == 0)
+    tables[MATCHES] = _line_matches(ranks)
+    return tables
+
+
+def load_tables(path=CACHE_PATH):
+    """
+    Loads the tables from the cache file, building and saving them if it is missing
+    or does not hold tables of the expected shape.
+
+    Args:
+        path (str): Path of the cache file.
+
+    Returns:
+        np.ndarray: (8, 65536) float64 array, one row per feature.
+    """
+    try:
+        tables = np.load(path)
+        if tables.shape == (8, ROW_MASK + 1):
+            return tables
+    except (OSError, ValueError):
+        pass
+    tables = build_tables()
+    try:
+        np.save(path, tables)
+    except OSError:  # Read-only installation: the tables are built on every import
+        pass
+    return tables
+
+
+TABLES = load_tables()
+
+# Python lists of every feature, which are much faster than NumPy arrays to index
+# with a single row. The counts are stored as ints and the points as floats.
+ROW_EMPTY, ROW_LOW, ROW_MAX_RANK = (TABLES[i].astype(np.int64).tolist() for i in (EMPTY, LOW, MAX_RANK))
+ROW_POINTS = TABLES[POINTS].tolist()
+ROW_EQUAL_PAIRS, ROW_MERGE_PAIRS, ROW_MOBILITY, ROW_MATCHES = (
+    TABLES[i].astype(np.int64).tolist() for i in (EQUAL_PAIRS, MERGE_PAIRS, MOBILITY, MATCHES))
+
+
+def row_sum(table, board):
+    """Adds up a feature over the four rows of a packed board."""
+    return (table[board & ROW_MASK] + table[(board >> 16) & ROW_MASK]
+            + table[(board >> 32) & ROW_MASK] + table[board >> 48])
+
+
+def line_sum(table, board):
+    """Adds up a feature over the four rows and the four columns of a packed board."""
+    return row_sum(table, board) + row_sum(table, bitboard.transpose(board))
+
+
+def empty_cells(board):
+    """Counts the empty cells of a packed board."""
+    return row_sum(ROW_EMPTY, board)
+
+
+def merge_pairs(board):
+    """Counts the horizontally or vertically adjacent pairs of a packed board that can be merged."""
+    return line_sum(ROW_MERGE_PAIRS, board)
+
+
+def max_tile(board):
+    """Returns the value of the highest tile of a packed board."""
+    return int(RANK_VALUES[max(ROW_MAX_RANK[board & ROW_MASK], ROW_MAX_RANK[(board >> 16) & ROW_MASK],
+                               ROW_MAX_RANK[(board >> 32) & ROW_MASK], ROW_MAX_RANK[board >> 48])])
+
+
+def total_points(board):
+    """Returns the points of a packed board, as State.total_points."""
+    return row_sum(ROW_POINTS, board)
+
+
+def board_features(board):
+    """
+    Returns every feature of a packed board with eight table lookups.
+
+    Args:
+        board (int): The packed board.
+
+    Returns:
+        BoardFeatures: The empty cells, low-value tiles, highest tile, points, pairs of
+            adjacent equal tiles, pairs of adjacent mergeable tiles, pairs of a tile and
+            an empty cell, and the NumberEquals matches inside rows and columns.
+    """
+    t = bitboard.transpose(board)
+    rows = (board & ROW_MASK, (board >> 16) & ROW_MASK, (board >> 32) & ROW_MASK, board >> 48)
+    lines = rows + (t & ROW_MASK, (t >> 16) & ROW_MASK, (t >> 32) & ROW_MASK, t >> 48)
+    return BoardFeatures(
+        empty=sum(ROW_EMPTY[row] for row in rows),
+        low=sum(ROW_LOW[row] for row in rows),
+        max_tile=int(RANK_VALUES[max(ROW_MAX_RANK[row] for row in rows)]),
+        points=sum(ROW_POINTS[row] for row in rows),
+        equal_pairs=sum(ROW_EQUAL_PAIRS[line] for line in lines),
+        merge_pairs=sum(ROW_MERGE_PAIRS[line] for line in lines),
+        mobility=sum(ROW_MOBILITY[line] for line in lines),
+        matches=sum(ROW_MATCHES[line] for line in lines)
+    )
@@ -0,0 +1,83 @@
+import time
+from state import make_state
+from structures.game_record import GameRecord
+from structures.utils import TRANSLATE_MOVES, ALGORITHM_CLASSES, CACHED_ALGORITHMS
+
+class HeadlessGame:
+    """
+    Class that plays a Threes game with an AI algorithm and no graphical interface.
+
+    Unlike ThreeGame, it never imports pygame or tkinter, opens no window and does
+    not wait between moves, so it can run on machines with no display and in
+    worker processes that must start quickly.
+    """
+
+    def __init__(self, seed, alg, heu, size=4, rng_mode='mt', budget=None, store=None, cache_size=None):
+        """
+        Initialize the game.
+
+        Args:
+            seed: Seed for the state generator.
+            alg: Algorithm to use (a member of structures.utils.ALGORITHMS).
+            heu: Heuristic to use, or None for algorithms that do not use one.
+            size: Size of the board (default 4).
+            rng_mode: Random number generator of the state ('mt' or 'counter').
+            budget: SearchBudget of every search of the algorithm, or None for unbounded searches.
+            store: TranspositionStore shared with other runs, for the algorithms that accept one (A* and greedy search).
+            cache_size: Maximum number of heuristic values (entries) cached by the algorithms that cache them,
+                or None to disable the cache (default).
+        """
+        self.seed = seed
+        self.size = size
+        self.algorithm = alg
+        self.heuristic = heu
+        self.budget = budget
+        self.store = store
+        self.cache_size = cache_size
+        self.rng_mode = rng_mode
+        self.moves = []  # MOVEMENTS played so far
+        self.state = make_state(self.seed, self.size, rng_mode)
+
+    def run(self):
+        """
+        Play the game until no move changes the board or the algorithm has no more moves.
+
+        Returns:
+            tuple: The points, the elapsed time in seconds, the open nodes, closed nodes
+                and depth reported by the algorithm, and its SearchMetrics.
+        """
+        start_time = time.time()
+        points, opened, closed, depth, metrics = self.run_ai_mode()
+        return points, time.time() - start_time, opened, closed, depth, metrics
+
+    def run_ai_mode(self):
+        """
+        Play the moves of the algorithm on the state.
+
+        Returns:
+            tuple: The points, the open nodes, closed nodes and depth reported by the
+                algorithm, and its SearchMetrics.
+        """
+        options = {'store': self.store} if self.store is not None else {}
+        if self.algorithm in CACHED_ALGORITHMS:
+            options['cache_size'] = self.cache_size
+        algorithm_class = ALGORITHM_CLASSES[self.algorithm](self.state, self.heuristic, headless=True, budget=self.budget, **options)
+
+        while not self.state.completed_state():
+            next_move = algorithm_class.get_next_move()
+            if next_move is None:
+                break
+            self.state.move(TRANSLATE_MOVES[next_move])
+            self.moves.append(next_move)
+
+        opened, closed, depth = algorithm_class.returnOpenAndClose()
+        return self.state.total_points(), opened, closed, depth, algorithm_class.metrics
+
+    def game_record(self):
+        """
+        Returns the record of the moves played so far, which replays this game.
+
+        Returns:
+            GameRecord: The seed, generator mode, board size, moves and points of the game.
+        """
+        return GameRecord(self.seed, self.rng_mode, self.size, list(self.moves), float(self.state.total_points()))
@@ -55,7 +55,7 @@ class QuestionUI:
 
                 if inputAlgorithm is None:
                     inputAlgorithm = tk.OptionMenu(ventana, variableAlgorithm, 
-                        "Depth First Search", "Breadth First Search", "Greedy Search", "A*", "A* Modified")
+                        "Depth First Search", "Breadth First Search", "Greedy Search", "A*", "A* Modified", "IDA*", "Beam Search", "Expectimax", "MCTS")
                     inputAlgorithm.place(x=200, y=350)
             else:
                 if preguntaAlgorithm:
@@ -82,7 +82,7 @@ class QuestionUI:
         def update_heuristic_menu(*args):
             nonlocal pregunta_heuristic, input_heuristic
 
-            if variableAlgorithm.get() in ["A*", "Greedy Search"]:
+            if variableAlgorithm.get() in ["A*", "Greedy Search", "IDA*", "Beam Search", "Expectimax"]:
                 if pregunta_heuristic is None:
                     pregunta_heuristic = tk.Label(text="¿Qué heuristica desea utilizar?", font="arial 15 bold", fg="black")
                     pregunta_heuristic.place(x=200, y=400)
@@ -166,7 +166,11 @@ class QuestionUI:
             "Breadth First Search": ALGORITHMS.BREADTH_FIRST_SEARCH,
             "A*": ALGORITHMS.A_STAR,
             "A* Modified": ALGORITHMS.A_STAR_MODIFIED,
-            "Greedy Search": ALGORITHMS.GREEDY_SEARCH
+            "Greedy Search": ALGORITHMS.GREEDY_SEARCH,
+            "IDA*": ALGORITHMS.IDA_STAR,
+            "Beam Search": ALGORITHMS.BEAM_SEARCH,
+            "Expectimax": ALGORITHMS.EXPECTIMAX,
+            "MCTS": ALGORITHMS.MCTS
         }
         return mapping.get(algorithm_name)
 
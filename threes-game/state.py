@@ -1,24 +1,32 @@
 import numpy as np
-import random as rnd
 import math
+from engine import bitboard, tables
+from engine.rng import make_rng
 
 class State:
     """
     State class represents the state of the Threes game.
     Attributes:
         seed (int): The seed for the random number generator.
-        rnd (Random): Random number generator instance.
+        rnd (MersenneRandom | CounterRandom): Random number generator instance (see engine.rng).
         size (int): Size of the game grid.
         grid (ndarray): The game grid.
-        has_merged (ndarray): Array to track merged tiles.
+        has_merged (ndarray): Array to track merged tiles, allocated on the first move.
         next_number (int): The next number to be added to the grid.
+    The number of empty cells and of adjacent pairs that can be merged are counted
+    the first time they are needed and then kept up to date by every move, which
+    only checks the pairs of the rows or columns the move touched.
     Methods:
-        __init__(seed, size=4):
-            Initializes the State with a given seed and grid size.
+        __init__(seed, size=4, rng_mode='mt'):
+            Initializes the State with a given seed, grid size and random number generator mode.
         __eq__(other):
             Checks equality between two State instances.
         __hash__():
             Returns the hash of the State instance.
+        key():
+            Returns a compact hashable key of the board.
+        from_grid(grid, next_number):
+            Creates a state with a given board, to be evaluated.
         gen_next_number():
             Generates the next number to be added to the grid.
         populate_initial_tiles(num_tiles=8):
@@ -43,19 +51,28 @@ class State:
             Checks if two tiles can be merged.
         completed_state():
             Checks if the game is in a completed state.
+        empty_cells():
+            Returns the number of empty cells.
+        merge_pairs():
+            Returns the number of adjacent pairs of tiles that can be merged.
         edge_cost(e2):
             Calculates the edge cost between two states.
+        changed_lines(other):
+            Returns the rows or the columns where another state differs from this one.
         total_points():
             Calculates the total points of the current state.
     """
-    def __init__(self, seed, size=4):
+    __slots__ = ('seed', 'rnd', 'size', 'grid', 'has_merged', 'next_number', '_empty', '_merges', '_pairs')
+
+    def __init__(self, seed, size=4, rng_mode='mt'):
         self.seed = seed
-        self.rnd = rnd.Random(seed)
+        self.rnd = make_rng(seed, rng_mode)
 
         self.size = size
 
         self.grid = self.populate_initial_tiles((size * size) // 2)
-        self.has_merged = np.zeros_like(self.grid)
+        self.has_merged = None
+        self._reset_counts()
 
         self.gen_next_number()
 
@@ -65,27 +82,51 @@ class State:
     def __hash__(self):
         return hash(self.grid.tobytes())
 
+    def key(self):
+        """
+        Returns a compact hashable key of the board, equal for two states exactly
+        when the states are equal.
+        """
+        return self.grid.tobytes()
+
+    @classmethod
+    def from_grid(cls, grid, next_number):
+        """
+        Creates a state with a given board and no random number generator, so it
+        can be evaluated by a heuristic but not moved.
+
+        Args:
+            grid (np.ndarray): The tile values of the board.
+            next_number (int): The next number of the state.
+
+        Returns:
+            State: The new state.
+        """
+        state = object.__new__(State)
+        state.seed = None
+        state.rnd = None
+        state.size = grid.shape[0]
+        state.grid = grid
+        state.has_merged = None
+        state.next_number = int(next_number)
+        state._reset_counts()
+        return state
+
     def gen_next_number(self):
         """
         Generates the next number to be placed on the grid based on the current state of the game.
-        The method calculates the maximum value present on the grid and determines the valid numbers
-        that can be generated (1, 2, or 3). It then calculates the probabilities for each of these
-        numbers and uses a random value to select the next number to be placed on the grid.
+        The valid numbers that can be generated are 1, 2 or 3. The method calculates the probabilities
+        for each of these numbers and uses a random value to select the next number to be placed on the grid.
         The probabilities are normalized so that their sum equals 1, and cumulative probabilities are
         calculated to facilitate the random selection process.
         Attributes:
             self.grid (np.ndarray): The current state of the game grid.
-            self.rnd (np.random.RandomState): Random state for generating random values.
+            self.rnd (MersenneRandom | CounterRandom): Random state for generating random values.
             self.next_number (int): The next number to be placed on the grid.
         Returns:
             None
         """
-        max_value = np.max(self.grid)
-
         valid_numbers = [1, 2, 3]
-        current_value = 3
-        while current_value <= max_value // 2:
-            current_value *= 2
 
         probabilities = [val for val in valid_numbers]#if val < 3 else 1 / (3 ** (1 + math.log2(val / 3))) for val in valid_numbers]
         total_probability = sum(probabilities)
@@ -122,16 +163,28 @@ class State:
         """
         Creates a deep copy of the current state.
 
+        The clone is built without running __init__ again: only the board, the next
+        number and the position of the random number generator are copied, and the
+        clone gets its own merge scratch on its first move.
+
         Returns:
             State: A new instance of State with the same properties as the current state.
         """
-        state = State(self.seed, self.size)
-        state.rnd.setstate(self.rnd.getstate())
-        state.grid = np.array(self.grid)
-        state.has_merged = self.has_merged
+        state = object.__new__(type(self))
+        state.seed = self.seed
+        state.size = self.size
+        state.rnd = self.rnd.clone()
+        self._copy_board(state)
+        state.has_merged = None
         state.next_number = self.next_number
+        state._empty, state._merges = self._empty, self._merges
+        state._pairs = None if self._pairs is None else self._pairs[:]
         return state
 
+    def _copy_board(self, state):
+        """Copies the board of this state into a state being cloned."""
+        state.grid = self.grid.copy()
+
     def move(self, direction):
         """
         Moves the game state in the specified direction.
@@ -166,8 +219,11 @@ class State:
         and merges them if they are the same and can be merged according to the game rules. After moving
         and merging, it adds a new random tile to the grid.
         """
+        if self.has_merged is None:
+            self.has_merged = np.zeros_like(self.grid)
         self.has_merged.fill(False)  # Resetear el estado de fusiones
         has_move = False
+        moved_lines = set()  # Rows (horizontal moves) or columns (vertical moves) where a tile moved
         if delta_col != 0:  # Movimiento horizontal
             if delta_col == 1:  # Movimiento a la derecha
                 for r in range(self.size):
@@ -175,12 +231,14 @@ class State:
                         if self.grid[r][c] != 0:
                            if self.shift_tile(r, c, 0, 1):  # Desplazar a la derecha
                                     has_move=True
+                                    moved_lines.add(r)
             elif delta_col == -1:  # Movimiento a la izquierda
                 for r in range(self.size):
                     for c in range(self.size):
                         if self.grid[r][c] != 0:
                            if self.shift_tile(r, c, 0, -1):  # Desplazar a la izquierda
                                  has_move=True
+                                 moved_lines.add(r)
 
         elif delta_row != 0:  # Movimiento vertical
             if delta_row == 1:  # Movimiento hacia abajo
@@ -189,14 +247,23 @@ class State:
                         if self.grid[r][c] != 0:
                             if self.shift_tile(r, c, 1, 0):  # Desplazar hacia abajo
                                 has_move=True
+                                moved_lines.add(c)
             elif delta_row == -1:  # Movimiento hacia arriba
                 for r in range(self.size):
                     for c in range(self.size):
                         if self.grid[r][c] != 0:
                             if self.shift_tile(r, c, -1, 0):  # Desplazar hacia arriba
                                 has_move=True
+                                moved_lines.add(c)
         if has_move:
-            self.add_random_tile(delta_row, delta_col)
+            line = self.add_random_tile(delta_row, delta_col)
+            if line is not None:
+                moved_lines.add(line)
+            if self._pairs is not None:  # Update the counts of the rows or columns that changed
+                if delta_col != 0:
+                    self._update_pairs(rows=moved_lines)
+                else:
+                    self._update_pairs(cols=moved_lines)
 
 
     def shift_tile(self, r, c, delta_row, delta_col):
@@ -226,6 +293,7 @@ class State:
                 self.grid[new_r][new_c] += self.grid[r][c]
                 self.grid[r][c] = 0
                 self.has_merged[new_r][new_c] = 1
+                self._empty += 1  # Two tiles become one
                 return True
         return False
 
@@ -239,30 +307,41 @@ class State:
                          -1 for left, 1 for right, 0 for vertical movement.
         The method places the next_number tile in an appropriate empty spot
         based on the direction of movement and then generates the next number.
+        Returns:
+        int: The row (horizontal movement) or column (vertical movement) of the new
+             tile, or None if there was no empty spot.
         """
+        line = None
         if delta_row == 0:  # Horizontal movement
             if delta_col == -1:  # Left
                 row = [(r) for r in range(self.size) if self.grid[r][self.size-1] == 0]
                 if row:
-                    self.grid[self.rnd.choice(row)][self.size-1] = self.next_number
+                    line = self.rnd.choice(row)
+                    self.grid[line][self.size-1] = self.next_number
                     self.gen_next_number()
             else:  # Right
                 row = [(r) for r in range(self.size) if self.grid[r][0] == 0]
                 if row:
-                    self.grid[self.rnd.choice(row)][0] = self.next_number
+                    line = self.rnd.choice(row)
+                    self.grid[line][0] = self.next_number
                     self.gen_next_number()
         else:  # Vertical movement
             if delta_row == -1:  # Up
                 col = [(c) for c in range(self.size) if self.grid[self.size-1][c] == 0]
                 if col:
-                    self.grid[self.size-1][self.rnd.choice(col)] = self.next_number
+                    line = self.rnd.choice(col)
+                    self.grid[self.size-1][line] = self.next_number
                     self.gen_next_number()
 
             else:  # Down
                 col = [(c) for c in range(self.size) if self.grid[0][c] == 0]
                 if col:
-                    self.grid[0][self.rnd.choice(col)] = self.next_number
+                    line = self.rnd.choice(col)
+                    self.grid[0][line] = self.next_number
                     self.gen_next_number()
+        if line is not None:
+            self._empty -= 1
+        return line
 
     def can_merge(self, a, b):
         """
@@ -289,20 +368,95 @@ class State:
         and no adjacent cells can be merged. The function checks for possible merges
         both horizontally and vertically.
 
+        The counts of empty cells and mergeable pairs are kept up to date by every
+        move, so the check itself does not scan the grid.
+
         Returns:
             bool: True if the state is completed, False otherwise.
         """
-        if np.any(self.grid == 0):
-            return False
-        for r in range(self.size):
-            for c in range(self.size - 1):
-                if self.can_merge(self.grid[r, c], self.grid[r, c + 1]):
-                    return False
-        for c in range(self.size):
-            for r in range(self.size - 1):
-                if self.can_merge(self.grid[r, c], self.grid[r + 1, c]):
-                    return False
-        return True
+        if self._pairs is None:
+            self._count_pairs()
+        return self._empty == 0 and self._merges == 0
+
+    def empty_cells(self):
+        """
+        Returns the number of empty cells (cells with value 0).
+
+        Returns:
+            int: The number of empty cells, kept up to date by every move.
+        """
+        if self._pairs is None:
+            self._count_pairs()
+        return self._empty
+
+    def merge_pairs(self):
+        """
+        Returns the number of pairs of horizontally or vertically adjacent tiles that
+        can be merged, following can_merge.
+
+        Returns:
+            int: The number of mergeable pairs, kept up to date by every move.
+        """
+        if self._pairs is None:
+            self._count_pairs()
+        return self._merges
+
+    def _reset_counts(self):
+        """Forgets the counts, so they are computed from the grid the next time they are needed."""
+        self._empty = 0
+        self._merges = 0
+        self._pairs = None
+
+    def _pair_cells(self, i):
+        """
+        Returns the cells of an adjacent pair. The first size * (size - 1) pairs are
+        horizontal, pair r * (size - 1) + c joining (r, c) and (r, c + 1); the rest are
+        vertical, pair size * (size - 1) + r * size + c joining (r, c) and (r + 1, c).
+        """
+        horizontal = self.size * (self.size - 1)
+        if i < horizontal:
+            r, c = divmod(i, self.size - 1)
+            return r, c, r, c + 1
+        r, c = divmod(i - horizontal, self.size)
+        return r, c, r + 1, c
+
+    def _count_pairs(self):
+        """Counts the empty cells and checks every adjacent pair of the grid."""
+        grid = self.grid.tolist()
+        self._empty = sum(row.count(0) for row in grid)
+        self._pairs = bytearray(2 * self.size * (self.size - 1))
+        self._merges = 0
+        for i in range(len(self._pairs)):
+            r1, c1, r2, c2 = self._pair_cells(i)
+            if self.can_merge(grid[r1][c1], grid[r2][c2]):
+                self._pairs[i] = 1
+                self._merges += 1
+
+    def _update_pairs(self, rows=(), cols=()):
+        """
+        Checks again the adjacent pairs with a cell in the given rows or columns.
+
+        Args:
+            rows (iterable): The rows whose cells changed.
+            cols (iterable): The columns whose cells changed.
+        """
+        n = self.size
+        horizontal = n * (n - 1)
+        pairs = set()
+        for r in rows:
+            pairs.update(range(r * (n - 1), (r + 1) * (n - 1)))  # Pairs inside the row
+            pairs.update(range(horizontal + max(r - 1, 0) * n, horizontal + min(r + 1, n - 1) * n))  # Pairs above and below
+        for c in cols:
+            pairs.update(horizontal + r * n + c for r in range(n - 1))  # Pairs inside the column
+            pairs.update(r * (n - 1) + c2 for r in range(n) for c2 in (c - 1, c) if 0 <= c2 < n - 1)  # Pairs at both sides
+
+        grid = self.grid.tolist()
+        for i in pairs:
+            r1, c1, r2, c2 = self._pair_cells(i)
+            merge = self.can_merge(grid[r1][c1], grid[r2][c2])
+            if merge != self._pairs[i]:
+                self._pairs[i] = merge
+                self._merges += 1 if merge else -1
 
     def edge_cost(self, e2):
         """
@@ -322,6 +476,23 @@ class State:
         )
         return 1 / celdas_movidas if celdas_movidas > 0 else 0
 
+    def changed_lines(self, other):
+        """
+        Returns the rows or the columns where the board of another state differs from
+        this one, which is what incremental heuristics need to score a child.
+
+        Args:
+            other (State): The state to compare with, usually a child of this one.
+
+        Returns:
+            tuple: The changed rows and no columns, or no rows and the changed columns,
+                whichever lists fewer lines.
+        """
+        diff = self.grid != other.grid
+        rows = np.flatnonzero(diff.any(axis=1)).tolist()
+        cols = np.flatnonzero(diff.any(axis=0)).tolist()
+        return (rows, ()) if len(rows) <= len(cols) else ((), cols)
+
 
     def total_points(self):
         """
@@ -351,3 +522,159 @@ class State:
         points_per_tile = 3 ** (1 + math.log2(max_tile_value / 3))  # Points for a single 768 tile
         total_points = points_per_tile * (self.size ** 2)  # Multiply by total number of tiles
         return total_points
+
+
+class BitboardState(State):
+    """
+    State backed by a packed 64-bit board (see engine.bitboard).
+
+    It follows the same rules and consumes the random number generator in the same
+    order as State, so both produce the same games for the same seed, but moves,
+    terminal checks and edge costs are resolved with precomputed tables instead of
+    cell by cell. Only 4x4 boards can be packed.
+
+    Attributes:
+        board (int): The packed board.
+        grid (ndarray): The game grid, unpacked from the board on demand. It must be
+            treated as read-only: assigning a new grid packs it again.
+    """
+    DIRECTIONS = {
+        (0, -1): bitboard.LEFT,
+        (0, 1): bitboard.RIGHT,
+        (-1, 0): bitboard.UP,
+        (1, 0): bitboard.DOWN
+    }
+
+    __slots__ = ('board', '_grid')
+
+    def __init__(self, seed, size=bitboard.SIZE, rng_mode='mt'):
+        if size != bitboard.SIZE:
+            raise ValueError(f"BitboardState only supports {bitboard.SIZE}x{bitboard.SIZE} boards.")
+        self._grid = None
+        super().__init__(seed, size, rng_mode)
+
+    @property
+    def grid(self):
+        """
+        The tile values as a read-only array, unpacked from the board the first time
+        it is needed and shared with the clones until the board changes. Assign a new
+        grid to change the board.
+        """
+        if self._grid is None:
+            self._grid = bitboard.unpack(self.board)
+            self._grid.setflags(write=False)
+        return self._grid
+
+    @grid.setter
+    def grid(self, grid):
+        self.board = bitboard.pack(grid)
+        self._grid = None
+
+    def __eq__(self, other):
+        if isinstance(other, BitboardState):
+            return self.board == other.board
+        return super().__eq__(other)
+
+    def __hash__(self):
+        return hash(self.board)
+
+    def key(self):
+        """Returns the packed board, which is already a compact key."""
+        return self.board
+
+    def _copy_board(self, state):
+        """
+        Copies the packed board into a state being cloned. The unpacked grid is
+        read-only, so the clone can share it until one of them moves.
+        """
+        state.board = self.board
+        state._grid = self._grid
+
+    def move_in_direction(self, delta_row, delta_col):
+        """
+        Moves the tiles of the board in the specified direction using the transition
+        tables, and adds a new random tile if any of them moved.
+        """
+        board, moved = bitboard.move(self.board, self.DIRECTIONS[(delta_row, delta_col)])
+        if moved:
+            self.board = board
+            self._grid = None
+            self.add_random_tile(delta_row, delta_col)
+
+    def add_random_tile(self, delta_row, delta_col):
+        """
+        Adds the next number on a random empty cell of the edge opposite to the move.
+        The candidate cells are listed in the same order as State.add_random_tile.
+        """
+        if delta_row == 0:
+            c = self.size - 1 if delta_col == -1 else 0
+            cells = [(r, c) for r in range(self.size) if bitboard.get_cell(self.board, r, c) == 0]
+        else:
+            r = self.size - 1 if delta_row == -1 else 0
+            cells = [(r, c) for c in range(self.size) if bitboard.get_cell(self.board, r, c) == 0]
+        if cells:
+            r, c = self.rnd.choice(cells)
+            self.board = bitboard.set_cell(self.board, r, c, bitboard.VALUE_RANKS[self.next_number])
+            self._grid = None
+            self.gen_next_number()
+
+    def completed_state(self):
+        """
+        Checks if no move can change the board, looking up every row and column in
+        the precomputed table of locked rows.
+        """
+        return bitboard.is_locked(self.board)
+
+    def empty_cells(self):
+        """Counts the empty cells with the feature tables of the rows (see engine.tables)."""
+        return tables.empty_cells(self.board)
+
+    def merge_pairs(self):
+        """Counts the mergeable pairs with the feature tables of the rows and columns."""
+        return tables.merge_pairs(self.board)
+
+    def total_points(self):
+        """Adds up the points of the four rows, looked up in the feature tables."""
+        return tables.total_points(self.board)
+
+    def max_points(self):
+        """Looks up the points of a board full of 768 tiles in the feature tables."""
+        full_row = sum(bitboard.VALUE_RANKS[768] << (4 * i) for i in range(self.size))
+        return tables.ROW_POINTS[full_row] * self.size
+
+    def edge_cost(self, e2):
+        """
+        Calculates the edge cost between two states, counting the changed cells
+        directly on the packed boards when possible.
+        """
+        if not isinstance(e2, BitboardState):
+            return super().edge_cost(e2)
+        celdas_movidas = bitboard.changed_cells(self.board, e2.board)
+        return 1 / celdas_movidas if celdas_movidas > 0 else 0
+
+    def changed_lines(self, other):
+        """
+        Returns the changed rows or columns, comparing the packed boards when possible.
+        """
+        if not isinstance(other, BitboardState):
+            return super().changed_lines(other)
+        rows, cols = bitboard.changed_lines(self.board, other.board)
+        return (rows, ()) if len(rows) <= len(cols) else ((), cols)
+
+
+def make_state(seed, size=4, rng_mode='mt'):
+    """
+    Creates the fastest State implementation available for the given board size.
+
+    Args:
+        seed (int): The seed for the random number generator.
+        size (int): Size of the game grid.
+        rng_mode (str): 'mt' to reproduce the random.Random games of a seed, or
+            'counter' for the counter-based generator (see engine.rng).
+
+    Returns:
+        State: A BitboardState for 4x4 boards, a State otherwise.
+    """
+    if size == bitboard.SIZE:
+        return BitboardState(seed, size, rng_mode)
+    return State(seed, size, rng_mode)
@@ -0,0 +1,212 @@
+"""
+Compact binary records of played games, and their replay verification.
+
+A record holds what is needed to play a game again: the seed, the random number
+generator mode and the board size, the moves packed 2 bits each and the points
+reached at the end. Replaying the moves on a new state (see state.make_state)
+must reach the same points, so the records of a sweep can be archived and checked
+again after every change of the engine without searching again.
+
+Records are appended to a single file, one write per record under an exclusive
+lock, so every worker process of a sweep can write to the same file:
+
+    python -m structures.game_record verify games.thgr --workers 8
+    python -m structures.game_record stats games.thgr
+"""
+import argparse
+import multiprocessing as mp
+import os
+import struct
+import sys
+from collections import deque, namedtuple
+from itertools import islice
+
+from state import make_state
+from structures.movements import pack_moves, unpack_moves
+from structures.transposition_store import locked
+
+MAGIC = b'THGR\x00\x00\x00\x01'
+RNG_MODES = ('mt', 'counter')
+
+# Record header: seed, generator mode (index in RNG_MODES), board size, points, number of moves.
+# The moves follow, packed 2 bits each (see structures.movements.pack_moves).
+HEADER = struct.Struct('<qBBdI')
+
+GameRecord = namedtuple('GameRecord', ['seed', 'rng_mode', 'size', 'moves', 'points'])
+
+
+def encode(record):
+    """
+    Encodes a game record.
+
+    Args:
+        record (GameRecord): The record, with integer seed and a list of MOVEMENTS.
+
+    Returns:
+        bytes: The header and the packed moves.
+    """
+    if not isinstance(record.seed, int):
+        raise ValueError("Only games with integer seeds can be recorded.")
+    header = HEADER.pack(record.seed, RNG_MODES.index(record.rng_mode), record.size, record.points, len(record.moves))
+    return header + pack_moves(record.moves)
+
+
+def read_records(path):
+    """
+    Reads the records of a file in the order in which they were written.
+
+    Args:
+        path (str): Path of the file.
+
+    Yields:
+        GameRecord: Every complete record of the file.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a game record file.")
+        while True:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:  # End of the file, or a record still being written
+                return
+            seed, mode, size, points, count = HEADER.unpack(header)
+            packed = f.read((count + 3) // 4)
+            if len(packed) < (count + 3) // 4:
+                return
+            yield GameRecord(seed, RNG_MODES[mode], size, unpack_moves(packed, count), points)
+
+
+class RecordWriter:
+    """
+    Appends game records to a file, creating it if it does not exist.
+
+    Every record is a single write to a file opened in append mode, under an
+    exclusive lock where fcntl is available, so several processes can share a file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.written = 0
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        with locked(self._fd):
+            if os.fstat(self._fd).st_size == 0:
+                os.write(self._fd, MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, record):
+        """
+        Appends a record to the file.
+
+        Args:
+            record (GameRecord): The record.
+        """
+        data = encode(record)
+        with locked(self._fd):
+            os.write(self._fd, data)
+        self.written += 1
+
+    def close(self):
+        """Closes the file."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def replay(record):
+    """
+    Plays the moves of a record on a new state.
+
+    Args:
+        record (GameRecord): The record.
+
+    Returns:
+        State: The state at the end of the moves.
+    """
+    state = make_state(record.seed, record.size, record.rng_mode)
+    for move in record.moves:
+        state.move(move.value)
+    return state
+
+
+def _replay_chunk(records):
+    """Pool task: returns the points reached by replaying every record of a chunk."""
+    return [float(replay(record).total_points()) for record in records]
+
+
+def _chunks(records, chunk_size):
+    """Splits an iterable of records into lists of chunk_size records."""
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def verify_records(records, workers=None, chunk_size=256):
+    """
+    Replays records in a pool of worker processes and compares their points.
+
+    The records are sent to the workers in chunks, so large files are verified
+    without loading every record at once.
+
+    Args:
+        records (iterable): The GameRecords, for example read_records(path).
+        workers (int): Number of worker processes, None for one per core, or 1 to
+            replay in this process.
+        chunk_size (int): Number of records replayed by every task.
+
+    Yields:
+        tuple: Every record and the points reached by its replay, in the order of the records.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in _chunks(records, chunk_size):
+            yield from zip(chunk, _replay_chunk(chunk))
+        return
+
+    with mp.Pool(workers) as pool:
+        pending = deque()  # Chunks in the order in which their points are returned by imap
+
+        def chunks():
+            for chunk in _chunks(records, chunk_size):
+                pending.append(chunk)
+                yield chunk
+
+        for points in pool.imap(_replay_chunk, chunks()):
+            yield from zip(pending.popleft(), points)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify or describe a file of game records.")
+    parser.add_argument('command', choices=['verify', 'stats'], help="'verify' to replay every game, 'stats' to describe the file.")
+    parser.add_argument('path', help="Path of the game record file.")
+    parser.add_argument('--workers', type=int, default=None, help="Replay processes (default: one per core).")
+    parser.add_argument('--chunk-size', type=int, default=256, help="Records replayed by every task.")
+    args = parser.parse_args(argv)
+
+    if args.command == 'stats':
+        games = moves = 0
+        for record in read_records(args.path):
+            games += 1
+            moves += len(record.moves)
+        print(f"{args.path}: {games} games, {moves} moves, {os.path.getsize(args.path)} bytes")
+        return 0
+
+    games = mismatches = 0
+    for record, points in verify_records(read_records(args.path), args.workers, args.chunk_size):
+        games += 1
+        if points != record.points:
+            mismatches += 1
+            print(f"seed {record.seed} ({record.rng_mode}, {record.size}x{record.size}): "
+                  f"recorded {record.points}, replayed {points}")
+    print(f"{games} games verified, {mismatches} mismatches.")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
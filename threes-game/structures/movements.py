@@ -0,0 +1,32 @@
+from enum import Enum
+
+class MOVEMENTS(Enum):
+    """
+    Move tokens returned by the search algorithms.
+
+    The value of every token is the direction accepted by State.move, so the
+    solvers never need pygame key codes.
+    """
+    UP = "UP"
+    RIGHT = "RIGHT"
+    DOWN = "DOWN"
+    LEFT = "LEFT"
+
+
+# 2-bit code of every move in the binary files (see structures.transposition_store
+# and structures.game_record), in the order of MOVEMENTS.
+MOVE_CODES = {move: code for code, move in enumerate(MOVEMENTS)}
+CODE_MOVES = list(MOVEMENTS)
+
+
+def pack_moves(moves):
+    """Packs a list of MOVEMENTS 2 bits each, four moves per byte."""
+    packed = bytearray((len(moves) + 3) // 4)
+    for i, move in enumerate(moves):
+        packed[i >> 2] |= MOVE_CODES[move] << (2 * (i & 3))
+    return bytes(packed)
+
+
+def unpack_moves(packed, count):
+    """Unpacks count MOVEMENTS packed by pack_moves."""
+    return [CODE_MOVES[(packed[i >> 2] >> (2 * (i & 3))) & 3] for i in range(count)]
@@ -1,9 +1,12 @@
-import pygame
 from state import State
+from structures.movements import MOVEMENTS
+from structures.persistent_set import EMPTY
 
 class Node:
     """Represents a node in the search algorithm."""
 
+    __slots__ = ('value', 'move_to_node', '_father', 'depth', 'f_cost', '_ancestor_keys', 'features')
+
     def __init__(self, value: State, move_to_node=None, father=None, f_cost=0):
         """
         Initializes a node.
@@ -17,6 +20,19 @@ class Node:
         self.move_to_node = move_to_node
         self.father = father
         self.f_cost = f_cost
+        self.features = None  # Features of an incremental heuristic, passed down to the children
+
+    @property
+    def father(self):
+        """The parent node of this node."""
+        return self._father
+
+    @father.setter
+    def father(self, father):
+        """Sets the parent node, updating the depth of this node."""
+        self._father = father
+        self.depth = 0 if father is None else father.depth + 1
+        self._ancestor_keys = None
 
     def __eq__(self, other):
         """Checks if two nodes are equal based on their state value."""
@@ -38,16 +54,51 @@ class Node:
 
         :return: A list of moves from the root to this node.
         """
-        return [] if self.father is None else self.father.moves_list() + [self.move_to_node]
+        moves = []
+        node = self
+        while node.father is not None:
+            moves.append(node.move_to_node)
+            node = node.father
+        moves.reverse()
+        return moves
 
     def antecesores(self):
         """
         Returns the list of ancestors of this node.
 
-        :return: A list of ancestor nodes.
+        :return: A list of ancestor nodes, from the root to the parent of this node.
         """
-        return [] if self.father is None else self.father.antecesores() + [self.father]
-    
+        ancestors = []
+        node = self.father
+        while node is not None:
+            ancestors.append(node)
+            node = node.father
+        ancestors.reverse()
+        return ancestors
+
+    def ancestor_keys(self):
+        """
+        Returns the set of the keys (State.key) of the states of the ancestors of this node.
+
+        The set is a PersistentSet built from the set of the parent the first time it
+        is needed, sharing its structure, so every node costs O(log depth) time and
+        memory instead of a copy of the set of its parent.
+
+        :return: A PersistentSet with the keys of the ancestors.
+        """
+        if self._ancestor_keys is None:
+            # Walk up to the closest node whose set is known and build the sets down from it
+            pending = []
+            node = self
+            while node._ancestor_keys is None and node.father is not None:
+                pending.append(node)
+                node = node.father
+            if node._ancestor_keys is None:
+                node._ancestor_keys = EMPTY
+            for child in reversed(pending):
+                child._ancestor_keys = child.father._ancestor_keys.add(child.father.value.key())
+        return self._ancestor_keys
+
     def sucesores(self):
         """
         Generates the successor nodes based on possible moves.
@@ -68,10 +119,10 @@ class Node:
         move_left_state = self.value.clone_state()
         move_left_state.move("LEFT")
 
-        move_up_node = Node(move_up_state, pygame.K_UP)
-        move_right_node = Node(move_right_state, pygame.K_RIGHT)
-        move_down_node = Node(move_down_state, pygame.K_DOWN)
-        move_left_node = Node(move_left_state, pygame.K_LEFT)
+        move_up_node = Node(move_up_state, MOVEMENTS.UP)
+        move_right_node = Node(move_right_state, MOVEMENTS.RIGHT)
+        move_down_node = Node(move_down_state, MOVEMENTS.DOWN)
+        move_left_node = Node(move_left_state, MOVEMENTS.LEFT)
 
         possible_moves = [move_up_node, move_right_node, move_down_node, move_left_node]
         valid_moves = [move for move in possible_moves if move != self]
@@ -89,10 +140,9 @@ class Node:
 
         :return: A list of successors that are not ancestors.
         """
-        sucesores = self.sucesores()
-        antecesores = self.antecesores()
+        antecesores = self.ancestor_keys()
 
-        return [move for move in sucesores if move not in antecesores]
+        return [move for move in self.sucesores() if move.value.key() not in antecesores]
 
     def update_f_cost(self, g_cost, h_cost):
         """
@@ -0,0 +1,82 @@
+HASH_BITS = 64
+HASH_MASK = (1 << HASH_BITS) - 1
+BRANCH_BITS = 4
+BRANCH_MASK = (1 << BRANCH_BITS) - 1
+
+
+class _Leaf:
+    """Keys of a persistent set that share the same hash."""
+
+    __slots__ = ('hash', 'keys')
+
+    def __init__(self, hash_, keys):
+        self.hash = hash_
+        self.keys = keys
+
+
+class PersistentSet:
+    """
+    Immutable hash set whose add returns a new set that shares almost all of its
+    structure with the old one.
+
+    The keys are stored in a hash trie with 16 branches per level (a tuple per
+    internal node, a _Leaf per hash), so add copies one 16-slot tuple per level
+    instead of the whole set, and both add and the membership test take
+    O(log n) time. A search tree can then keep the set of the ancestors of every
+    node, built from the set of its parent, in O(log depth) time and memory per
+    node.
+
+    Methods:
+        add(key): Returns a set with the key added.
+    """
+
+    __slots__ = ('_root', '_size')
+
+    def __init__(self, root=None, size=0):
+        self._root = root
+        self._size = size
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, key):
+        h = hash(key) & HASH_MASK
+        node = self._root
+        shift = 0
+        while node is not None:
+            if type(node) is _Leaf:
+                return node.hash == h and key in node.keys
+            node = node[(h >> shift) & BRANCH_MASK]
+            shift += BRANCH_BITS
+        return False
+
+    def add(self, key):
+        """
+        Returns a set with the key added, leaving this set unchanged.
+
+        :param key: A hashable key.
+        :return: The new set, or this set if it already contains the key.
+        """
+        if key in self:
+            return self
+        return PersistentSet(_insert(self._root, key, hash(key) & HASH_MASK, 0), self._size + 1)
+
+
+def _insert(node, key, h, shift):
+    """Returns a copy of the subtrie of a node with the key added."""
+    if node is None:
+        return _Leaf(h, (key,))
+    if type(node) is _Leaf:
+        if node.hash == h or shift >= HASH_BITS:
+            return _Leaf(node.hash, node.keys + (key,))
+        # Push the leaf one level down and insert the key next to it
+        children = [None] * (BRANCH_MASK + 1)
+        children[(node.hash >> shift) & BRANCH_MASK] = node
+        node = tuple(children)
+    i = (h >> shift) & BRANCH_MASK
+    children = list(node)
+    children[i] = _insert(node[i], key, h, shift + BRANCH_BITS)
+    return tuple(children)
+
+
+EMPTY = PersistentSet()
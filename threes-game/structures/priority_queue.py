@@ -0,0 +1,323 @@
+from collections import deque
+
+
+class IndexedHeap:
+    """
+    Binary min-heap of items indexed by a key, with decrease-key.
+
+    Every key is in the heap at most once: pushing a key that is already in the
+    heap with a lower priority moves its entry up instead of adding a second one,
+    so the heap never holds stale entries and its size is the number of live
+    nodes. Ties between equal priorities are broken by insertion order.
+
+    Attributes:
+        pushes (int): Number of keys added to the heap.
+        pops (int): Number of entries removed from the heap.
+        decreases (int): Number of priorities lowered in place.
+        stale (int): Number of pushes ignored because the key was already in the
+            heap with an equal or lower priority.
+
+    Methods:
+        push(key, item, priority): Adds the key, or lowers its priority if it is already in the heap.
+        pop(): Removes and returns the key and item with the lowest priority.
+        priority(key): Returns the priority of a key in the heap.
+    """
+
+    def __init__(self):
+        self._heap = []  # Entries [priority, order, key, item]
+        self._position = {}  # Position in _heap of the entry of every key
+        self._order = 0
+        self.pushes = 0
+        self.pops = 0
+        self.decreases = 0
+        self.stale = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __bool__(self):
+        return bool(self._heap)
+
+    def __contains__(self, key):
+        return key in self._position
+
+    def priority(self, key):
+        """
+        Returns the priority of a key in the heap.
+
+        :param key: The key of the entry.
+        :return: The current priority of the key.
+        """
+        return self._heap[self._position[key]][0]
+
+    def push(self, key, item, priority):
+        """
+        Adds the key to the heap, or replaces its item and lowers its priority when
+        the key is already in the heap with a higher one.
+
+        :param key: The key of the entry, usually State.key().
+        :param item: The item stored with the key, usually a Node.
+        :param priority: The priority of the entry, lowest first.
+        :return: True if the heap changed, False if the push was ignored.
+        """
+        i = self._position.get(key)
+        if i is None:
+            entry = [priority, self._order, key, item]
+            self._order += 1
+            self._heap.append(entry)
+            self._position[key] = len(self._heap) - 1
+            self._sift_up(len(self._heap) - 1)
+            self.pushes += 1
+            return True
+
+        entry = self._heap[i]
+        if priority >= entry[0]:
+            self.stale += 1
+            return False
+        entry[0] = priority
+        entry[3] = item
+        self._sift_up(i)
+        self.decreases += 1
+        return True
+
+    def pop(self):
+        """
+        Removes the entry with the lowest priority.
+
+        :return: A tuple with the key and the item of the entry.
+        """
+        heap = self._heap
+        last = heap.pop()
+        if heap:
+            entry = heap[0]
+            heap[0] = last
+            self._position[last[2]] = 0
+            self._sift_down(0)
+        else:
+            entry = last
+        del self._position[entry[2]]
+        self.pops += 1
+        return entry[2], entry[3]
+
+    def _sift_up(self, i):
+        heap, position = self._heap, self._position
+        entry = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if heap[parent][:2] <= entry[:2]:
+                break
+            heap[i] = heap[parent]
+            position[heap[i][2]] = i
+            i = parent
+        heap[i] = entry
+        position[entry[2]] = i
+
+    def _sift_down(self, i):
+        heap, position = self._heap, self._position
+        size = len(heap)
+        entry = heap[i]
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1][:2] < heap[child][:2]:
+                child += 1
+            if entry[:2] <= heap[child][:2]:
+                break
+            heap[i] = heap[child]
+            position[heap[i][2]] = i
+            i = child
+        heap[i] = entry
+        position[entry[2]] = i
+
+
+class BucketQueue:
+    """
+    Bucket queue for quantized priorities, with the same interface as IndexedHeap.
+
+    Priorities that are multiples of resolution are mapped to integer ranks, and
+    the entries of every rank are kept in a deque. Pop scans the ranks upwards from
+    the lowest one that may hold an entry, so push and pop take constant time
+    instead of comparing entries when the ranks are dense, as the f_cost of a
+    search with integer or half-integer costs. Inside a bucket, entries leave in
+    FIFO or LIFO order. Lowering the priority of a key moves it to another bucket
+    and leaves a dead entry behind, which is skipped when it is reached.
+
+    The first priority that is not a multiple of resolution (for example a cost
+    built from State.edge_cost) moves every entry to an IndexedHeap, which serves
+    the queue from then on, so entries always leave in priority order.
+
+    Attributes:
+        resolution (float): Step between two consecutive ranks.
+        order (str): 'fifo' or 'lifo', the order of the entries of a bucket.
+        pushes (int): Number of keys added to the queue.
+        pops (int): Number of entries removed from the queue.
+        decreases (int): Number of priorities lowered.
+        stale (int): Number of pushes ignored because the key was already in the
+            queue with an equal or lower priority.
+        skipped (int): Number of dead entries skipped when popping.
+
+    Methods:
+        push(key, item, priority): Adds the key, or lowers its priority if it is already in the queue.
+        pop(): Removes and returns the key and item with the lowest priority.
+        priority(key): Returns the priority of a key in the queue.
+        quantized(): Returns whether the queue still uses buckets.
+        buckets(): Returns the number of non-empty buckets.
+    """
+
+    ORDERS = ('fifo', 'lifo')
+
+    def __init__(self, resolution=0.5, order='fifo'):
+        if resolution <= 0:
+            raise ValueError("resolution must be positive.")
+        if order not in self.ORDERS:
+            raise ValueError(f"Unknown order '{order}', expected one of {self.ORDERS}.")
+        self.resolution = resolution
+        self.order = order
+        self._buckets = {}  # Deque of entries [key, item, alive] of every rank
+        self._cursor = None  # No bucket below this rank holds an entry
+        self._entries = {}  # Rank and live entry of every key
+        self._fallback = None  # IndexedHeap used once a priority is not quantized
+        self._pushes = 0
+        self._pops = 0
+        self._decreases = 0
+        self._stale = 0
+        self.skipped = 0
+
+    pushes = property(lambda self: self._pushes + (self._fallback.pushes if self._fallback is not None else 0))
+    pops = property(lambda self: self._pops + (self._fallback.pops if self._fallback is not None else 0))
+    decreases = property(lambda self: self._decreases + (self._fallback.decreases if self._fallback is not None else 0))
+    stale = property(lambda self: self._stale + (self._fallback.stale if self._fallback is not None else 0))
+
+    def __len__(self):
+        return len(self._fallback) if self._fallback is not None else len(self._entries)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __contains__(self, key):
+        if self._fallback is not None:
+            return key in self._fallback
+        return key in self._entries
+
+    def quantized(self):
+        """
+        Returns whether the queue still uses buckets.
+
+        :return: False once a priority that is not a multiple of resolution has moved the queue to a heap.
+        """
+        return self._fallback is None
+
+    def buckets(self):
+        """
+        Returns the number of non-empty buckets.
+
+        :return: The number of ranks with at least one entry, live or dead, or 0 once the queue uses a heap.
+        """
+        return len(self._buckets)
+
+    def priority(self, key):
+        """
+        Returns the priority of a key in the queue.
+
+        :param key: The key of the entry.
+        :return: The current priority of the key.
+        """
+        if self._fallback is not None:
+            return self._fallback.priority(key)
+        return self._entries[key][0] * self.resolution
+
+    def push(self, key, item, priority):
+        """
+        Adds the key to the queue, or replaces its item and lowers its priority when
+        the key is already in the queue with a higher one.
+
+        :param key: The key of the entry, usually State.key().
+        :param item: The item stored with the key, usually a Node.
+        :param priority: The priority of the entry, lowest first.
+        :return: True if the queue changed, False if the push was ignored.
+        """
+        if self._fallback is not None:
+            return self._fallback.push(key, item, priority)
+
+        rank = round(priority / self.resolution)
+        if abs(rank * self.resolution - priority) > 1e-9:
+            self._to_heap()
+            return self._fallback.push(key, item, priority)
+
+        current = self._entries.get(key)
+        if current is not None:
+            if rank >= current[0]:
+                self._stale += 1
+                return False
+            current[1][2] = False  # The old entry stays in its bucket until it is reached
+            self._decreases += 1
+        else:
+            self._pushes += 1
+
+        entry = [key, item, True]
+        bucket = self._buckets.get(rank)
+        if bucket is None:
+            bucket = self._buckets[rank] = deque()
+        bucket.append(entry)
+        self._entries[key] = (rank, entry)
+        if self._cursor is None or rank < self._cursor:
+            self._cursor = rank
+        return True
+
+    def pop(self):
+        """
+        Removes the entry with the lowest priority.
+
+        :return: A tuple with the key and the item of the entry.
+        """
+        if self._fallback is not None:
+            return self._fallback.pop()
+
+        buckets = self._buckets
+        while buckets:
+            bucket = buckets.get(self._cursor)
+            if bucket is None:  # Empty rank between two buckets
+                self._cursor += 1
+                continue
+            while bucket:
+                entry = bucket.popleft() if self.order == 'fifo' else bucket.pop()
+                if entry[2]:
+                    del self._entries[entry[0]]
+                    self._pops += 1
+                    if not bucket:
+                        del buckets[self._cursor]
+                    return entry[0], entry[1]
+                self.skipped += 1
+            del buckets[self._cursor]
+        self._cursor = None
+        raise IndexError("pop from an empty BucketQueue")
+
+    def _to_heap(self):
+        """Moves the live entries to an IndexedHeap, keeping the order in which they would be popped."""
+        heap = IndexedHeap()
+        for rank in sorted(self._buckets):
+            bucket = self._buckets[rank] if self.order == 'fifo' else reversed(self._buckets[rank])
+            for key, item, alive in bucket:
+                if alive:
+                    heap.push(key, item, rank * self.resolution)
+        heap.pushes = 0
+        self._buckets, self._cursor, self._entries = {}, None, {}
+        self._fallback = heap
+
+
+def make_open_list(kind='heap', resolution=0.5, order='fifo'):
+    """
+    Creates an open list for a best-first search.
+
+    :param kind: 'heap' for an IndexedHeap, or 'bucket' for a BucketQueue, which
+                 falls back to a heap if the priorities are not quantized.
+    :param resolution: Step between the priorities of a BucketQueue.
+    :param order: Order of the entries of a bucket of a BucketQueue, 'fifo' or 'lifo'.
+    :return: An empty open list.
+    """
+    if kind == 'heap':
+        return IndexedHeap()
+    if kind == 'bucket':
+        return BucketQueue(resolution, order)
+    raise ValueError(f"Unknown open list '{kind}', expected 'heap' or 'bucket'.")
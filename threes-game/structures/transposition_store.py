@@ -0,0 +1,336 @@
+"""
+Persistent store of solved positions, shared by searches across runs and processes.
+
+A position is a packed 4x4 board (see engine.bitboard), its next number and the
+position of its random number generator, which together fix every tile the game
+will add from then on. For every solved position the store keeps the best known
+remaining moves and the points they reach.
+
+Every record belongs to a namespace, a 64-bit hash of what determines the plan of
+the search that wrote it (see namespace_key and SearchAlgorithm.store_namespace).
+A search only reuses the records of its own namespace, so a plan taken from the
+store is the plan the search would have found itself, whatever other algorithms
+and heuristics share the file.
+
+The file is append-only: a record is never changed in place, and a better solution
+of a position is appended as a new record that hides the older one. Every process
+opens its own TranspositionStore, reads the file through a read-only memory map
+and picks up the records appended by other processes on the next lookup that
+misses. Appends are single writes to a file opened in append mode, under an
+exclusive lock where fcntl is available.
+
+Compaction rewrites the file with only the best record of every position. It
+replaces the file, so it must run while no search is using the store:
+
+    python -m structures.transposition_store compact store.tts
+    python -m structures.transposition_store stats store.tts
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from contextlib import contextmanager
+
+from engine import bitboard
+from state import BitboardState
+from structures.movements import pack_moves, unpack_moves
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where appends are not locked
+    fcntl = None
+
+MAGIC = b'THTS\x00\x00\x00\x02'
+
+# Record header: namespace, board, generator position, next number, points reached, number of moves.
+# The moves follow, packed 2 bits each (see structures.movements.pack_moves).
+HEADER = struct.Struct('<QQQBdI')
+
+
+def namespace_key(*parts):
+    """
+    Returns the namespace of the records written by a kind of search.
+
+    The namespace is a hash of the repr of the parts, stable across processes and
+    runs, unlike hash().
+
+    Args:
+        *parts: What determines the plans of the search, for example the names of
+            its algorithm and heuristic.
+
+    Returns:
+        int: A 64-bit namespace.
+    """
+    return int.from_bytes(hashlib.blake2b(repr(parts).encode(), digest_size=8).digest(), 'little')
+
+
+def position_key(state, namespace=0):
+    """
+    Returns the key of a state in the store.
+
+    Args:
+        state (State): The state.
+        namespace (int): The namespace of the records (see namespace_key).
+
+    Returns:
+        tuple: The namespace, the packed board, the next number and the position of
+            the random number generator, or None for boards that cannot be packed.
+    """
+    if state.size != bitboard.SIZE or state.rnd is None:
+        return None
+    board = state.board if isinstance(state, BitboardState) else bitboard.pack(state.grid)
+    return namespace, board, state.next_number, state.rnd.position()
+
+
+@contextmanager
+def locked(fd):
+    """
+    Holds an exclusive advisory lock of an open file, where fcntl is available.
+
+    Args:
+        fd (int): The file descriptor.
+    """
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class TranspositionStore:
+    """
+    Append-only file of solved positions with an in-memory index.
+
+    Attributes:
+        path (str): Path of the file.
+        hits (int): Number of lookups that found a solution.
+        misses (int): Number of lookups that found nothing.
+        appended (int): Number of records appended by this process.
+
+    Methods:
+        get(state, namespace): Returns the best known remaining moves and points of a state.
+        put(state, moves, points, namespace): Records a solution of a state if it is better than the known one.
+        put_path(path, moves, namespace): Records the solution of every node of a solved path.
+        compact(): Rewrites the file with the best record of every position.
+        close(): Closes the file.
+    """
+
+    def __init__(self, path):
+        """
+        Opens the store, creating the file if it does not exist.
+
+        Args:
+            path (str): Path of the file.
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.appended = 0
+        self._fd = None
+        self._map = None
+        self._open()
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, state, namespace=0):
+        """
+        Returns the best known solution from a state.
+
+        Args:
+            state (State): The state.
+            namespace (int): The namespace of the records to be consulted.
+
+        Returns:
+            tuple: The remaining moves and the points they reach, or None if the
+                state has not been solved yet.
+        """
+        key = position_key(state, namespace)
+        if key is None:
+            return None
+        entry = self.index.get(key)
+        if entry is None and self._refresh():  # Other processes may have solved it
+            entry = self.index.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        offset, points = entry  # Records are only indexed once they are in the map
+        count = HEADER.unpack_from(self._map, offset)[5]
+        start = offset + HEADER.size
+        return unpack_moves(self._map[start:start + (count + 3) // 4], count), points
+
+    def put(self, state, moves, points, namespace=0):
+        """
+        Records a solution of a state, unless an equal or better one is known.
+
+        Args:
+            state (State): The state.
+            moves (list): The MOVEMENTS that lead from the state to the end of the game.
+            points (float): The points of the game at the end.
+            namespace (int): The namespace of the record.
+
+        Returns:
+            bool: True if the solution was appended.
+        """
+        return self._append([(state, moves, points)], namespace) == 1
+
+    def put_path(self, path, moves, namespace=0):
+        """
+        Records the solution of every node of a path that ends the game.
+
+        Args:
+            path (list): The nodes from the root to the final state.
+            moves (list): The moves between the nodes of the path.
+            namespace (int): The namespace of the records.
+
+        Returns:
+            int: Number of appended records.
+        """
+        points = path[-1].value.total_points()
+        return self._append([(node.value, moves[i:], points) for i, node in enumerate(path)], namespace)
+
+    def compact(self):
+        """
+        Rewrites the file keeping only the best record of every position.
+
+        The file is replaced, so no other process may be using the store.
+
+        Returns:
+            tuple: The size of the file before and after the compaction, in bytes.
+        """
+        self._refresh()
+        before = os.fstat(self._fd).st_size
+        temporary = self.path + '.compact'
+        with open(temporary, 'wb') as f:
+            f.write(MAGIC)
+            for offset, _ in self.index.values():
+                count = HEADER.unpack_from(self._map, offset)[5]
+                f.write(self._map[offset:offset + HEADER.size + (count + 3) // 4])
+        os.replace(temporary, self.path)
+
+        self.close()
+        self._open()
+        return before, os.fstat(self._fd).st_size
+
+    def close(self):
+        """Closes the file and its memory map."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _open(self):
+        """Opens the file, writing its header if it is new, and indexes its records."""
+        self.index = {}  # Key -> (offset of the best record, points)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        with self._locked():
+            if os.fstat(self._fd).st_size == 0:
+                os.write(self._fd, MAGIC)
+        self._scanned = len(MAGIC)
+        self._refresh()
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a transposition store.")
+
+    def namespaces(self):
+        """
+        Counts the positions of every namespace.
+
+        Returns:
+            dict: Namespace -> number of positions.
+        """
+        self._refresh()
+        counts = {}
+        for key in self.index:
+            counts[key[0]] = counts.get(key[0], 0) + 1
+        return counts
+
+    def _append(self, solutions, namespace):
+        """
+        Appends the solutions that improve the known ones with a single write.
+
+        Args:
+            solutions (list): (state, moves, points) tuples.
+            namespace (int): The namespace of the records.
+
+        Returns:
+            int: Number of appended records.
+        """
+        records = []
+        for state, moves, points in solutions:
+            key = position_key(state, namespace)
+            if key is None:
+                continue
+            known = self.index.get(key)
+            if known is None or known[1] < points:
+                records.append(HEADER.pack(key[0], key[1], key[3], key[2], points, len(moves)) + pack_moves(moves))
+        if records:
+            with self._locked():
+                os.write(self._fd, b''.join(records))
+            self.appended += len(records)
+            self._refresh()
+        return len(records)
+
+    def _refresh(self):
+        """
+        Indexes the records appended since the last refresh.
+
+        Returns:
+            bool: True if new records were found.
+        """
+        size = os.fstat(self._fd).st_size
+        if self._map is not None and size <= len(self._map):
+            return False
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._fd, size, access=mmap.ACCESS_READ)
+
+        found = False
+        offset = self._scanned
+        while offset + HEADER.size <= size:
+            namespace, board, rng, next_number, points, count = HEADER.unpack_from(self._map, offset)
+            end = offset + HEADER.size + (count + 3) // 4
+            if end > size:  # A record still being written by another process
+                break
+            key = (namespace, board, next_number, rng)
+            known = self.index.get(key)
+            if known is None or known[1] < points:
+                self.index[key] = (offset, points)
+            offset = end
+            found = True
+        self._scanned = offset
+        return found
+
+    def _locked(self):
+        """Holds an exclusive advisory lock of the file, where fcntl is available."""
+        return locked(self._fd)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or compact a transposition store.")
+    parser.add_argument('command', choices=['stats', 'compact'], help="'stats' to describe the store, 'compact' to rewrite it.")
+    parser.add_argument('path', help="Path of the store.")
+    args = parser.parse_args(argv)
+
+    store = TranspositionStore(args.path)
+    try:
+        if args.command == 'compact':
+            before, after = store.compact()
+            print(f"{args.path}: {len(store)} positions, {before} -> {after} bytes")
+        else:
+            print(f"{args.path}: {len(store)} positions in {len(store.namespaces())} namespaces, "
+                  f"{os.path.getsize(args.path)} bytes")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
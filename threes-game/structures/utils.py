@@ -1,7 +1,7 @@
-import pygame
 from enum import Enum
 
-from algorithms import BreadthFirstSearch, DepthFirstSearch, GreedySearch, AStar, AStarModified
+from algorithms import BreadthFirstSearch, DepthFirstSearch, GreedySearch, AStar, AStarModified, IDAStar, BeamSearch, Expectimax, MCTS
+from structures.movements import MOVEMENTS
 
 class GAME_MODES(Enum):
     USER = 0
@@ -13,24 +13,31 @@ class ALGORITHMS(Enum):
     GREEDY_SEARCH = 2
     A_STAR = 3
     A_STAR_MODIFIED = 4
-
-class MOVEMENTS(Enum):
-    UP = 0
-    DOWN = 1
-    LEFT = 2
-    RIGHT = 3
+    IDA_STAR = 5
+    BEAM_SEARCH = 6
+    EXPECTIMAX = 7
+    MCTS = 8
 
 ALGORITHM_CLASSES = {
     ALGORITHMS.DEPTH_FIRST_SEARCH: DepthFirstSearch,
     ALGORITHMS.BREADTH_FIRST_SEARCH: BreadthFirstSearch,
     ALGORITHMS.GREEDY_SEARCH: GreedySearch,
     ALGORITHMS.A_STAR: AStar,
-    ALGORITHMS.A_STAR_MODIFIED: AStarModified
+    ALGORITHMS.A_STAR_MODIFIED: AStarModified,
+    ALGORITHMS.IDA_STAR: IDAStar,
+    ALGORITHMS.BEAM_SEARCH: BeamSearch,
+    ALGORITHMS.EXPECTIMAX: Expectimax,
+    ALGORITHMS.MCTS: MCTS
+}
+
+# Algorithms whose constructor takes a cache_size for their heuristic values
+CACHED_ALGORITHMS = {
+    ALGORITHMS.GREEDY_SEARCH,
+    ALGORITHMS.A_STAR,
+    ALGORITHMS.A_STAR_MODIFIED,
+    ALGORITHMS.IDA_STAR,
+    ALGORITHMS.BEAM_SEARCH,
+    ALGORITHMS.EXPECTIMAX
 }
 
-TRANSLATE_MOVES = {
-    pygame.K_LEFT: "LEFT",
-    pygame.K_RIGHT: "RIGHT",
-    pygame.K_UP: "UP",
-    pygame.K_DOWN: "DOWN"
-}
\ No newline at end of file
+TRANSLATE_MOVES = {movement: movement.value for movement in MOVEMENTS}
\ No newline at end of file
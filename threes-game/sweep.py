@@ -0,0 +1,252 @@
+"""
+Non-interactive benchmark runner: plays every combination of seeds, algorithms and
+heuristics in a pool of worker processes and streams one record per run to a CSV
+or JSON Lines file as soon as the run finishes.
+
+Every run is a separate process, so a run that goes over its timeout is killed
+and recorded with the status 'timeout' instead of blocking the sweep.
+
+With --store, the A* and greedy runs share a TranspositionStore file, so every
+solved position is reused by the later runs of the sweep and of later sweeps with
+the same algorithm and heuristic.
+With --records, every finished game is appended to a compact game record file
+(see structures.game_record), which can be verified again by replaying it.
+
+Run it from the threes-game directory, for example:
+
+    python sweep.py --seeds 1 2 3 --algorithms A_STAR GREEDY_SEARCH \\
+        --heuristics MaxTileAndFreeCells NumberEquals --workers 8 --timeout 60 --output results.jsonl
+"""
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import os
+import queue
+import signal
+import sys
+import time
+import traceback
+from itertools import product
+
+from algorithms.strategy.more_free_cells_high_value import MoreFreeCellsHighValue
+from algorithms.strategy.number_equals import NumberEquals
+from algorithms.strategy.dijkstra import Dijkstra
+from algorithms.strategy.max_value_and_adjacent import MaxValueAndAdjacent
+from algorithms.strategy.max_tiles_combination_potential import MaxTilesCombinationPotential
+from algorithms.strategy.max_tile_and_free_cells import MaxTileAndFreeCells
+from algorithms.strategy.max_achievable_minus_current import MaxAchievableMinusCurrentScore
+from algorithms.strategy.min_non_free_cells import MinNonFreeCells
+from algorithms.strategy.max_move_cells_and_fusion import MaxMoveCellsAndFusion
+from structures.utils import ALGORITHMS
+from structures.transposition_store import TranspositionStore
+from structures.game_record import RecordWriter as GameRecordWriter
+from headless_game import HeadlessGame
+
+HEURISTICS = {
+    'MoreFreeCellsHighValue': MoreFreeCellsHighValue,
+    'NumberEquals': NumberEquals,
+    'Dijkstra': Dijkstra,
+    'MaxValueAndAdjacent': MaxValueAndAdjacent,
+    'MaxTilesCombinationPotential': MaxTilesCombinationPotential,
+    'MaxTileAndFreeCells': MaxTileAndFreeCells,
+    'MaxAchievableMinusCurrentScore': MaxAchievableMinusCurrentScore,
+    'MinNonFreeCells': MinNonFreeCells,
+    'MaxMoveCellsAndFusion': MaxMoveCellsAndFusion
+}
+
+METRICS = ['expansions', 'generated', 'deduped', 'heuristic_calls', 'clones', 'peak_open', 'expansions_per_second',
+           'store_hits', 'store_misses', 'store_moves', 'time_expand', 'time_heuristic']
+
+STORE_ALGORITHMS = {ALGORITHMS.A_STAR, ALGORITHMS.GREEDY_SEARCH}  # Algorithms that accept a TranspositionStore
+
+FIELDS = ['seed', 'algorithm', 'heuristic', 'status', 'points', 'time', 'open', 'closed', 'depth', *METRICS, 'error']
+
+
+def run_job(job, store_path=None, records_path=None, cache_size=None):
+    """
+    Plays one game and returns its record.
+
+    Args:
+        job (tuple): The seed, the algorithm name and the heuristic name (or None).
+        store_path (str): Path of the TranspositionStore shared by the runs, or None.
+        records_path (str): Path of the game record file shared by the runs, or None.
+        cache_size (int): Maximum number of heuristic values cached by the run, or None to disable the cache.
+
+    Returns:
+        dict: The record of the run, with the status 'ok' or 'error'.
+    """
+    seed, algorithm, heuristic = job
+    record = dict.fromkeys(FIELDS)
+    record.update(seed=seed, algorithm=algorithm, heuristic=heuristic)
+    store = None
+    try:
+        heu = HEURISTICS[heuristic]() if heuristic else None
+        if store_path is not None and ALGORITHMS[algorithm] in STORE_ALGORITHMS:
+            store = TranspositionStore(store_path)
+        game = HeadlessGame(seed, ALGORITHMS[algorithm], heu, store=store, cache_size=cache_size)
+        points, elapsed, opened, closed, depth, metrics = game.run()
+        record.update(status='ok', points=points, time=elapsed, open=opened, closed=closed, depth=depth)
+        record.update((name, value) for name, value in metrics.as_dict().items() if name in METRICS)
+        if records_path is not None:
+            with GameRecordWriter(records_path) as writer:
+                writer.write(game.game_record())
+    except Exception:
+        record.update(status='error', error=traceback.format_exc(limit=3))
+    finally:
+        if store is not None:
+            store.close()
+    return record
+
+
+def _worker(job, results, store_path=None, records_path=None, cache_size=None):
+    """
+    Process target: runs a job and puts its record in the results queue.
+
+    The process leads its own process group, so the worker processes that an
+    algorithm starts (the MCTS pool) are killed with it when the job times out.
+    """
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    results.put(run_job(job, store_path, records_path, cache_size))
+
+
+def _drain(results, timeout):
+    """Returns the records in the results queue, waiting up to timeout seconds for the first one."""
+    records = []
+    try:
+        records.append(results.get(timeout=timeout))
+        while True:
+            records.append(results.get_nowait())
+    except queue.Empty:
+        return records
+
+
+def _kill(process):
+    """Kills a job process and every process it started, and waits for it."""
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:  # The process has already exited
+            pass
+    else:
+        process.terminate()
+    process.join()
+
+
+def sweep(jobs, workers=None, timeout=None, store_path=None, records_path=None, cache_size=None):
+    """
+    Runs the jobs in parallel, one process per job, and yields their records as they finish.
+
+    Args:
+        jobs (list): The (seed, algorithm, heuristic) tuples to run.
+        workers (int): Maximum number of runs at the same time, None for one per core.
+        timeout (float): Seconds a run may take before it is killed, or None for no limit.
+        store_path (str): Path of the TranspositionStore shared by the A* and greedy runs, or None.
+        records_path (str): Path of the game record file every finished run is appended to, or None.
+        cache_size (int): Maximum number of heuristic values cached by every run, or None to disable the cache.
+
+    Yields:
+        dict: The record of every run, in the order in which the runs finish.
+    """
+    workers = workers or os.cpu_count() or 1
+    results = mp.Queue()
+    pending = list(reversed(jobs))
+    running = {}  # Job -> (process, start time)
+
+    try:
+        while pending or running:
+            while pending and len(running) < workers:
+                job = pending.pop()
+                # Not daemonic, so that the algorithms can start worker processes of their own
+                process = mp.Process(target=_worker, args=(job, results, store_path, records_path, cache_size))
+                process.start()
+                running[job] = (process, time.monotonic())
+
+            # Take every record that has arrived before looking for timeouts, so a run that
+            # finished in time is not recorded as a timeout
+            for record in _drain(results, 0.1):
+                job = (record['seed'], record['algorithm'], record['heuristic'])
+                if job not in running:  # Already recorded as a timeout
+                    continue
+                process, _ = running.pop(job)
+                process.join()
+                yield record
+
+            now = time.monotonic()
+            for job, (process, start) in list(running.items()):
+                if timeout is not None and now - start > timeout:
+                    _kill(process)
+                    del running[job]
+                    record = dict.fromkeys(FIELDS)
+                    record.update(seed=job[0], algorithm=job[1], heuristic=job[2], status='timeout', time=now - start)
+                    yield record
+                elif not process.is_alive() and results.empty():
+                    process.join()
+                    del running[job]
+                    record = dict.fromkeys(FIELDS)
+                    record.update(seed=job[0], algorithm=job[1], heuristic=job[2], status='error',
+                                  error=f"Worker exited with code {process.exitcode}")
+                    yield record
+    finally:
+        for process, _ in running.values():  # The sweep was stopped early, the job processes are not daemonic
+            _kill(process)
+
+
+class RecordWriter:
+    """Writes records to a CSV or JSON Lines stream, flushing after every record."""
+
+    def __init__(self, stream, fmt):
+        self.stream = stream
+        self.fmt = fmt
+        if fmt == 'csv':
+            self.writer = csv.DictWriter(stream, fieldnames=FIELDS)
+            self.writer.writeheader()
+
+    def write(self, record):
+        if self.fmt == 'csv':
+            self.writer.writerow(record)
+        else:
+            self.stream.write(json.dumps(record) + '\n')
+        self.stream.flush()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run every combination of seeds, algorithms and heuristics in parallel.")
+    parser.add_argument('--seeds', nargs='+', type=int, required=True, help="Seeds of the games.")
+    parser.add_argument('--algorithms', nargs='+', choices=[algorithm.name for algorithm in ALGORITHMS],
+                        default=[ALGORITHMS.A_STAR.name], help="Algorithms to run.")
+    parser.add_argument('--heuristics', nargs='+', choices=list(HEURISTICS) + ['none'],
+                        default=list(HEURISTICS), help="Heuristics to run, 'none' for algorithms that do not use one.")
+    parser.add_argument('--workers', type=int, default=None, help="Runs at the same time (default: one per core).")
+    parser.add_argument('--timeout', type=float, default=None, help="Seconds a run may take before it is killed.")
+    parser.add_argument('--output', default='-', help="Output file, '-' for the standard output.")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default=None,
+                        help="Output format (default: from the extension of the output file, jsonl otherwise).")
+    parser.add_argument('--store', default=None,
+                        help="TranspositionStore file shared by the A* and greedy runs, created if it does not exist.")
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help="Heuristic values (entries) cached by every run, 0 to disable the cache (default: 0).")
+    parser.add_argument('--records', default=None,
+                        help="Game record file every finished game is appended to, created if it does not exist.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    fmt = args.format or ('csv' if args.output.endswith('.csv') else 'jsonl')
+    heuristics = [None if heuristic == 'none' else heuristic for heuristic in args.heuristics]
+    jobs = list(dict.fromkeys(product(args.seeds, args.algorithms, heuristics)))  # Without repeated runs
+
+    stream = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        writer = RecordWriter(stream, fmt)
+        for record in sweep(jobs, args.workers, args.timeout, args.store, args.records, args.cache_size or None):
+            writer.write(record)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+
+
+if __name__ == '__main__':
+    main()
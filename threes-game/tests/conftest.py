@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules of the game are imported from the threes-game directory (see sweep.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
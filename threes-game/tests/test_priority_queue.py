@@ -0,0 +1,29 @@
+import random
+
+import pytest
+
+from structures.priority_queue import BucketQueue, IndexedHeap
+
+
+def pop_all(queue):
+    order = []
+    while queue:
+        key, _ = queue.pop()
+        order.append(key)
+    return order
+
+
+@pytest.mark.parametrize('fractional', [False, True])
+def test_bucket_queue_pops_in_heap_order(fractional):
+    rnd = random.Random(7)
+    heap, buckets = IndexedHeap(), BucketQueue(resolution=0.5)
+    for _ in range(500):
+        key = rnd.randrange(100)
+        priority = rnd.randrange(40) / 2 + (rnd.random() / 1000 if fractional else 0)
+        assert heap.push(key, key, priority) == buckets.push(key, key, priority)
+
+    assert buckets.quantized() != fractional
+    priorities = {key: heap.priority(key) for key in list(heap._position)}
+    order = pop_all(buckets)
+    assert sorted(order) == sorted(priorities)
+    assert [priorities[key] for key in order] == sorted(priorities.values())
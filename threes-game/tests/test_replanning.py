@@ -0,0 +1,38 @@
+import pytest
+
+from algorithms.a_star import AStar
+from algorithms.search_algorithm import SearchBudget
+from algorithms.strategy.max_tile_and_free_cells import MaxTileAndFreeCells
+from headless_game import HeadlessGame
+from state import make_state
+from structures.utils import ALGORITHMS
+
+UNINFORMED = {ALGORITHMS.DEPTH_FIRST_SEARCH, ALGORITHMS.BREADTH_FIRST_SEARCH}
+
+
+@pytest.mark.parametrize('open_list', ['heap', 'bucket'])
+def test_a_star_replans_after_partial_plan(open_list):
+    algorithm = AStar(make_state(1), MaxTileAndFreeCells(), headless=True, open_list=open_list,
+                      budget=SearchBudget(max_expansions=5))
+    assert algorithm.result == "PARTIAL"
+    first_open_list = algorithm.open_list
+    assert len(first_open_list) > 0
+
+    state = make_state(1)
+    while not state.completed_state():
+        move = algorithm.get_next_move()
+        if move is None:
+            break
+        state.move(move.value)
+
+    assert state.completed_state()
+    assert algorithm.open_list is not first_open_list  # Every search starts with an empty open list
+
+
+@pytest.mark.parametrize('algorithm', list(ALGORITHMS), ids=lambda algorithm: algorithm.name)
+def test_every_algorithm_finishes_a_game_with_a_small_budget(algorithm):
+    heuristic = None if algorithm in UNINFORMED else MaxTileAndFreeCells()
+    game = HeadlessGame(1, algorithm, heuristic, budget=SearchBudget(max_expansions=5))
+    points, *_ = game.run()
+    assert game.state.completed_state()
+    assert points == game.state.total_points()
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from engine.batch import DIRECTIONS, to_ranks
+from engine.selfplay import BatchSimulator, greedy_policy, random_policy
+from algorithms.strategy.max_tile_and_free_cells import MaxTileAndFreeCells
+from state import State
+
+
+@pytest.mark.parametrize('size', [4, 5])
+def test_batch_matches_sequential_states(size):
+    seeds = list(range(32))
+    simulator = BatchSimulator(seeds, size)
+    states = [State(seed, size, 'counter') for seed in seeds]
+    rng = np.random.default_rng(0)
+
+    for _ in range(60):
+        moves = rng.integers(len(DIRECTIONS), size=len(seeds))  # Including moves that change nothing
+        running = ~simulator.done
+        simulator.step(moves)
+        for i, state in enumerate(states):
+            if running[i]:
+                state.move(DIRECTIONS[moves[i]])
+
+        assert np.array_equal(simulator.boards, to_ranks(np.array([state.grid for state in states])))
+        assert simulator.next_numbers.tolist() == [state.next_number for state in states]
+        assert simulator.counters.tolist() == [state.rnd.counter for state in states]
+        assert simulator.done.tolist() == [state.completed_state() for state in states]
+    assert simulator.scores().tolist() == [state.total_points() for state in states]
+
+
+def test_run_plays_every_game_to_the_end():
+    simulator = BatchSimulator(range(64))
+    points = simulator.run(greedy_policy(MaxTileAndFreeCells()))
+    assert simulator.done.all()
+
+    assert points.tolist() == simulator.scores().tolist()
+    assert (simulator.moves > 0).all()
+
+
+def test_random_policy_only_chooses_moves_that_change_the_board():
+    simulator = BatchSimulator(range(16))
+    policy = random_policy(seed=1)
+    while not simulator.done.all():
+        running = np.flatnonzero(~simulator.done)
+        moves = np.zeros(len(simulator), dtype=np.int64)
+        moves[running] = policy(simulator.boards[running], simulator.next_numbers[running])
+        moved = simulator.step(moves)
+        assert moved[running].all()
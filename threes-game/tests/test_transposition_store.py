@@ -0,0 +1,34 @@
+import pytest
+
+from algorithms.search_algorithm import SearchBudget
+from algorithms.strategy.max_tile_and_free_cells import MaxTileAndFreeCells
+from algorithms.strategy.min_non_free_cells import MinNonFreeCells
+from headless_game import HeadlessGame
+from structures.transposition_store import TranspositionStore
+from structures.utils import ALGORITHMS
+
+
+def play(algorithm, heuristic, store=None):
+    game = HeadlessGame(4, algorithm, heuristic, budget=SearchBudget(max_expansions=50), store=store)
+    points, *_, metrics = game.run()
+    return points, game.moves, metrics
+
+
+@pytest.mark.parametrize('algorithm', [ALGORITHMS.A_STAR, ALGORITHMS.GREEDY_SEARCH], ids=lambda algorithm: algorithm.name)
+def test_warm_start_does_not_change_the_plan(tmp_path, algorithm):
+    cold_points, cold_moves, _ = play(algorithm, MaxTileAndFreeCells())
+
+    store = TranspositionStore(str(tmp_path / 'store.tts'))
+    try:
+        for other in (ALGORITHMS.A_STAR, ALGORITHMS.GREEDY_SEARCH):  # Records of other searches must not be reused
+            play(other, MinNonFreeCells(), store)
+        play(ALGORITHMS.A_STAR if algorithm == ALGORITHMS.GREEDY_SEARCH else ALGORITHMS.GREEDY_SEARCH,
+             MaxTileAndFreeCells(), store)
+        assert play(algorithm, MaxTileAndFreeCells(), store)[2].store_hits == 0
+
+        points, moves, metrics = play(algorithm, MaxTileAndFreeCells(), store)
+    finally:
+        store.close()
+
+    assert metrics.store_hits > 0
+    assert (points, moves) == (cold_points, cold_moves)
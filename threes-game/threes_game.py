@@ -1,7 +1,8 @@
 import pygame
 import time
-from state import State
+from state import make_state
 from structures.utils import GAME_MODES, TRANSLATE_MOVES, ALGORITHM_CLASSES
+from headless_game import HeadlessGame
 
 # Colors for the game interface
 BACKGROUND_COLOR = (187, 173, 160)
@@ -25,7 +26,7 @@ class ThreeGame:
     and game logic.
     """
 
-    def __init__(self, seed, game_mode, alg, heu, size=4, headless=False):
+    def __init__(self, seed, game_mode, alg, heu, size=4, headless=False, rng_mode='mt', budget=None):
         """
         Initialize the Threes game.
 
@@ -35,22 +36,27 @@ class ThreeGame:
             alg: Algorithm to use for AI.
             heu: Heuristic to use for AI.
             size: Size of the board (default 4).
-            headless: Indicates whether to run without a graphical interface.
+            headless: Indicates whether to run without a graphical interface. The display
+                is only initialized when it is False.
+            rng_mode: Random number generator of the state ('mt' or 'counter').
+            budget: SearchBudget of every search of the algorithm, bounding the time per move.
         """
-        pygame.init()
         self.seed = seed
         self.game_mode = game_mode
         self.size = size
         self.algorithm = alg
-        self.state = State(self.seed)
+        self.rng_mode = rng_mode
+        self.state = make_state(self.seed, self.size, rng_mode)
         self.heuristic = heu
-        self.screen = pygame.display.set_mode(
-            (self.size * (CELL_SIZE + MARGIN) + NEXT_NUM_SPACE, self.size * (CELL_SIZE + MARGIN))
-        )
-        self.font = pygame.font.Font(None, 55)
-        pygame.display.set_caption("Threes Game")
+        self.budget = budget
 
         if not headless:
+            pygame.init()
+            self.screen = pygame.display.set_mode(
+                (self.size * (CELL_SIZE + MARGIN) + NEXT_NUM_SPACE, self.size * (CELL_SIZE + MARGIN))
+            )
+            self.font = pygame.font.Font(None, 55)
+            pygame.display.set_caption("Threes Game")
             self.draw_grid()
 
     def draw_grid(self):
@@ -205,7 +211,14 @@ class ThreeGame:
 
         Args:
             headless: Indicates whether to run without a graphical interface.
+
+        Returns:
+            tuple: The points, the elapsed time in seconds, the open nodes, closed nodes and
+                depth reported by the algorithm, and its SearchMetrics (None in user mode).
         """
+        if headless and self.game_mode == GAME_MODES.IA:  # Play without the display, see HeadlessGame
+            return HeadlessGame(self.seed, self.algorithm, self.heuristic, self.size, self.rng_mode, self.budget).run()
+
         start_time = time.time()
         if not headless:
             print(f"Running the game with parameters: {self.seed}, {self.game_mode}, {self.algorithm}")
@@ -216,16 +229,16 @@ class ThreeGame:
                  pygame.K_DOWN: "DOWN"}
 
         running = True
-        points = 0
+        points, opened, closed, depth, metrics = 0, None, None, None, None
 
         if self.game_mode == GAME_MODES.USER:
             self.run_user_mode(MOVES, running)
         elif self.game_mode == GAME_MODES.IA:
-            points, opened, closed, depth = self.run_ai_mode(running, headless)
+            points, opened, closed, depth, metrics = self.run_ai_mode(running)
 
         end_time = time.time()
 
-        return points, end_time - start_time, opened, closed, depth
+        return points, end_time - start_time, opened, closed, depth, metrics
 
     def run_user_mode(self, MOVES, running):
         """
@@ -249,39 +262,35 @@ class ThreeGame:
 
             self.draw_grid()
 
-    def run_ai_mode(self, running, headless):
+    def run_ai_mode(self, running):
         """
-        Handle the AI mode gameplay loop.
+        Handle the AI mode gameplay loop on the display. Headless games are played
+        by HeadlessGame instead (see run).
 
         Args:
             running: Boolean indicating whether the game is still running.
-            headless: Indicates whether to run without a graphical interface.
 
         Returns:
-            Total points scored.
+            tuple: The points, the open nodes, closed nodes and depth reported by the
+                algorithm, and its SearchMetrics.
         """
-        algorithm_class = ALGORITHM_CLASSES[self.algorithm](self.state, self.heuristic, headless=headless)
+        algorithm_class = ALGORITHM_CLASSES[self.algorithm](self.state, self.heuristic, budget=self.budget)
 
-        if not headless:
-            print(f"Sequence of moves to the optimal path:\n {[TRANSLATE_MOVES[move] for move in algorithm_class.moves_list]}")
+        print(f"Sequence of moves to the optimal path:\n {[TRANSLATE_MOVES[move] for move in algorithm_class.moves_list]}")
 
         while running:
             next_move = algorithm_class.get_next_move()
             if next_move is not None:
                 translated_move = TRANSLATE_MOVES[next_move]
-                if not headless:
-                    print(f"({algorithm_class.it}/{len(algorithm_class.moves_list)}) AI Moves: {TRANSLATE_MOVES[next_move]}")
+                print(f"({algorithm_class.it}/{len(algorithm_class.moves_list)}) AI Moves: {TRANSLATE_MOVES[next_move]}")
 
                 self.state.move(translated_move)
                 if self.state.completed_state():
-                    if headless:
-                        opened, closed, depth = algorithm_class.returnOpenAndClose()
-                        points = self.state.total_points()
-                        return points, opened, closed, depth
                     self.show_points_window()
                     running = False
             self.draw_grid()
 
             time.sleep(0.25)
 
-        return 0
+        opened, closed, depth = algorithm_class.returnOpenAndClose()
+        return self.state.total_points(), opened, closed, depth, algorithm_class.metrics